@@ -1,37 +1,36 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 import sqlite3
+import math
+import time
 from datetime import datetime, date
-import textwrap
 import streamlit_sortables as sortables
 import initialization
 import scraping
-from groq import Groq
 import theme
-from PyPDF2 import PdfReader
-
-groq_client = Groq(api_key="GROQ_API_KEY")
+import profiler
+import figures
+import assistant
+import query_router
+import llm_client
+import image_export
+import manual_import
+import aggregates
+import dataset
+
+llm = llm_client.get_client()
 
 def get_groq_summary(text: str):
     """Send text to Groq AI and get a summary/response"""
-    response = groq_client.chat.completions.create(
-        model="moonshotai/Kimi-K2-Instruct-0905",
-        messages=[{"role": "user", "content": text}],
+    return llm.complete(
+        [{"role": "user", "content": text}],
+        model=assistant.ASSISTANT_MODEL,
         temperature=0.7
     )
-    return response.choices[0].message.content
-
-def extract_text_from_pdf(file_path):
-    reader = PdfReader(file_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
-
 
 st.set_page_config(page_title="Car Price Dashboard", layout="wide")
+prof = profiler.start_rerun(st.session_state)
 
 
 # =====================
@@ -42,16 +41,21 @@ with st.sidebar:
     light_mode = st.toggle("🌞 Light Mode", value=False)
     custom_css, plot_bgcolor, font_color = theme.apply_theme(light_mode)
     st.markdown(custom_css, unsafe_allow_html=True)
+    show_profiler = st.toggle("⏱ Show Rerun Profiler", value=False)
 
     if st.button("🔄 Fetch Latest Prices"):
         with st.spinner("Calling brand APIs in parallel..."):
-            scraped = scraping.scrape_all_brands_parallel()
+            scraped, scrape_summary = scraping.scrape_all_brands_parallel()
             if scraped:
-                initialization.store_prices(scraped)
-                st.success(f"Scraped & stored {len(scraped)} records.")
+                n_changes = initialization.store_prices(scraped)
+                st.success(f"Scraped & stored {len(scraped)} records, {n_changes} price changes.")
             else:
                 st.error("No prices scraped.")
+        with st.expander("📡 Scrape Metrics", expanded=False):
+            st.dataframe(scrape_summary, use_container_width=True, hide_index=True)
 
+if show_profiler:
+    profiler.render_sidebar_panel(st, st.session_state, plot_bgcolor, font_color)
 
 
 # =====================
@@ -61,51 +65,64 @@ st.title("🚗 Car Price Dashboard")
 
 
 
-initialization.init_db()
-df = initialization.get_latest_prices()
-if df.empty:
-    st.info("No data yet. Use **Fetch Latest Prices** from the sidebar.")
-    st.stop()
+with prof.span("db_load"):
+    initialization.init_db()
+    # Shared across sessions and rebuilt only when the data version changes
+    snapshot = dataset.current()
+    if snapshot.table.num_rows == 0:
+        st.info("No data yet. Use **Fetch Latest Prices** from the sidebar.")
+        st.stop()
 
-# Ensure numeric
-df["price"] = pd.to_numeric(df["price"], errors="coerce")
-df["price_lakhs"] = (df["price"] / 100000).round(2)
 
+with prof.span("filters"):
+    st.sidebar.header("Filters")
+    cities_available = list(snapshot.city_bounds)
+    selected_city = st.sidebar.selectbox(
+        "City",
+        options=cities_available,
+        index=cities_available.index(initialization.DEFAULT_CITY) if initialization.DEFAULT_CITY in cities_available else 0,
+    )
+    df = dataset.view(snapshot, selected_city)  # zero-copy, read-only by convention
 
-st.sidebar.header("Filters")
-brands_available = sorted(df["brand"].unique())
-selected_brands = st.sidebar.multiselect("Brand(s)", options=brands_available, default=[])
+    brands_available = sorted(df["brand"].unique())
+    selected_brands = st.sidebar.multiselect("Brand(s)", options=brands_available, default=[])
 
-models_available = sorted(df[df["brand"].isin(selected_brands)]["model"].unique())
-selected_models = st.sidebar.multiselect("Model(s)", options=models_available, default=[])
+    models_available = sorted(df[df["brand"].isin(selected_brands)]["model"].unique())
+    selected_models = st.sidebar.multiselect("Model(s)", options=models_available, default=[])
 
-fuel_available = sorted(df[df["brand"].isin(selected_brands) & df["model"].isin(selected_models)]["fuel"].unique())
-selected_fuel = st.sidebar.multiselect("Fuel(s)", options=fuel_available, default=fuel_available)
+    fuel_available = sorted(df[df["brand"].isin(selected_brands) & df["model"].isin(selected_models)]["fuel"].unique())
+    selected_fuel = st.sidebar.multiselect("Fuel(s)", options=fuel_available, default=fuel_available)
 
-trans_available = sorted(df[df["brand"].isin(selected_brands) & df["model"].isin(selected_models)]["transmission"].unique())
-selected_trans = st.sidebar.multiselect("Transmission(s)", options=trans_available, default=trans_available)
+    trans_available = sorted(df[df["brand"].isin(selected_brands) & df["model"].isin(selected_models)]["transmission"].unique())
+    selected_trans = st.sidebar.multiselect("Transmission(s)", options=trans_available, default=trans_available)
 
-min_price = int(df["price_lakhs"].min())
-max_price = int(df["price_lakhs"].max())
-price_range = st.sidebar.slider(
-    "Price Range (₹ Lakhs)",
-    min_value=min_price,
-    max_value=max_price,
-    value=(min_price, max_price)
-)
-# Apply all filters
-df_filtered = df[
-    df["brand"].isin(selected_brands) &
-    df["model"].isin(selected_models) &
-    df["fuel"].isin(selected_fuel) &
-    df["transmission"].isin(selected_trans) &
-    (df["price_lakhs"] >= price_range[0]) &
-    (df["price_lakhs"] <= price_range[1])
-    ].copy()
+    min_price = int(df["price_lakhs"].min())
+    max_price = math.ceil(df["price_lakhs"].max())  # int() cut off the priciest variants at the default range
+    price_range = st.sidebar.slider(
+        "Price Range (₹ Lakhs)",
+        min_value=min_price,
+        max_value=max_price,
+        value=(min_price, max_price)
+    )
+    # Apply all filters (in Arrow, on the shared table)
+    filter_mask, df_filtered = dataset.select(
+        snapshot, selected_city, selected_brands, selected_models, selected_fuel, selected_trans, price_range
+    )
 
-if df_filtered.empty:
-    st.warning("No data matches selected filters.")
-    st.stop()
+    if df_filtered.empty:
+        st.warning("No data matches selected filters.")
+        st.stop()
+
+    # Write-time aggregates stand in for per-rerun groupbys whenever they
+    # describe exactly the filtered rows (the price slider can cut inside a model)
+    model_stats = initialization.get_model_stats()
+    stats_filtered = aggregates.filter_stats(model_stats, selected_city, selected_brands, selected_models,
+                                             selected_fuel, selected_trans)
+    if not aggregates.covers(stats_filtered, df_filtered):
+        stats_filtered = None
+    ranks_exact = aggregates.covers(
+        aggregates.filter_stats(model_stats, selected_city, selected_brands, selected_models), df_filtered
+    )
 
 
 # =====================
@@ -119,33 +136,25 @@ with tab1:
     st.subheader("Visual Analytics")
 
 
-    df_filtered["variant_display"] = df_filtered.apply(
-        lambda r: f"{r['model']} - {r['variant']}",
-        axis=1)
-
-    variant_map = dict(zip(df_filtered["variant_display"], df_filtered["variant"]))
+    with prof.span("labels"):
+        # variant_display ("Model - Variant") and label come with the snapshot (see dataset._build)
+        variant_map = dict(zip(df_filtered["variant_display"], df_filtered["variant"]))
 
-    # All options
-    all_variants_display = df_filtered["variant_display"].unique().tolist()
+        # All options
+        all_variants_display = df_filtered["variant_display"].unique().tolist()
 
-    # Multiselect with Model + Variant
-    selected_variants_display = st.multiselect(
-        "Select Variants to Show",
-        options=all_variants_display,
-        default=all_variants_display
-    )
-
-    # Map back to actual variants
-    selected_variants = [variant_map[v] for v in selected_variants_display]
+        # Multiselect with Model + Variant
+        selected_variants_display = st.multiselect(
+            "Select Variants to Show",
+            options=all_variants_display,
+            default=all_variants_display
+        )
 
-    # ✅ Filter the dataframe itself
-    df_filtered = df_filtered[df_filtered["variant"].isin(selected_variants)]
+        # Map back to actual variants
+        selected_variants = [variant_map[v] for v in selected_variants_display]
 
-    # Chart labels: only variant name (+ CNG + price)
-    df_filtered["label"] = df_filtered.apply(
-        lambda r: f"{r['variant']} ({r['price_lakhs']:.2f}L)",
-        axis=1
-    )
+        # ✅ Filter the dataframe itself
+        df_filtered = df_filtered[df_filtered["variant"].isin(selected_variants)]
 
     # ---- Default order (by min price) ----
     model_order = (
@@ -217,253 +226,64 @@ with tab1:
     # =====================
     chart_type = st.radio(
         "Select Chart Type",
-        ["Price Range", "Fuel-wise Range Bar","Scatter Plot", "Violin Plot", "Line Chart", "Treemap"],  # NEW OPTION
+        figures.CHART_TYPES,
         horizontal=True
     )
-    # ---------------------
-    # Price Range Chart
-    # ---------------------
-    if chart_type == "Price Range":
-        price_range_df = (
-            df_filtered.groupby("model", observed=True)
-            .agg(min_price_lakh=("price_lakhs", "min"),
-                 max_price_lakh=("price_lakhs", "max"))
-            .reset_index()
-        )
-
-        fig = go.Figure()
-
-        # Apply custom order
-        price_range_df["model"] = pd.Categorical(price_range_df["model"], categories=order_to_use, ordered=True)
-        price_range_df = price_range_df.sort_values("model")
-
-        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
-        df_filtered = df_filtered.sort_values("model")
-
-        fig.add_trace(go.Bar(
-            x=price_range_df["model"],
-            y=price_range_df["max_price_lakh"] - price_range_df["min_price_lakh"],
-            base=price_range_df["min_price_lakh"],
-            name="Price Range",
-            marker=dict(color="lightblue"),
-            opacity=0.4,
-            hoverinfo="skip",
-            width=0.3
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=df_filtered["model"],
-            y=df_filtered["price_lakhs"],
-            mode="markers+text",
-            name="Variants",
-            text=df_filtered["label"],
-            textposition="middle right",
-            hovertemplate="<b>%{text}</b><br>Model: %{x}<br>Price: ₹%{y} L<extra></extra>",
-            marker=dict(color="dark blue", size=9, line=dict(width=1, color="white")),
-            cliponaxis=False
-        ))
-
-    elif chart_type == "Fuel-wise Range Bar":
-        import numpy as np
-
-        df_range = (
-            df_filtered.groupby(["model", "fuel"], observed=True)["price_lakhs"]
-            .agg(min_price="min", max_price="max")
-            .reset_index()
-        )
-
-        models = list(df_filtered["model"].unique())
-        x_positions = {model: idx for idx, model in enumerate(models)}
-        desired_fuel_order = ["Petrol", "CNG", "strong-hybrid","Diesel"]  # Customize order here
-        fuels = [f for f in desired_fuel_order if f in df_range["fuel"].unique()]
-
-        num_fuels = len(fuels)
-
-        bar_width = 0.8 / num_fuels
-
-        fig = go.Figure()
-
-        # 1️⃣ Plot range bars grouped by fuel
-        for i, fuel in enumerate(fuels):
-            fuel_data = df_range[df_range["fuel"] == fuel]
-            group_gap = 0.15  # adjust between 0.1 - 0.3 as per your need
-
-            x_vals = [
-                x_positions[m]
-                - 0.4
-                + (i + 0.5) * bar_width
-                + i * group_gap  # ✅ Push each fuel group slightly outward
-                for m in fuel_data["model"]
-            ]
-
-            fig.add_trace(
-                go.Bar(
-                    x=x_vals,
-                    y=fuel_data["max_price"] - fuel_data["min_price"],
-                    base=fuel_data["min_price"],
-                    width=bar_width * 0.5,
-                    name=fuel,
-                    marker=dict(opacity=0.5),
-                )
-            )
-
-        # 2️⃣ Scatter aligned exactly over the fuel bars
-        for i, fuel in enumerate(fuels):
-            fuel_data = df_filtered[df_filtered["fuel"] == fuel]
-            x_scatter = [x_positions[m] - 0.4 + (i + 0.5) * bar_width + i * group_gap for m in fuel_data["model"]]
-
-            fig.add_trace(
-                go.Scatter(
-                    x=x_scatter,
-                    y=fuel_data["price_lakhs"],
-                    mode="markers+text",
-                    name=f"{fuel} Variants",
-                    text=fuel_data["label"],
-                    textposition="middle right",
-                    marker=dict(size=9, line=dict(width=1, color="white")),
-                    showlegend=False
-                )
-            )
-
-        fig.update_xaxes(
-            tickmode="array",
-            tickvals=list(x_positions.values()),  # numeric positions of bars
-            ticktext=list(x_positions.keys()),  # model names only
-            tickangle=-0  # or 0 if you prefer horizontal
-        )
-
-
-    # ---------------------
-    # Scatter Plot
-    # ---------------------
-    elif chart_type == "Scatter Plot":
-        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
-
-        fig = px.scatter(
-            df_filtered,
-            x="model",
-            y="price_lakhs",
-            color="fuel",
-            size="price_lakhs",
-            text="label",
-            hover_data=["brand", "variant", "transmission"],
-            title="Price of Each Variant by Model & Fuel (₹ Lakhs)",
-            category_orders={"model": order_to_use},
-            height=520
+    with prof.span("figure_build"):
+        fig = figures.build_dashboard_figure(df_filtered, order_to_use, chart_type, light_mode, stats_filtered)
+
+    with prof.span("figure_render"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    zip_key = (figures.data_fingerprint(df_filtered), tuple(order_to_use), light_mode)
+    if st.button("🖼️ Export All Charts (PNG ZIP)"):
+        with prof.span("image_export"), st.spinner("Rendering all chart types..."):
+            try:
+                st.session_state["charts_zip"] = (zip_key, image_export.export_zip([
+                    (ct.lower().replace(" ", "_").replace("-", "_"),
+                     figures.build_dashboard_figure(df_filtered, order_to_use, ct, light_mode, stats_filtered))
+                    for ct in figures.CHART_TYPES
+                ], sources=[figures.figure_key(zip_key[0], order_to_use, ct, light_mode)
+                            for ct in figures.CHART_TYPES]))
+            except Exception as e:
+                st.error(f"❌ Image export failed: {e}")
+    if st.session_state.get("charts_zip", (None,))[0] == zip_key:
+        st.download_button(
+            label="📥 Download Charts ZIP",
+            data=st.session_state["charts_zip"][1],
+            file_name="charts.zip",
+            mime="application/zip"
         )
-        fig.update_traces(textposition="middle center")
 
-    # ---------------------
-    # Violin Plot
-    # ---------------------
-    elif chart_type == "Violin Plot":
-        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
-
-        fig = px.violin(
-            df_filtered,
-            x="brand",
-            y="price_lakhs",
-            color="brand",
-            box=True,
-            points="all",
-            title="Price Distribution by Brand (₹ Lakhs)",
-            height=520
-        )
-
-        scatter = px.scatter(
-            df_filtered,
-            x="brand",
-            y="price_lakhs",
-            text="label",
-            color="brand"
-        )
-        scatter.update_traces(textposition="top center", showlegend=False)
-        for trace in scatter.data:
-            fig.add_trace(trace)
-
-    # ---------------------
-    # Line Chart
-    # ---------------------
-    elif chart_type == "Line Chart":
-        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
-        df_filtered = df_filtered.sort_values("model")
-
-        fig = px.line(
-            df_filtered.sort_values("price_lakhs"),
-            x="model",
-            y="price_lakhs",
-            color="brand",
-            markers=True,
-            text="label",
-            title="Price Trends by Model (₹ Lakhs)",
-            category_orders={"model": order_to_use},
-            height=520
-        )
-        fig.update_traces(textposition="top center")
-
-    # ---------------------
-    # Treemap
-    # ---------------------
-    elif chart_type == "Treemap":
-        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
-        df_filtered = df_filtered.sort_values(["model", "price_lakhs"])
-
-        df_filtered["variant_treemap_label"] = df_filtered.apply(
-            lambda r: "<br>".join(textwrap.wrap(
-                f"{r['variant']}", width=12
-            )),
-            axis=1
-        )
-
-        df_sorted = df_filtered.sort_values(["model", "price_lakhs"], ascending=[True, True])
-
-        fig = px.treemap(
-            df_sorted,
-            path=["brand", "model", "variant_treemap_label"],
-            values="price_lakhs",
-            color="price_lakhs",
-            color_continuous_scale="Blues" if light_mode else "Viridis",
-            title="Brand → Model → Variant Price Share",
-            hover_data={"brand": True, "model": True, "variant": True, "price_lakhs": ":.2f"}
-        )
-
-        fig.update_traces(
-            textfont=dict(size=14, family="Arial", color="black" if light_mode else "white"),
-            texttemplate="%{label}<br>₹%{value:.2f} L",
-            sort=False
+    # =====================
+    # Recent changes
+    # =====================
+    st.subheader("🔔 Recent Price Changes")
+    change_days = st.selectbox("Window", [1, 7, 30, 90], index=1, format_func=lambda d: f"Last {d} day(s)")
+    with prof.span("changes_query"):
+        since = (pd.Timestamp.now() - pd.Timedelta(days=change_days)).isoformat()
+        df_changes = initialization.get_recent_changes(since, selected_city, selected_brands)
+    if df_changes.empty:
+        st.caption("No price changes detected in this window.")
+    else:
+        counts = df_changes["change"].value_counts()
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Price Up", int(counts.get("up", 0)))
+        c2.metric("Price Down", int(counts.get("down", 0)))
+        c3.metric("New Variants", int(counts.get("new", 0)))
+        c4.metric("Discontinued", int(counts.get("discontinued", 0)))
+        st.dataframe(
+            df_changes.drop(columns=["city"]),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "old_price": st.column_config.NumberColumn("Old Price (₹)", format="%d"),
+                "new_price": st.column_config.NumberColumn("New Price (₹)", format="%d"),
+                "delta": st.column_config.NumberColumn("Δ (₹)", format="%+d"),
+                "pct": st.column_config.NumberColumn("Δ %", format="%+.2f%%"),
+            },
         )
 
-    # ---------------------
-    # Layout
-    # ---------------------
-    fig.update_layout(
-        title="Model Prices (in Lakhs)",
-        xaxis=dict(
-            title=dict(text="Model", font=dict(color=font_color)),
-            automargin=True,
-            rangeslider=dict(visible=False),
-            fixedrange=False,
-            tickfont=dict(color=font_color),
-            gridcolor="lightgrey" if light_mode else "#333333",
-            zerolinecolor="lightgrey" if light_mode else "#333333"
-        ),
-        yaxis=dict(
-            title=dict(text="Price (₹ Lakhs)", font=dict(color=font_color)),
-            automargin=True,
-            fixedrange=False,
-            tickfont=dict(color=font_color),
-            gridcolor="lightgrey" if light_mode else "#333333",
-            zerolinecolor="lightgrey" if light_mode else "#333333"
-        ),
-        hovermode="closest",
-        plot_bgcolor=plot_bgcolor,
-        paper_bgcolor=plot_bgcolor,
-        font=dict(color=font_color),
-        showlegend=False
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-
 
 import io
 import math
@@ -480,9 +300,13 @@ def _col_idx_to_excel(col_idx: int) -> str:
     return letters
 
 
-def to_excel_price_range_chart(df_filtered: pd.DataFrame, order_to_use: list):
+def to_excel_price_range_chart(df_filtered: pd.DataFrame, order_to_use: list, stats=None, ranks_exact=False):
+    """
+    `stats` (model_stats rows covering exactly df_filtered) supplies the per-model
+    ranges; with `ranks_exact`, variant positions come from the stored variant_rank.
+    """
 
-    df = df_filtered.copy()
+    df = df_filtered.copy(deep=False)  # shallow: columns assigned below replace arrays in this frame only
     if "price_lakhs" not in df.columns:
         raise ValueError("df_filtered must contain 'price_lakhs' column")
 
@@ -491,11 +315,14 @@ def to_excel_price_range_chart(df_filtered: pd.DataFrame, order_to_use: list):
     df["variant"] = df["variant"].astype(str)
 
     # --- Price range per model ---
-    price_range_df = (
-        df.groupby("model", observed=True)
-        .agg(min_price_lakh=("price_lakhs", "min"), max_price_lakh=("price_lakhs", "max"))
-        .reset_index()
-    )
+    if stats is not None:
+        price_range_df = aggregates.model_ranges(stats)[["model", "min_price_lakh", "max_price_lakh"]]
+    else:
+        price_range_df = (
+            df.groupby("model", observed=True)
+            .agg(min_price_lakh=("price_lakhs", "min"), max_price_lakh=("price_lakhs", "max"))
+            .reset_index()
+        )
 
     # enforce order_to_use (will keep models in provided order)
     price_range_df["model"] = pd.Categorical(
@@ -506,7 +333,10 @@ def to_excel_price_range_chart(df_filtered: pd.DataFrame, order_to_use: list):
     # --- Assign variant positions dynamically by ascending price ---
     # We use 'rank(method="first")' to ensure unique position order when prices tie.
     df_sorted = df.sort_values(["model", "price_lakhs", "variant"]).copy()
-    df_sorted["rank"] = df_sorted.groupby("model")["price_lakhs"].rank(method="first").astype(int)
+    if ranks_exact and "variant_rank" in df_sorted.columns and df_sorted["variant_rank"].notna().all():
+        df_sorted["rank"] = df_sorted["variant_rank"].astype(int)
+    else:
+        df_sorted["rank"] = df_sorted.groupby("model")["price_lakhs"].rank(method="first").astype(int)
     df_sorted["variant_pos"] = "V" + df_sorted["rank"].astype(str)
 
     # Maximum number of variant positions across all models (V1..Vn)
@@ -724,7 +554,8 @@ def to_excel_price_range_chart(df_filtered: pd.DataFrame, order_to_use: list):
     output.seek(0)
     return output.getvalue()
 
-excel_data = to_excel_price_range_chart(df_filtered, order_to_use)
+with prof.span("excel_export"):
+    excel_data = to_excel_price_range_chart(df_filtered, order_to_use, stats_filtered, ranks_exact)
 st.download_button(
     label="📥 Download Price Range Excel",
     data=excel_data,
@@ -738,85 +569,143 @@ st.write("Ask anything about cars in our dataset.")
 user_query = st.text_input("Enter your query:")
 
 if user_query:
-    prompt = f"""
-    You are a helpful assistant.
-    Answer this question using the car dataset provided.
-    If the answer involves creating a chart, describe the data needed for the chart.
-    Here is the dataset:
-    {df_filtered}
-
-    Question: {user_query}
-    """
+    # Structured questions are answered locally; only open-ended ones reach the LLM
+    with prof.span("assistant_route"):
+        routed = query_router.route(user_query, df_filtered)
+
+    if routed is not None:
+        st.subheader("Answer:")
+        st.write(routed.answer)
+        chart_data, fig, file_stub = routed.table, routed.fig, f"assistant_{routed.intent}"
+        if not chart_data.empty:
+            st.dataframe(chart_data, use_container_width=True, hide_index=True)
+    else:
+        st.subheader("Answer:")
+        with prof.span("assistant_llm"):
+            try:
+                st.write_stream(assistant.ask_stream(llm, df_filtered, user_query))
+            except llm_client.LLMError as e:
+                st.error(f"❌ {e}")
+
+        # Example: create a simple chart from df_filtered as AI suggested
+        # Let's say AI suggested showing average price by model
+        if stats_filtered is not None:
+            chart_data = aggregates.model_means(stats_filtered)
+        else:
+            chart_data = df_filtered.groupby("model", observed=True)["price_lakhs"].mean().reset_index()
 
-    with st.spinner("Generating response..."):
-        response = groq_client.chat.completions.create(
-            model="moonshotai/Kimi-K2-Instruct-0905",
-            messages=[{"role": "user", "content": prompt}]
+        fig = px.bar(
+            chart_data,
+            x="model",
+            y="price_lakhs",
+            title="Average Price by Model",
+            labels={"price_lakhs": "Average Price (₹ Lakhs)"}
         )
-    answer = response.choices[0].message.content
-    st.subheader("Answer:")
-    st.write(answer)
-
-    # Example: create a simple chart from df_filtered as AI suggested
-    # Let's say AI suggested showing average price by model
-    chart_data = df_filtered.groupby("model")["price_lakhs"].mean().reset_index()
-
-    fig = px.bar(
-        chart_data,
-        x="model",
-        y="price_lakhs",
-        title="Average Price by Model",
-        labels={"price_lakhs": "Average Price (₹ Lakhs)"}
-    )
-    st.plotly_chart(fig, use_container_width=True)
+        file_stub = "average_price_by_model"
+
+    if fig is not None:
+        st.plotly_chart(fig, use_container_width=True)
 
     # Allow users to download the chart data as CSV
     csv_data = chart_data.to_csv(index=False).encode('utf-8')
     st.download_button(
         label="📥 Download Chart Data",
         data=csv_data,
-        file_name="average_price_by_model.csv",
+        file_name=f"{file_stub}.csv",
         mime="text/csv"
     )
 
-    # Optionally, let users download the chart image (PNG)
-    img_bytes = fig.to_image(format="png")
-    st.download_button(
-        label="📥 Download Chart Image",
-        data=img_bytes,
-        file_name="average_price_by_model.png",
-        mime="image/png"
-    )
+    # Optionally, let users download the chart image (PNG), rendered only on request
+    if fig is not None:
+        # The chart is fully determined by the query and the table it plots
+        fig_source = ("assistant", user_query, file_stub,
+                      figures.data_fingerprint(chart_data, list(chart_data.columns)))
+        img_key = image_export.figure_key(fig, source=fig_source)
+        if st.button("🖼️ Prepare Chart Image"):
+            with prof.span("image_export"), st.spinner("Rendering image..."):
+                try:
+                    image_export.export_image(fig, source=fig_source)
+                    st.session_state["assistant_png_key"] = img_key
+                except Exception as e:
+                    st.error(f"❌ Image export failed: {e}")
+        img_bytes = image_export.cached_image(img_key)
+        if img_bytes is not None and st.session_state.get("assistant_png_key") == img_key:
+            st.download_button(
+                label="📥 Download Chart Image",
+                data=img_bytes,
+                file_name=f"{file_stub}.png",
+                mime="image/png"
+            )
 
 
 # -----------------
 # TAB 2: TABLE
 # -----------------
 with tab2:
+    search_text = st.text_input("🔍 Search variants", placeholder="e.g. ZXi+ AMT, Knight, Seltos HTX")
+    if search_text.strip():
+        with prof.span("variant_search"):
+            t0 = time.perf_counter()
+            df_search = initialization.search_variants(search_text, selected_city)
+            search_ms = (time.perf_counter() - t0) * 1000
+        st.caption(f"{len(df_search)} matches in {search_ms:.0f} ms (best first, all brands, {selected_city})")
+        if not df_search.empty:
+            df_search["price_lakhs"] = (df_search["price"] / 100000).round(2)
+            st.dataframe(
+                df_search[["brand", "model", "fuel", "transmission", "variant", "price_lakhs", "source", "last_seen"]],
+                use_container_width=True,
+                hide_index=True,
+                column_config={"price_lakhs": st.column_config.NumberColumn("Price (₹ Lakhs)", format="%.2f")},
+            )
+
     st.subheader("Price Table")
-    df_table = df_filtered.sort_values(["brand", "model", "price_lakhs"])[
-        ["brand", "model", "fuel", "transmission", "variant", "price_lakhs"]
-    ].rename(columns={"price_lakhs": "Price (₹ Lakhs)"})
-    df_table["Price (₹ Lakhs)"] = df_table["Price (₹ Lakhs)"].map(lambda x: f"{x:.2f}")
-    st.dataframe(df_table, use_container_width=True)
+    # Paged from the shared snapshot: each sort order is computed once per data
+    # version, a rerun only filters it and takes one page, and only that page
+    # goes to the browser. Prices stay numeric (formatted by column_config).
+    table_sorts = {
+        "Brand / Model / Price": ["brand", "model", "price"],
+        "Price": ["price"],
+        "Model": ["model", "variant"],
+        "Variant": ["variant"],
+    }
+    c_sort, c_dir, c_size, c_page = st.columns([3, 1, 1, 1])
+    table_sort = c_sort.selectbox("Sort by", list(table_sorts), key="table_sort")
+    table_desc = c_dir.toggle("Descending", value=False, key="table_desc")
+    page_size = c_size.selectbox("Rows per page", [50, 100, 250, 500], index=1, key="table_page_size")
+    n_pages = max(1, -(-len(df_filtered) // page_size))
+    page = c_page.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1, key="table_page")
+
+    with prof.span("price_table"):
+        start = (min(page, n_pages) - 1) * page_size
+        df_page, n_rows = dataset.page(
+            snapshot, selected_city, filter_mask, table_sorts[table_sort], table_desc, start, page_size,
+        )
+        st.caption(f"Rows {start + 1}–{start + len(df_page)} of {n_rows} (page {page} of {n_pages})")
+        st.dataframe(
+            df_page[["brand", "model", "fuel", "transmission", "variant", "price_lakhs"]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={"price_lakhs": st.column_config.NumberColumn("Price (₹ Lakhs)", format="%.2f")},
+        )
 
 
 with tab3:
     st.subheader("📈 Price History Viewer")
 
-    def load_price_history(brands, models):
+    def load_price_history(brands, models, city):
         conn = sqlite3.connect(initialization.DB_FILE)
         # Query only for selected brands and models to reduce data
         query = """
             SELECT * FROM prices
             WHERE brand IN ({})
                 AND model IN ({})
+                AND city = ?
             ORDER BY timestamp
         """.format(
             ",".join(["?"] * len(brands)) if brands else "'*'",
             ",".join(["?"] * len(models)) if models else "'*'"
         )
-        params = brands + models if brands and models else []
+        params = (brands + models if brands and models else []) + [city]
         df = pd.read_sql(query, conn, params=params)
         conn.close()
         return df
@@ -826,7 +715,8 @@ with tab3:
     models = selected_models if selected_models else sorted(df[df["brand"].isin(brands)]["model"].unique())
 
     # Load historical data for filtered brands and models
-    df_history = load_price_history(brands, models)
+    with prof.span("history_query"):
+        df_history = load_price_history(brands, models, selected_city)
 
     if df_history.empty:
         st.warning("No price history found for selected brands and models.")
@@ -861,48 +751,35 @@ with tab3:
         st.stop()
 
     # Aggregate by day, keeping the last price
-    df_daywise = (
-        df_filtered_history.groupby(["brand", "model", "variant", "date"], observed=True)
-        .agg({"price": "last"})
-        .reset_index()
-    )
+    with prof.span("history_pivot"):
+        df_daywise = (
+            df_filtered_history.groupby(["brand", "model", "variant", "date"], observed=True)
+            .agg({"price": "last"})
+            .reset_index()
+        )
 
-    if df_daywise.empty or df_daywise["date"].isna().all():
-        st.warning("No valid data available for plotting.")
-        st.stop()
+        if df_daywise.empty or df_daywise["date"].isna().all():
+            st.warning("No valid data available for plotting.")
+            st.stop()
 
-    # Fill missing dates using pivot and reindex
-    pivot_df = df_daywise.pivot_table(
-        index=["brand", "model", "variant"],
-        columns="date",
-        values="price",
-        aggfunc="last"
-    )
-    all_days = pd.date_range(start=df_daywise["date"].min(), end=date.today(), freq="D")
-    pivot_df = pivot_df.reindex(columns=all_days).ffill(axis=1).bfill(axis=1)
-    # Rename level_3 to date to fix ValueError
-    df_daywise = pivot_df.stack(future_stack=True).reset_index(name="price").rename(columns={"level_3": "date"})
-    df_daywise["price_lakhs"] = (df_daywise["price"] / 100000).round(2)
-    df_daywise["label"] = df_daywise["brand"] + " | " + df_daywise["model"] + " - " + df_daywise["variant"]
+        # Fill missing dates using pivot and reindex
+        pivot_df = df_daywise.pivot_table(
+            index=["brand", "model", "variant"],
+            columns="date",
+            values="price",
+            aggfunc="last"
+        )
+        all_days = pd.date_range(start=df_daywise["date"].min(), end=date.today(), freq="D")
+        pivot_df = pivot_df.reindex(columns=all_days).ffill(axis=1).bfill(axis=1)
+        # Rename level_3 to date to fix ValueError
+        df_daywise = pivot_df.stack(future_stack=True).reset_index(name="price").rename(columns={"level_3": "date"})
+        df_daywise["price_lakhs"] = (df_daywise["price"] / 100000).round(2)
+        df_daywise["label"] = df_daywise["brand"] + " | " + df_daywise["model"] + " - " + df_daywise["variant"]
 
     # Plot line chart
-    fig = px.line(
-        df_daywise,
-        x="date",
-        y="price_lakhs",
-        color="label",
-        title=f"Price Trends ({', '.join(brands)})",
-        markers=True,
-        line_shape="hv"  # Step line for discrete data points
-    )
-    fig.update_layout(
-        xaxis_title="Date",
-        yaxis_title="Price (₹ Lakhs)",
-        plot_bgcolor=plot_bgcolor,
-        paper_bgcolor=plot_bgcolor,
-        font=dict(color=font_color)
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    with prof.span("history_chart"):
+        fig = figures.build_history_figure(df_daywise, brands, light_mode)
+        st.plotly_chart(fig, use_container_width=True)
 
     # History table (limit to last 7 days for readability)
     st.subheader("📜 Price History Table")
@@ -937,6 +814,7 @@ with tab4:
         with cols[1]:
             fuel_in = st.text_input("Fuel", value="Petrol")
             trans_in = st.text_input("Transmission", value="Manual")
+            city_in = st.text_input("City", value=initialization.DEFAULT_CITY)
 
         with cols[2]:
             # Input price in Lakhs, store in rupees
@@ -947,43 +825,96 @@ with tab4:
         if submitted and brand_in and model_in and variant_in and price_lakh_in > 0:
             price_rupees = int(price_lakh_in * 100000)  # convert lakhs → rupees
             timestamp = datetime.now().isoformat()
-            initialization.add_price(brand_in, model_in, variant_in, price_rupees, fuel_in, trans_in, timestamp)
+            initialization.add_price(brand_in, model_in, variant_in, price_rupees, fuel_in, trans_in, timestamp,
+                                     city_in or initialization.DEFAULT_CITY)
             st.success(
                 f"✅ Added {brand_in} {model_in} {variant_in} "
-                f"{fuel_in} {trans_in} at ₹{price_rupees:,.0f}"
+                f"{fuel_in} {trans_in} ({city_in}) at ₹{price_rupees:,.0f}"
             )
             st.rerun()
 
-    st.subheader("🗑️ Delete a Manual Entry")
-
-    conn = sqlite3.connect(initialization.DB_FILE)
-    df_manual = pd.read_sql(
-        "SELECT * FROM prices WHERE source='manual' ORDER BY timestamp DESC", conn
-    )
-    conn.close()
-
-    if df_manual.empty:
-        st.info("No manual entries available to delete.")
-    else:
-        # Clean label with all details
-        df_manual["label"] = (
-                df_manual["brand"] + " | " +
-                df_manual["model"] + " | " +
-                df_manual["variant"] + " | " +
-                df_manual["fuel"] + " | " +
-                df_manual["transmission"] + " | ₹" +
-                df_manual["price"].astype(str)
-        )
-
-        # Dropdown with proper labels
-        record_choice = st.selectbox(
-            "Select entry to delete",
-            df_manual[["id", "label"]].itertuples(index=False),
-            format_func=lambda x: x.label
-        )
+    st.subheader("📤 Bulk Import (CSV / Excel)")
+    st.caption("Columns: brand, model, variant, price (₹ or lakhs), optional fuel, transmission, city.")
+    upload = st.file_uploader("Dealer price sheet", type=["csv", "xlsx", "xls"], key="bulk_import_file")
+    if upload is not None:
+        with prof.span("bulk_import_preview"):
+            try:
+                df_import = manual_import.preview(manual_import.read_sheet(upload.name, upload.getvalue()))
+            except Exception as e:
+                df_import = None
+                st.error(f"❌ Could not read {upload.name}: {e}")
+        if df_import is not None:
+            status_counts = df_import["status"].value_counts()
+            cols = st.columns(5)
+            for col, status in zip(cols, [manual_import.STATUS_NEW, manual_import.STATUS_CHANGED,
+                                          manual_import.STATUS_UNCHANGED, manual_import.STATUS_DUPLICATE,
+                                          manual_import.STATUS_INVALID]):
+                col.metric(status.capitalize(), int(status_counts.get(status, 0)))
+            st.dataframe(
+                df_import,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "price": st.column_config.NumberColumn("Price (₹)", format="%d"),
+                    "old_price": st.column_config.NumberColumn("Stored Price (₹)", format="%d"),
+                },
+            )
+            include_unchanged = st.checkbox("Also import unchanged prices", value=False)
+            statuses = [manual_import.STATUS_NEW, manual_import.STATUS_CHANGED]
+            if include_unchanged:
+                statuses.append(manual_import.STATUS_UNCHANGED)
+            n_import = int(df_import["status"].isin(statuses).sum())
+            if st.button(f"Import {n_import} rows", disabled=n_import == 0):
+                with prof.span("bulk_import_store"):
+                    stored = manual_import.import_rows(df_import, statuses)
+                st.success(f"✅ Imported {stored} manual prices from {upload.name}.")
+
+    st.subheader("🗑️ Delete Manual Entries")
+    # Tabs all run on every rerun, so the entries are only queried once asked for
+    if st.toggle("Load manual entries", value=False, key="manual_load"):
+        c_search, c_size = st.columns([5, 1])
+        manual_search = c_search.text_input("Search brand / model / variant / city", key="manual_search")
+        manual_page_size = c_size.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="manual_page_size")
+
+        # Keyset paging: one cursor per page visited, restarted when the query changes
+        if st.session_state.get("manual_query") != (manual_search, manual_page_size):
+            st.session_state["manual_query"] = (manual_search, manual_page_size)
+            st.session_state["manual_cursors"] = [None]
+        manual_cursors = st.session_state["manual_cursors"]
+
+        with prof.span("manual_entries"):
+            df_manual, next_cursor = initialization.get_manual_entries(
+                manual_search, manual_page_size, manual_cursors[-1]
+            )
 
-        if st.button("Delete Selected Entry"):
-            initialization.delete_price(record_choice.id)  # ✅ deletes only manual
-            st.success("✅ Manual entry deleted.")
+        c_prev, c_info, c_next = st.columns([1, 4, 1])
+        if c_prev.button("◀ Previous", disabled=len(manual_cursors) == 1, key="manual_prev"):
+            manual_cursors.pop()
+            st.rerun()
+        if c_next.button("Next ▶", disabled=next_cursor is None, key="manual_next"):
+            manual_cursors.append(next_cursor)
             st.rerun()
 
+        if df_manual.empty:
+            st.info("No manual entries match." if manual_search.strip() else "No manual entries available to delete.")
+        else:
+            c_info.caption(f"Page {len(manual_cursors)}{'' if next_cursor else ' (last)'}, "
+                           f"{len(df_manual)} manual entries shown")
+            selection = st.dataframe(
+                df_manual,
+                use_container_width=True,
+                hide_index=True,
+                on_select="rerun",
+                selection_mode="multi-row",
+                key="manual_table",
+                column_config={
+                    "id": None,
+                    "price": st.column_config.NumberColumn("Price (₹)", format="%d"),
+                },
+            )
+            selected_ids = df_manual["id"].iloc[selection.selection.rows].tolist()
+            if st.button(f"Delete {len(selected_ids)} Selected", disabled=not selected_ids):
+                n_deleted = initialization.delete_prices(selected_ids)  # ✅ deletes only manual
+                st.success(f"✅ Deleted {n_deleted} manual entries.")
+                st.rerun()
+
@@ -0,0 +1,70 @@
+import pandas as pd
+
+# =====================
+# MODEL AGGREGATES
+# =====================
+# Read side of initialization.model_stats: the sidebar filters are applied to
+# the small stats table, then rolled up to the shape each chart or export
+# needs. These replace groupbys over the raw rows, so they are only used when
+# the rolled-up stats describe exactly the rows on screen (see covers()).
+LAKH = 100000
+GROUP_KEYS = ["city", "brand", "model", "fuel", "transmission"]
+
+
+def filter_stats(stats, city, brands, models, fuels=None, transmissions=None):
+    """Stats rows for the selected city/brands/models (and fuels/transmissions, when given)."""
+    mask = (stats["city"] == city) & stats["brand"].isin(brands) & stats["model"].isin(models)
+    if fuels is not None:
+        mask &= stats["fuel"].isin(fuels)
+    if transmissions is not None:
+        mask &= stats["transmission"].isin(transmissions)
+    return stats[mask]
+
+
+def _group_counts(counts):
+    # Missing fuel/transmission is None from SQLite and <NA> from Arrow; compare them as equal
+    return {tuple("" if pd.isna(k) else k for k in key): int(n) for key, n in counts.items()}
+
+
+def covers(stats, df_rows):
+    """
+    True when `stats` summarizes exactly the rows in `df_rows`: the same
+    (city, brand, model, fuel, transmission) groups with the same row count
+    each. The price slider filters individual rows, so once it cuts anything
+    the counts differ and callers fall back to grouping the rows themselves.
+    """
+    if int(stats["n"].sum()) != len(df_rows):
+        return False
+    expected = stats.groupby(GROUP_KEYS, dropna=False, sort=False)["n"].sum()
+    actual = df_rows.groupby(GROUP_KEYS, dropna=False, observed=True, sort=False).size()
+    return _group_counts(expected) == _group_counts(actual)
+
+
+def _rollup(stats, keys):
+    out = stats.groupby(keys, observed=True, sort=False).agg(
+        min_price=("min_price", "min"), max_price=("max_price", "max"),
+        sum_price=("sum_price", "sum"), n=("n", "sum"),
+    ).reset_index()
+    out["min_price_lakh"] = (out["min_price"] / LAKH).round(2)
+    out["max_price_lakh"] = (out["max_price"] / LAKH).round(2)
+    out["mean_price_lakh"] = (out["sum_price"] / out["n"] / LAKH).round(2)
+    return out
+
+
+def model_ranges(stats):
+    """model, min_price_lakh, max_price_lakh, mean_price_lakh, n"""
+    return _rollup(stats, ["model"])[["model", "min_price_lakh", "max_price_lakh", "mean_price_lakh", "n"]]
+
+
+def fuel_ranges(stats):
+    """model, fuel, min_price, max_price (lakhs), as the Fuel-wise Range Bar reads them."""
+    out = _rollup(stats, ["model", "fuel"])
+    return out[["model", "fuel", "min_price_lakh", "max_price_lakh"]].rename(
+        columns={"min_price_lakh": "min_price", "max_price_lakh": "max_price"}
+    )
+
+
+def model_means(stats):
+    """model, price_lakhs (the mean), for the assistant's Average Price by Model chart."""
+    return model_ranges(stats)[["model", "mean_price_lakh"]].rename(columns={"mean_price_lakh": "price_lakhs"})
+
@@ -0,0 +1,167 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+import figures
+
+# =====================
+# AI CAR QUERY ASSISTANT
+# =====================
+ASSISTANT_MODEL = "moonshotai/Kimi-K2-Instruct-0905"
+MAX_CONTEXT_ROWS = 60          # relevant variant rows sent verbatim
+MAX_VARIANTS_PER_MODEL = 40    # cap on the per-model variant list
+RESPONSE_CACHE_TTL = 15 * 60   # seconds
+RESPONSE_CACHE_SIZE = 256
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant for an Indian car price dashboard. "
+    "Answer using only the dataset context provided. Prices are ex-showroom in ₹ Lakhs. "
+    "If the answer involves creating a chart, describe the data needed for the chart."
+)
+
+_STOPWORDS = {
+    "the", "a", "an", "of", "in", "for", "and", "or", "to", "is", "are", "what", "which",
+    "how", "much", "me", "show", "with", "price", "prices", "car", "cars", "variant", "variants",
+    "model", "models", "under", "below", "above", "than", "between", "cheapest", "costliest",
+}
+
+
+def normalize_question(question: str) -> str:
+    q = re.sub(r"\s+", " ", (question or "").strip().lower())
+    return q.rstrip("?!. ")
+
+
+def _keywords(question):
+    tokens = re.findall(r"[a-z0-9+\-]+", normalize_question(question))
+    return [t for t in tokens if len(t) > 1 and t not in _STOPWORDS]
+
+
+# =====================
+# CONTEXT BUILDER
+# =====================
+def _relevant_rows(df, keywords, limit=MAX_CONTEXT_ROWS):
+    """Score rows by how many question keywords hit brand/model/variant/fuel/transmission."""
+    if not keywords or df.empty:
+        return df.iloc[0:0]
+    haystack = (
+        df["brand"].astype(str) + " " + df["model"].astype(str) + " " + df["variant"].astype(str)
+        + " " + df["fuel"].astype(str) + " " + df["transmission"].astype(str)
+    ).str.lower()
+    score = pd.Series(0, index=df.index)
+    for kw in keywords:
+        score += haystack.str.contains(kw, regex=False).astype(int)
+    hits = score[score > 0]
+    if hits.empty:
+        return df.iloc[0:0]
+    order = hits.sort_values(ascending=False, kind="stable").index[:limit]
+    return df.loc[order]
+
+
+def build_context(df, question):
+    """
+    Compact, columnar summary of `df` for the LLM prompt.
+
+    Always includes per-model min/max/count; variant lists and full rows are
+    only sent for models the question actually mentions.
+    """
+    keywords = _keywords(question)
+    df = df.assign(model=df["model"].astype(str))
+
+    per_model = (
+        df.groupby(["brand", "model"], observed=True)["price_lakhs"]
+        .agg(["min", "max", "count"])
+        .reset_index()
+        .sort_values(["brand", "min"])
+    )
+    lines = ["# models: brand|model|min_lakh|max_lakh|n_variants"]
+    lines += [
+        f"{r.brand}|{r.model}|{r.min:.2f}|{r.max:.2f}|{r.count}"
+        for r in per_model.itertuples(index=False)
+    ]
+
+    relevant = _relevant_rows(df, keywords)
+    if not relevant.empty:
+        lines.append("# variants of mentioned models: model: variant (price_lakh), ...")
+        for model in relevant["model"].unique():
+            g = df[df["model"] == model].sort_values("price_lakhs").head(MAX_VARIANTS_PER_MODEL)
+            lines.append(f"{model}: " + ", ".join(
+                f"{v} ({p:.2f})" for v, p in zip(g["variant"], g["price_lakhs"])
+            ))
+        lines.append("# matching rows: brand|model|variant|fuel|transmission|price_lakh")
+        lines += [
+            f"{r.brand}|{r.model}|{r.variant}|{r.fuel}|{r.transmission}|{r.price_lakhs:.2f}"
+            for r in relevant.itertuples(index=False)
+        ]
+    return "\n".join(lines)
+
+
+def build_messages(df, question):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Dataset:\n{build_context(df, question)}\n\nQuestion: {question}"},
+    ]
+
+
+# =====================
+# RESPONSE CACHE
+# =====================
+class ResponseCache:
+    """Process-wide TTL + LRU cache of answers keyed on (normalized question, data fingerprint)."""
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_size=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def cache_key(df, question):
+    return normalize_question(question), figures.data_fingerprint(df)
+
+
+def ask_stream(llm, df, question, cache=RESPONSE_CACHE):
+    """
+    Stream the answer to `question` over `df` through an llm_client.LLMClient.
+
+    A cached answer for the same question and data is yielded in one piece;
+    otherwise tokens are yielded as they arrive and the full answer is cached.
+    """
+    key = cache_key(df, question)
+    answer = cache.get(key)
+    if answer is not None:
+        yield answer
+        return
+    parts = []
+    for chunk in llm.stream(build_messages(df, question), ASSISTANT_MODEL):
+        parts.append(chunk)
+        yield chunk
+    cache.put(key, "".join(parts))
+
+
+def ask(llm, df, question, cache=RESPONSE_CACHE):
+    return "".join(ask_stream(llm, df, question, cache))
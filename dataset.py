@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+from collections import namedtuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import initialization
+
+# =====================
+# SHARED DATASET
+# =====================
+# The latest prices are loaded once per process for each data version (bumped
+# by every write, see initialization.get_data_version) and kept as one
+# immutable Arrow table sorted by city. Sessions never own a copy: view()
+# wraps a zero-copy slice of the table in a DataFrame with Arrow-backed
+# columns, so every viewer of a city reads the same buffers. Arrow buffers
+# are immutable: whatever a session assigns replaces arrays in its own frame,
+# never in the shared table, so no pandas copy-on-write mode is needed.
+
+# city_bounds: city -> (offset, length); sort_orders: (city, keys, descending) ->
+# row order of that city's slice, filled on first use (see page())
+Snapshot = namedtuple("Snapshot", ["version", "table", "city_bounds", "sort_orders"])
+
+_snapshot = Snapshot(None, pa.table({}), {}, {})
+_snapshot_lock = threading.Lock()
+# One long-lived read connection watches the database: PRAGMA data_version
+# changes whenever another connection commits, and only then is the stored
+# data version read again. Reruns between writes cost one PRAGMA.
+_Watch = namedtuple("_Watch", ["path", "conn", "commits", "version"])
+_watch = None
+_watch_lock = threading.Lock()
+
+
+def _build(version):
+    df = initialization.get_latest_prices()
+    df["city"] = df["city"].fillna(initialization.DEFAULT_CITY)
+    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    df["price_lakhs"] = (df["price"] / 100000).round(2)
+    # Chart labels, formatted once here instead of per rerun in every session
+    df["variant_display"] = df["model"].astype(str) + " - " + df["variant"].astype(str)
+    df["label"] = df["variant"].astype(str) + " (" + df["price_lakhs"].map("{:.2f}".format) + "L)"
+    df = df.sort_values("city", kind="stable", ignore_index=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    bounds, offset = {}, 0
+    for city, length in df["city"].value_counts(sort=False).sort_index().items():
+        bounds[city] = (offset, int(length))
+        offset += int(length)
+    return Snapshot(version, table, bounds, {})
+
+
+def data_version():
+    """The stored data version (initialization.get_data_version), re-read only after a commit."""
+    global _watch
+    with _watch_lock:
+        if _watch is None or _watch.path != initialization.DB_FILE:
+            if _watch is not None:
+                _watch.conn.close()
+            conn = sqlite3.connect(initialization.DB_FILE, check_same_thread=False)  # used under the lock
+            _watch = _Watch(initialization.DB_FILE, conn, None, None)
+        commits = _watch.conn.execute("PRAGMA data_version").fetchone()[0]
+        if commits != _watch.commits:
+            row = _watch.conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+            _watch = _watch._replace(commits=commits, version=row[0] if row else 0)
+        return _watch.version
+
+
+def current():
+    """The published snapshot, rebuilt first if the database changed since it was built."""
+    global _snapshot
+    version = data_version()
+    if _snapshot.version != version:
+        with _snapshot_lock:
+            if _snapshot.version != version:
+                _snapshot = _build(version)
+    return _snapshot
+
+
+def select(snapshot, city, brands, models, fuels, transmissions, price_range):
+    """
+    The sidebar filters as one Arrow mask over view(snapshot, city), and the
+    selected rows (filtered from the shared table, not from a session's frame).
+    """
+    table = snapshot.table.slice(*snapshot.city_bounds.get(city, (0, 0)))
+    lakhs = table["price_lakhs"]
+    mask = pc.and_(
+        pc.and_(pc.and_(pc.is_in(table["brand"], pa.array(brands, pa.string())),
+                        pc.is_in(table["model"], pa.array(models, pa.string()))),
+                pc.and_(pc.is_in(table["fuel"], pa.array(fuels, pa.string())),
+                        pc.is_in(table["transmission"], pa.array(transmissions, pa.string())))),
+        pc.and_(pc.greater_equal(lakhs, price_range[0]), pc.less_equal(lakhs, price_range[1])),
+    ).fill_null(False).combine_chunks()
+    return mask, table.filter(mask).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def view(snapshot, city=None):
+    """DataFrame over the snapshot's rows (one city's, if given) without copying them."""
+    table = snapshot.table
+    if city is not None:
+        table = table.slice(*snapshot.city_bounds.get(city, (0, 0)))
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _sort_order(snapshot, city, keys, descending):
+    """Indices that sort the city's slice by `keys`; computed once per snapshot, shared by all sessions."""
+    cache_key = (city, tuple(keys), descending)
+    order = snapshot.sort_orders.get(cache_key)
+    if order is None:
+        direction = "descending" if descending else "ascending"
+        table = snapshot.table.slice(*snapshot.city_bounds.get(city, (0, 0)))
+        order = snapshot.sort_orders[cache_key] = pc.sort_indices(table, sort_keys=[(k, direction) for k in keys])
+    return order
+
+
+def page(snapshot, city, mask, keys, descending=False, offset=0, limit=100):
+    """
+    One page of the city's rows selected by `mask` (booleans aligned with
+    view(snapshot, city), e.g. select()'s), ordered by `keys`. The ordering is the snapshot's
+    cached one, so a rerun only filters it and takes `limit` rows.
+    Returns (DataFrame, number of selected rows).
+    """
+    table = snapshot.table.slice(*snapshot.city_bounds.get(city, (0, 0)))
+    order = _sort_order(snapshot, city, keys, descending)
+    if isinstance(mask, pa.ChunkedArray):
+        mask = mask.combine_chunks()  # array_take wants one contiguous mask
+    elif not isinstance(mask, pa.Array):
+        mask = pa.array(mask, type=pa.bool_())
+    selected = order.filter(pc.array_take(mask, order))
+    rows = table.take(selected.slice(offset, limit))
+    return rows.to_pandas(types_mapper=pd.ArrowDtype), len(selected)
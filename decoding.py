@@ -0,0 +1,283 @@
+import itertools
+import json
+import os
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# =====================
+# JSON DECODING
+# =====================
+# Brand API responses are decoded here instead of with resp.json():
+# - with msgspec, a per-brand schema decodes only the fields the scrapers
+#   read and skips everything else while parsing;
+# - otherwise orjson, otherwise the stdlib decoder, parses the whole payload.
+# Either way the result is plain dicts/lists of the same shape, so parsers
+# keep using .get() and do not care which decoder ran.
+#
+# Set SCRAPE_RECORD_DIR to save every decoded payload (named after its
+# schema) for offline benchmarking with parser_bench.py.
+RECORD_DIR = os.environ.get("SCRAPE_RECORD_DIR")
+_record_seq = itertools.count()
+
+
+def loads(payload):
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+SCHEMAS = {}
+
+if msgspec is not None:
+    class _Schema(msgspec.Struct, omit_defaults=True):
+        """Fields missing from the payload stay missing after to_builtins()."""
+
+    # ---------- Tata ----------
+    class _TataOption(_Schema):
+        optionId: Any = None
+        optionLabel: Any = None
+
+    class _TataFilter(_Schema):
+        filterType: Any = None
+        filterOption: List[_TataOption] = []
+
+    class _TataFilterResults(_Schema):
+        filterOptionsList: List[_TataFilter] = []
+
+    class _TataFilters(_Schema):
+        results: Optional[_TataFilterResults] = None
+
+    class _TataPriceDetails(_Schema):
+        originalPrice: Any = None
+
+    class _TataVariant(_Schema):
+        variantLabel: Any = None
+        priceDetails: Optional[_TataPriceDetails] = None
+
+    class _TataPriceResults(_Schema):
+        variantPriceFeatures: Optional[List[_TataVariant]] = None
+
+    class _TataPrices(_Schema):
+        results: Optional[_TataPriceResults] = None
+
+    # ---------- Maruti / Nexa ----------
+    class _MarutiPlaceholder(_Schema):
+        Key: Any = None
+        Text: Any = None
+
+    class _MarutiPlaceholders(_Schema):
+        data: List[_MarutiPlaceholder] = []
+
+    class _MarutiVariant(_Schema):
+        variantCd: Any = None
+        variantName: Any = None
+        fuelType: Any = None
+        transmission: Any = None
+
+    class _MarutiVariantItems(_Schema):
+        items: List[_MarutiVariant] = []
+
+    class _MarutiVariantData(_Schema):
+        carVariantList: Optional[_MarutiVariantItems] = None
+
+    class _MarutiVariants(_Schema):
+        data: Optional[_MarutiVariantData] = None
+
+    class _MarutiPrice(_Schema):
+        variantCd: Any = None
+        exShowroomPrice: Any = None
+        colorType: Any = None
+
+    class _MarutiPriceModel(_Schema):
+        exShowroomDetailResponseDTOList: List[_MarutiPrice] = []
+
+    class _MarutiPriceData(_Schema):
+        models: List[_MarutiPriceModel] = []
+
+    class _MarutiPrices(_Schema):
+        data: Optional[_MarutiPriceData] = None
+
+    class _NexaModel(_Schema):
+        variants: List[_MarutiVariant] = []
+
+    class _NexaModelItems(_Schema):
+        items: List[_NexaModel] = []
+
+    class _NexaVariantData(_Schema):
+        carModelList: Optional[_NexaModelItems] = None
+
+    class _NexaVariants(_Schema):
+        data: Optional[_NexaVariantData] = None
+
+    # ---------- Hyundai ----------
+    class _HyundaiVariant(_Schema):
+        price: Any = None
+        fuelType: Any = None
+        transmission: Any = None
+        variant: Any = None
+        edition: Any = None
+
+    class _HyundaiPrices(_Schema):
+        modelPrice: Optional[List[_HyundaiVariant]] = None
+
+    # ---------- Mahindra ----------
+    class _MahindraProduct(_Schema):
+        variantCardHtml: List[str] = []
+
+    class _MahindraVariants(_Schema):
+        product: Optional[_MahindraProduct] = None
+
+    # ---------- Kia ----------
+    class _KiaModel(_Schema):
+        modelName: Any = None
+        modelCode: Any = None
+
+    class _KiaModels(_Schema):
+        data: List[_KiaModel] = []
+
+    class _KiaEngine(_Schema):
+        dmsEngineCode: Any = None
+        engineName: Any = None
+        fuelType: Any = None
+
+    class _KiaTransmission(_Schema):
+        dmsTmdtCode: Any = None
+        tmName: Any = None
+
+    class _KiaPrice(_Schema):
+        intraExsrPrice: Any = None
+
+    class _KiaVariant(_Schema):
+        variantName: Any = None
+        dmsMcOcn: Any = None
+        price: Dict[str, _KiaPrice] = {}
+
+    class _KiaVariantData(_Schema):
+        engines: List[_KiaEngine] = []
+        transmissions: List[_KiaTransmission] = []
+        variants: List[_KiaVariant] = []
+
+    class _KiaVariants(_Schema):
+        data: Optional[_KiaVariantData] = None
+
+    # ---------- MG ----------
+    class _MGCity(_Schema):
+        City: Any = None
+        price: Any = None
+
+    class _MGState(_Schema):
+        State: Any = None
+        cities: List[_MGCity] = []
+
+    class _MGVariant(_Schema):
+        model_text1: Any = None
+        fuel_type: Any = None
+        vehicle_type: Any = None
+        pricing: List[_MGState] = []
+
+    class _MGModel(_Schema):
+        modelLine: Any = None
+        model_line: Any = None
+        variants: List[_MGVariant] = []
+
+    # Lazy MG layout for decode_mg: each state's city list stays raw bytes and
+    # is only decoded for the states being scraped.
+    class _MGStateLazy(_Schema):
+        State: Any = None
+        cities: msgspec.Raw = msgspec.Raw(b"[]")
+
+    class _MGVariantLazy(_Schema):
+        model_text1: Any = None
+        fuel_type: Any = None
+        vehicle_type: Any = None
+        pricing: List[_MGStateLazy] = []
+
+    class _MGModelLazy(_Schema):
+        modelLine: Any = None
+        model_line: Any = None
+        variants: List[_MGVariantLazy] = []
+
+    SCHEMAS = {
+        "tata_filters": _TataFilters,
+        "tata_prices": _TataPrices,
+        "maruti_placeholders": _MarutiPlaceholders,
+        "maruti_variants": _MarutiVariants,
+        "maruti_prices": _MarutiPrices,
+        "nexa_variants": _NexaVariants,
+        "hyundai_prices": Union[_HyundaiPrices, List[_HyundaiVariant]],
+        "mahindra_variants": _MahindraVariants,
+        "kia_models": _KiaModels,
+        "kia_variants": _KiaVariants,
+        "mg_variants": List[_MGModel],
+    }
+    _DECODERS = {name: msgspec.json.Decoder(schema) for name, schema in SCHEMAS.items()}
+    _MG_LAZY_DECODER = msgspec.json.Decoder(List[_MGModelLazy])
+    _MG_CITIES_DECODER = msgspec.json.Decoder(List[_MGCity])
+
+
+def _record(schema, payload):
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    with open(os.path.join(RECORD_DIR, f"{schema}_{next(_record_seq):04d}.json"), "wb") as f:
+        f.write(payload)
+
+
+def decode(payload, schema=None):
+    """
+    Decode JSON bytes, through the named brand schema when msgspec is installed.
+
+    A payload that does not fit its schema (the API changed shape) is decoded
+    in full instead, so the scraper's own checks decide what to do with it.
+    """
+    if RECORD_DIR and schema:
+        _record(schema, payload)
+    decoder = _DECODERS.get(schema) if msgspec is not None else None
+    if decoder is not None:
+        try:
+            return msgspec.to_builtins(decoder.decode(payload))
+        except msgspec.ValidationError:
+            pass
+    return loads(payload)
+
+
+def _decode_mg_lazy(payload, states):
+    models = []
+    for m in _MG_LAZY_DECODER.decode(payload):
+        variants = []
+        for v in m.variants:
+            pricing = [
+                {"State": p.State, "cities": msgspec.to_builtins(_MG_CITIES_DECODER.decode(p.cities))}
+                for p in v.pricing if p.State in states
+            ]
+            variant = msgspec.to_builtins(msgspec.structs.replace(v, pricing=[]))
+            variant["pricing"] = pricing
+            variants.append(variant)
+        model = msgspec.to_builtins(msgspec.structs.replace(m, variants=[]))
+        model["variants"] = variants
+        models.append(model)
+    return models
+
+
+def decode_mg(payload, states):
+    """MG pricing blob with each variant's `pricing` cut down to the given states."""
+    states = set(states)
+    if RECORD_DIR:
+        _record("mg_variants", payload)
+    if msgspec is not None:
+        try:
+            return _decode_mg_lazy(payload, states)
+        except msgspec.ValidationError:
+            pass
+    data = loads(payload)
+    for model in data if isinstance(data, list) else []:
+        for v in model.get("variants", []):
+            v["pricing"] = [p for p in v.get("pricing", []) if p.get("State") in states]
+    return data
@@ -0,0 +1,485 @@
+import hashlib
+import textwrap
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import aggregates
+import theme
+
+# =====================
+# FIGURE CACHE
+# =====================
+CHART_TYPES = ["Price Range", "Fuel-wise Range Bar", "Scatter Plot", "Violin Plot", "Line Chart", "Treemap"]
+FIGURE_CACHE_SIZE = 32
+FINGERPRINT_COLUMNS = ["brand", "model", "fuel", "transmission", "variant", "price_lakhs", "label", "timestamp"]
+
+# Level-of-detail: above these sizes charts switch to WebGL traces, drop
+# per-point text labels and aggregate/downsample what they send to the browser.
+WEBGL_POINT_THRESHOLD = 1000
+LABEL_BUDGET = 300
+HISTORY_POINTS_PER_SERIES = 300
+
+_figure_cache = OrderedDict()  # key -> serialized figure JSON
+_figure_cache_lock = threading.Lock()
+
+
+def data_fingerprint(df: pd.DataFrame, columns=None) -> str:
+    """Stable hash of the rows/columns a chart reads, independent of the DataFrame's identity."""
+    cols = [c for c in (columns or FINGERPRINT_COLUMNS) if c in df.columns]
+    h = hashlib.sha1()
+    h.update(",".join(cols).encode())
+    h.update(pd.util.hash_pandas_object(df[cols], index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def _cache_get(key):
+    with _figure_cache_lock:
+        spec = _figure_cache.get(key)
+        if spec is not None:
+            _figure_cache.move_to_end(key)
+        return spec
+
+
+def _cache_put(key, spec):
+    with _figure_cache_lock:
+        _figure_cache[key] = spec
+        _figure_cache.move_to_end(key)
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+
+
+def figure_key(fingerprint, order_to_use, chart_type, light_mode):
+    """Cache key of a dashboard figure; also identifies its rendered image (see image_export)."""
+    return (fingerprint, tuple(order_to_use), chart_type, bool(light_mode))
+
+
+def build_dashboard_figure(df_filtered, order_to_use, chart_type, light_mode, stats=None):
+    """
+    Return the tab 1 figure for the given inputs.
+
+    Figures are cached (LRU, process-wide) as serialized JSON keyed on the data
+    fingerprint, model order, chart type and theme, so reruns triggered by
+    unrelated widgets skip the rebuild. `stats` (model_stats rows covering
+    exactly df_filtered) replaces the per-model groupbys of the range charts.
+    """
+    key = figure_key(data_fingerprint(df_filtered), order_to_use, chart_type, light_mode)
+    spec = _cache_get(key)
+    if spec is None:
+        fig = _build_dashboard_figure(df_filtered, order_to_use, chart_type, light_mode, stats)
+        _cache_put(key, fig.to_json())
+        return fig
+    return pio.from_json(spec)
+
+
+# =====================
+# LEVEL OF DETAIL
+# =====================
+def _use_webgl(n_points):
+    return n_points > WEBGL_POINT_THRESHOLD
+
+
+def _show_labels(n_points):
+    return n_points <= LABEL_BUDGET
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that preserve the shape of (x, y)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample_step_series(df, series_col, x_col, y_col, max_points=HISTORY_POINTS_PER_SERIES):
+    """
+    Reduce per-series history for a step ("hv") line chart.
+
+    Consecutive equal values are dropped first (lossless for step lines, since
+    the history is forward-filled daily), then any series still above
+    `max_points` is reduced with LTTB.
+    """
+    df = df.sort_values([series_col, x_col])
+    series = df[series_col]
+    values = df[y_col]
+    keep = values.ne(values.shift()) | series.ne(series.shift()) | series.ne(series.shift(-1))
+    df = df[keep]
+
+    parts = []
+    for _, g in df.groupby(series_col, observed=True, sort=False):
+        if len(g) > max_points:
+            x = pd.to_datetime(g[x_col]).astype("int64").to_numpy()
+            g = g.iloc[lttb_indices(x, g[y_col].to_numpy(), max_points)]
+        parts.append(g)
+    return pd.concat(parts) if parts else df
+
+
+def _violin_summary_figure(df_filtered):
+    """Aggregated stand-in for the violin chart: per-brand quartile boxes plus per-model quantile markers."""
+    fig = go.Figure()
+    for brand, g in df_filtered.groupby("brand", observed=True):
+        q = g["price_lakhs"].quantile([0.0, 0.25, 0.5, 0.75, 1.0]).to_numpy()
+        fig.add_trace(go.Box(
+            x=[brand], q1=[q[1]], median=[q[2]], q3=[q[3]],
+            lowerfence=[q[0]], upperfence=[q[4]], mean=[g["price_lakhs"].mean()],
+            name=str(brand), boxpoints=False,
+        ))
+
+    per_model = (
+        df_filtered.groupby(["brand", "model"], observed=True)["price_lakhs"]
+        .agg(p10=lambda s: s.quantile(0.1), median="median", p90=lambda s: s.quantile(0.9), count="count")
+        .reset_index()
+    )
+    fig.add_trace(go.Scattergl(
+        x=per_model["brand"],
+        y=per_model["median"],
+        mode="markers",
+        error_y=dict(type="data", symmetric=False,
+                     array=per_model["p90"] - per_model["median"],
+                     arrayminus=per_model["median"] - per_model["p10"]),
+        customdata=per_model[["model", "count", "p10", "p90"]],
+        hovertemplate="<b>%{customdata[0]}</b><br>Median: ₹%{y:.2f} L<br>"
+                      "P10–P90: ₹%{customdata[2]:.2f}–%{customdata[3]:.2f} L<br>"
+                      "Variants: %{customdata[1]}<extra></extra>",
+        marker=dict(size=7, color="#66b3ff", line=dict(width=1, color="white")),
+        showlegend=False,
+    ))
+    fig.update_layout(title="Price Distribution by Brand (₹ Lakhs)", height=520)
+    return fig
+
+
+# =====================
+# TAB 1 CHARTS
+# =====================
+FUEL_ORDER = ["Petrol", "CNG", "strong-hybrid", "Diesel"]  # Fuel-wise Range Bar group order
+FUEL_GROUP_GAP = 0.15  # extra offset between fuel groups within a model
+FUEL_COLORS = px.colors.qualitative.Plotly
+
+
+def _fuel_range_figure(df_range, df_filtered, order_to_use, webgl, labels):
+    """
+    Fuel-wise Range Bar: per model, one range bar per fuel with its variants on
+    top. Positions come from one vectorized pass over model codes (the model
+    order in use) and fuel ranks, and all fuels share one Bar and one Scatter
+    trace (colour per point), so the trace count stays at two however many
+    models and fuels are shown.
+    """
+    present = set(df_range["model"])
+    models = [m for m in order_to_use if m in present] + sorted(present.difference(order_to_use))
+    fuels_present = set(df_range["fuel"].dropna())
+    fuels = [f for f in FUEL_ORDER if f in fuels_present] + sorted(fuels_present.difference(FUEL_ORDER))
+    bar_width = 0.8 / max(len(fuels), 1)
+    # Points are coloured by fuel rank through a stepped colorscale: numeric
+    # colour arrays skip plotly's per-element colour-string validation.
+    n_fuels = max(len(fuels), 1)
+    colorscale = [
+        [edge / n_fuels, FUEL_COLORS[i % len(FUEL_COLORS)]] for i in range(n_fuels) for edge in (i, i + 1)
+    ]
+    fuel_color = dict(colorscale=colorscale, cmin=-0.5, cmax=n_fuels - 0.5)
+
+    def positions(frame):
+        m = pd.Index(models).get_indexer(frame["model"])  # -1: no bar for this model/fuel
+        f = pd.Index(fuels).get_indexer(frame["fuel"])
+        keep = (m >= 0) & (f >= 0)
+        m, f = m[keep], f[keep]
+        return keep, m - 0.4 + (f + 0.5) * bar_width + f * FUEL_GROUP_GAP, f
+
+    keep, x_bars, f_bars = positions(df_range)
+    bars = df_range[keep]
+    keep, x_points, f_points = positions(df_filtered)
+    points = df_filtered[keep]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=x_bars,
+        y=bars["max_price"] - bars["min_price"],
+        base=bars["min_price"],
+        width=bar_width * 0.5,
+        marker=dict(color=f_bars, opacity=0.5, **fuel_color),
+        customdata=np.column_stack([bars["model"], bars["fuel"], bars["min_price"], bars["max_price"]]),
+        hovertemplate="<b>%{customdata[0]}</b> %{customdata[1]}<br>"
+                      "₹%{customdata[2]:.2f} – %{customdata[3]:.2f} L<extra></extra>",
+        name="Fuel Range",
+    ))
+    ScatterTrace = go.Scattergl if webgl else go.Scatter
+    fig.add_trace(ScatterTrace(
+        x=x_points,
+        y=points["price_lakhs"],
+        mode="markers+text" if labels else "markers",
+        text=points["label"],
+        textposition="middle right",
+        marker=dict(size=9, color=f_points, line=dict(width=1, color="white"), **fuel_color),
+        hovertemplate="<b>%{text}</b><br>Price: ₹%{y} L<extra></extra>",
+        name="Variants",
+        showlegend=False,
+    ))
+    fig.update_xaxes(
+        tickmode="array",
+        tickvals=list(range(len(models))),  # numeric positions of bars
+        ticktext=models,  # model names only
+        tickangle=0,
+    )
+    return fig
+
+
+def _build_dashboard_figure(df_filtered, order_to_use, chart_type, light_mode, stats=None):
+    _, plot_bgcolor, font_color = theme.apply_theme(light_mode)
+    df_filtered = df_filtered.copy(deep=False)  # shallow: whole-column assignments below stay in this frame
+    n_points = len(df_filtered)
+    webgl = _use_webgl(n_points)
+    labels = _show_labels(n_points)
+    ScatterTrace = go.Scattergl if webgl else go.Scatter
+
+    # ---------------------
+    # Price Range Chart
+    # ---------------------
+    if chart_type == "Price Range":
+        if stats is not None:
+            price_range_df = aggregates.model_ranges(stats)[["model", "min_price_lakh", "max_price_lakh"]]
+        else:
+            price_range_df = (
+                df_filtered.groupby("model", observed=True)
+                .agg(min_price_lakh=("price_lakhs", "min"),
+                     max_price_lakh=("price_lakhs", "max"))
+                .reset_index()
+            )
+
+        fig = go.Figure()
+
+        # Apply custom order
+        price_range_df["model"] = pd.Categorical(price_range_df["model"], categories=order_to_use, ordered=True)
+        price_range_df = price_range_df.sort_values("model")
+
+        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
+        df_filtered = df_filtered.sort_values("model")
+
+        fig.add_trace(go.Bar(
+            x=price_range_df["model"],
+            y=price_range_df["max_price_lakh"] - price_range_df["min_price_lakh"],
+            base=price_range_df["min_price_lakh"],
+            name="Price Range",
+            marker=dict(color="lightblue"),
+            opacity=0.4,
+            hoverinfo="skip",
+            width=0.3
+        ))
+
+        variant_trace = dict(
+            x=df_filtered["model"],
+            y=df_filtered["price_lakhs"],
+            mode="markers+text" if labels else "markers",
+            name="Variants",
+            customdata=df_filtered["label"],
+            hovertemplate="<b>%{customdata}</b><br>Model: %{x}<br>Price: ₹%{y} L<extra></extra>",
+            marker=dict(color="dark blue", size=9, line=dict(width=1, color="white")),
+        )
+        if labels:
+            variant_trace.update(text=df_filtered["label"], textposition="middle right")
+        if not webgl:
+            variant_trace["cliponaxis"] = False
+        fig.add_trace(ScatterTrace(**variant_trace))
+
+    elif chart_type == "Fuel-wise Range Bar":
+        if stats is not None:
+            df_range = aggregates.fuel_ranges(stats)
+        else:
+            df_range = (
+                df_filtered.groupby(["model", "fuel"], observed=True)["price_lakhs"]
+                .agg(min_price="min", max_price="max")
+                .reset_index()
+            )
+        fig = _fuel_range_figure(df_range, df_filtered, order_to_use, webgl, labels)
+
+    # ---------------------
+    # Scatter Plot
+    # ---------------------
+    elif chart_type == "Scatter Plot":
+        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
+
+        fig = px.scatter(
+            df_filtered,
+            x="model",
+            y="price_lakhs",
+            color="fuel",
+            size="price_lakhs",
+            text="label" if labels else None,
+            hover_data=["brand", "variant", "transmission"],
+            title="Price of Each Variant by Model & Fuel (₹ Lakhs)",
+            category_orders={"model": order_to_use},
+            render_mode="webgl" if webgl else "auto",
+            height=520
+        )
+        if labels:
+            fig.update_traces(textposition="middle center")
+
+    # ---------------------
+    # Violin Plot
+    # ---------------------
+    elif chart_type == "Violin Plot" and webgl:
+        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
+        fig = _violin_summary_figure(df_filtered)
+
+    elif chart_type == "Violin Plot":
+        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
+
+        fig = px.violin(
+            df_filtered,
+            x="brand",
+            y="price_lakhs",
+            color="brand",
+            box=True,
+            points="all",
+            title="Price Distribution by Brand (₹ Lakhs)",
+            height=520
+        )
+
+        if labels:
+            scatter = px.scatter(
+                df_filtered,
+                x="brand",
+                y="price_lakhs",
+                text="label",
+                color="brand"
+            )
+            scatter.update_traces(textposition="top center", showlegend=False)
+            for trace in scatter.data:
+                fig.add_trace(trace)
+
+    # ---------------------
+    # Line Chart
+    # ---------------------
+    elif chart_type == "Line Chart":
+        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
+        df_filtered = df_filtered.sort_values("model")
+
+        fig = px.line(
+            df_filtered.sort_values("price_lakhs"),
+            x="model",
+            y="price_lakhs",
+            color="brand",
+            markers=True,
+            text="label" if labels else None,
+            title="Price Trends by Model (₹ Lakhs)",
+            category_orders={"model": order_to_use},
+            render_mode="webgl" if webgl else "auto",
+            height=520
+        )
+        if labels:
+            fig.update_traces(textposition="top center")
+
+    # ---------------------
+    # Treemap
+    # ---------------------
+    elif chart_type == "Treemap":
+        df_filtered["model"] = pd.Categorical(df_filtered["model"], categories=order_to_use, ordered=True)
+        df_filtered = df_filtered.sort_values(["model", "price_lakhs"])
+
+        df_filtered["variant_treemap_label"] = df_filtered.apply(
+            lambda r: "<br>".join(textwrap.wrap(
+                f"{r['variant']}", width=12
+            )),
+            axis=1
+        )
+
+        df_sorted = df_filtered.sort_values(["model", "price_lakhs"], ascending=[True, True])
+
+        fig = px.treemap(
+            df_sorted,
+            path=["brand", "model", "variant_treemap_label"],
+            values="price_lakhs",
+            color="price_lakhs",
+            color_continuous_scale="Blues" if light_mode else "Viridis",
+            title="Brand → Model → Variant Price Share",
+            hover_data={"brand": True, "model": True, "variant": True, "price_lakhs": ":.2f"}
+        )
+
+        fig.update_traces(
+            textfont=dict(size=14, family="Arial", color="black" if light_mode else "white"),
+            texttemplate="%{label}<br>₹%{value:.2f} L",
+            sort=False
+        )
+
+    # ---------------------
+    # Layout
+    # ---------------------
+    fig.update_layout(
+        title="Model Prices (in Lakhs)",
+        xaxis=dict(
+            title=dict(text="Model", font=dict(color=font_color)),
+            automargin=True,
+            rangeslider=dict(visible=False),
+            fixedrange=False,
+            tickfont=dict(color=font_color),
+            gridcolor="lightgrey" if light_mode else "#333333",
+            zerolinecolor="lightgrey" if light_mode else "#333333"
+        ),
+        yaxis=dict(
+            title=dict(text="Price (₹ Lakhs)", font=dict(color=font_color)),
+            automargin=True,
+            fixedrange=False,
+            tickfont=dict(color=font_color),
+            gridcolor="lightgrey" if light_mode else "#333333",
+            zerolinecolor="lightgrey" if light_mode else "#333333"
+        ),
+        hovermode="closest",
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=plot_bgcolor,
+        font=dict(color=font_color),
+        showlegend=False
+    )
+
+    return fig
+
+
+# =====================
+# TAB 3 HISTORY CHART
+# =====================
+def build_history_figure(df_daywise, brands, light_mode):
+    """Step chart of daily prices per variant, downsampled and WebGL-rendered once it gets large."""
+    _, plot_bgcolor, font_color = theme.apply_theme(light_mode)
+    webgl = _use_webgl(len(df_daywise))
+    if webgl:
+        df_daywise = downsample_step_series(df_daywise, "label", "date", "price_lakhs")
+
+    fig = px.line(
+        df_daywise,
+        x="date",
+        y="price_lakhs",
+        color="label",
+        title=f"Price Trends ({', '.join(brands)})",
+        markers=not webgl,
+        line_shape="hv",  # Step line for discrete data points
+        render_mode="webgl" if webgl else "auto",
+    )
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Price (₹ Lakhs)",
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=plot_bgcolor,
+        font=dict(color=font_color)
+    )
+    return fig
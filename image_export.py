@@ -0,0 +1,106 @@
+import hashlib
+import io
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.io as pio
+
+# =====================
+# PNG EXPORT
+# =====================
+# Images are rendered only when asked for, on one dedicated worker thread that
+# keeps a single Kaleido renderer alive between requests, and cached by figure
+# hash so repeat downloads of the same chart are free.
+IMAGE_CACHE_SIZE = 64
+RENDER_TIMEOUT = 60  # seconds per export call, renderer startup included
+
+_image_cache = OrderedDict()
+_image_cache_lock = threading.Lock()
+_renderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kaleido")
+_renderer_started = False
+
+
+def figure_key(fig, format="png", scale=1, width=None, height=None, source=None):
+    """
+    Image cache key. `source` is the key the figure was built from (e.g.
+    figures.figure_key); only figures without one are serialized and hashed.
+    """
+    spec = repr(source) if source is not None else fig.to_json()
+    h = hashlib.sha1(spec.encode("utf-8"))
+    h.update(f"|{format}|{scale}|{width}|{height}".encode())
+    return h.hexdigest()
+
+
+def _start_renderer():
+    """Kaleido >= 1.0 needs an explicit persistent server; 0.2.x keeps its subprocess alive on its own."""
+    global _renderer_started
+    if _renderer_started:
+        return
+    try:
+        import kaleido
+        start = getattr(kaleido, "start_sync_server", None)
+        if start is not None:
+            start(silence_warnings=True)
+    except Exception as e:
+        print(f"[WARN] Could not start persistent image renderer: {e}")
+    _renderer_started = True
+
+
+def _render(fig, format, scale, width, height):
+    _start_renderer()
+    return pio.to_image(fig, format=format, scale=scale, width=width, height=height)
+
+
+def cached_image(key):
+    with _image_cache_lock:
+        data = _image_cache.get(key)
+        if data is not None:
+            _image_cache.move_to_end(key)
+        return data
+
+
+def _cache_put(key, data):
+    with _image_cache_lock:
+        _image_cache[key] = data
+        _image_cache.move_to_end(key)
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+
+
+def export_image(fig, format="png", scale=1, width=None, height=None, source=None):
+    """Render `fig` (or return the cached bytes for an identical figure)."""
+    key = figure_key(fig, format, scale, width, height, source)
+    data = cached_image(key)
+    if data is None:
+        data = _renderer.submit(_render, fig, format, scale, width, height).result(RENDER_TIMEOUT)
+        _cache_put(key, data)
+    return data
+
+
+def export_many(figs, format="png", scale=1, width=None, height=None, sources=None):
+    """Render several figures in one pass through the renderer; returns bytes in input order."""
+    sources = sources or [None] * len(figs)
+    keys = [figure_key(f, format, scale, width, height, src) for f, src in zip(figs, sources)]
+    results = [cached_image(k) for k in keys]
+    missing = [i for i, data in enumerate(results) if data is None]
+    if missing:
+        def render_batch():
+            return [_render(figs[i], format, scale, width, height) for i in missing]
+        batch = _renderer.submit(render_batch).result(RENDER_TIMEOUT * len(missing))
+        for i, data in zip(missing, batch):
+            _cache_put(keys[i], data)
+            results[i] = data
+    return results
+
+
+def export_zip(named_figs, format="png", scale=1, width=None, height=None, sources=None):
+    """Zip archive with one image per (name, figure) pair."""
+    names = [n for n, _ in named_figs]
+    images = export_many([f for _, f in named_figs], format, scale, width, height, sources)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:  # PNGs are already compressed
+        for name, data in zip(names, images):
+            zf.writestr(f"{name}.{format}", data)
+    return buf.getvalue()
@@ -1,7 +1,10 @@
 import sqlite3
 from datetime import datetime
 import pandas as pd
+import records
 DB_FILE = "prices.db"
+DEFAULT_CITY = "Delhi"  # every brand fetcher was Delhi-only before city support
+
 def init_db():
     connection = sqlite3.connect(DB_FILE)
     connection.execute("""
@@ -14,55 +17,574 @@ def init_db():
             transmission TEXT,
             variant TEXT,
             price INTEGER,
-            source TEXT DEFAULT 'scraped'
+            source TEXT DEFAULT 'scraped',
+            city TEXT DEFAULT '%s'
         )
-    """)
+    """ % DEFAULT_CITY)
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(prices)")}
+    if "city" not in columns:
+        connection.execute(f"ALTER TABLE prices ADD COLUMN city TEXT DEFAULT '{DEFAULT_CITY}'")
     connection.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON prices(timestamp)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_source_timestamp ON prices(source, timestamp)")
+    init_change_tables(connection)
+    connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+    init_search_tables(connection)
+    init_aggregate_tables(connection)
     connection.commit()
     connection.close()
 
-def store_prices(prices):
-    if not prices:
+# =====================
+# CHANGE DETECTION
+# =====================
+# current_prices holds the last scraped price of every live variant, so each
+# new snapshot is diffed against that state (one row per variant) instead of
+# against the whole history. Differences are appended to price_changes as
+# events: 'new', 'discontinued', 'up' or 'down'.
+#
+# A snapshot only speaks for the (city, brand, model) groups it contains: the
+# scrapers fetch each model separately and swallow failures, so a model whose
+# fetch failed is simply absent and must not be reported as discontinued (and
+# then as new on the next run). A (city, brand) pair with no state yet (first
+# scrape of a brand or city) is recorded silently instead of as all-new.
+CHANGE_KEY = ("city", "brand", "model", "fuel", "transmission", "variant")
+
+
+def init_change_tables(connection):
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS current_prices (
+            city TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            model TEXT NOT NULL,
+            fuel TEXT NOT NULL,
+            transmission TEXT NOT NULL,
+            variant TEXT NOT NULL,
+            price INTEGER,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL,
+            PRIMARY KEY (city, brand, model, fuel, transmission, variant)
+        ) WITHOUT ROWID
+    """)
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS price_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            city TEXT,
+            brand TEXT,
+            model TEXT,
+            fuel TEXT,
+            transmission TEXT,
+            variant TEXT,
+            change TEXT NOT NULL,
+            old_price INTEGER,
+            new_price INTEGER,
+            delta INTEGER,
+            pct REAL
+        )
+    """)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_changes_timestamp ON price_changes(timestamp)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_changes_city_brand ON price_changes(city, brand, timestamp)")
+    # Databases from before change detection: seed the state from the latest scrape
+    if connection.execute("SELECT 1 FROM current_prices LIMIT 1").fetchone() is None:
+        connection.execute(f"""
+            INSERT INTO current_prices ({", ".join(CHANGE_KEY)}, price, first_seen, last_seen)
+            SELECT COALESCE(city, '{DEFAULT_CITY}'), brand, model, COALESCE(fuel, ''), COALESCE(transmission, ''),
+                   COALESCE(variant, ''), MIN(price), timestamp, timestamp
+            FROM prices
+            WHERE source = 'scraped'
+              AND timestamp = (SELECT MAX(timestamp) FROM prices WHERE source = 'scraped')
+            GROUP BY 1, 2, 3, 4, 5, 6
+        """)
+
+
+def _snapshot_state(rows):
+    """{key: price} for a snapshot; a variant listed twice keeps its lowest price so reruns are stable."""
+    state = {}
+    for r in rows:
+        k = (r.city, r.brand, r.model, r.fuel or "", r.transmission or "", r.variant or "")
+        if r.price is None:
+            continue
+        old = state.get(k)
+        if old is None or r.price < old:
+            state[k] = r.price
+    return state
+
+
+def detect_changes(conn, rows, now):
+    """
+    Diff a scraped snapshot against current_prices, append its events to
+    price_changes and move the state forward. Runs in the caller's transaction.
+
+    Returns the number of events written.
+    """
+    new_state = _snapshot_state(rows)
+    seeded = {
+        (city, brand) for city, brand in {k[:2] for k in new_state}
+        if conn.execute("SELECT 1 FROM current_prices WHERE city = ? AND brand = ? LIMIT 1",
+                        (city, brand)).fetchone()
+    }
+    old_state = {}
+    for city, brand, model in {k[:3] for k in new_state}:
+        cur = conn.execute(
+            "SELECT fuel, transmission, variant, price FROM current_prices WHERE city = ? AND brand = ? AND model = ?",
+            (city, brand, model),
+        )
+        for fuel, trans, variant, price in cur:
+            old_state[(city, brand, model, fuel, trans, variant)] = price
+
+    events = []
+    for k, price in new_state.items():
+        old = old_state.get(k)
+        if old is None:
+            if (k[0], k[1]) in seeded:
+                events.append((now, *k, "new", None, price, None, None))
+        elif price != old:
+            delta = price - old
+            pct = round(delta * 100.0 / old, 2) if old else None
+            events.append((now, *k, "up" if delta > 0 else "down", old, price, delta, pct))
+    gone = [k for k in old_state if k not in new_state]
+    events.extend((now, *k, "discontinued", old_state[k], None, None, None) for k in gone)
+
+    conn.executemany(f"""
+        INSERT INTO price_changes (timestamp, {", ".join(CHANGE_KEY)}, change, old_price, new_price, delta, pct)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, events)
+    conn.executemany(f"DELETE FROM current_prices WHERE {' AND '.join(c + ' = ?' for c in CHANGE_KEY)}", gone)
+    conn.executemany(f"""
+        INSERT INTO current_prices ({", ".join(CHANGE_KEY)}, price, first_seen, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT ({", ".join(CHANGE_KEY)}) DO UPDATE SET price = excluded.price, last_seen = excluded.last_seen
+    """, ((*k, price, now, now) for k, price in new_state.items()))
+    return len(events)
+
+
+def get_recent_changes(since=None, city=None, brands=None, limit=500):
+    """Newest change events first; `since` is an ISO timestamp, served from the price_changes index."""
+    conn = sqlite3.connect(DB_FILE)
+    q = """
+        SELECT timestamp, city, brand, model, fuel, transmission, variant, change, old_price, new_price, delta, pct
+        FROM price_changes
+        WHERE 1 = 1
+    """
+    params = []
+    if since:
+        q += " AND timestamp >= ?"
+        params.append(since)
+    if city:
+        q += " AND city = ?"
+        params.append(city)
+    if brands:
+        q += " AND brand IN ({})".format(",".join(["?"] * len(brands)))
+        params += list(brands)
+    q += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit)
+    df = pd.read_sql_query(q, conn, params=params)
+    conn.close()
+    return df
+
+
+# =====================
+# VARIANT SEARCH
+# =====================
+# variant_names holds one row per variant ever stored (with its last price);
+# variant_fts is an FTS5 index over its brand, model and variant columns, kept
+# in sync by triggers. Re-storing a known variant only updates its price, which
+# the index does not cover, so a scrape touches the index only for new names.
+# Trigram tokens match any substring ("knight", "xi+ am"); SQLite builds older
+# than 3.34 fall back to word-prefix matching.
+SEARCH_WEIGHTS = (2.0, 4.0, 10.0)  # bm25 weights for brand, model, variant
+
+
+def _fts_tokenizer(connection):
+    try:
+        connection.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(x, tokenize='trigram')")
+        connection.execute("DROP TABLE temp.fts_probe")
+        return "trigram"
+    except sqlite3.OperationalError:
+        return "unicode61"
+
+
+def init_search_tables(connection):
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS variant_names (
+            id INTEGER PRIMARY KEY,
+            city TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            model TEXT NOT NULL,
+            fuel TEXT NOT NULL,
+            transmission TEXT NOT NULL,
+            variant TEXT NOT NULL,
+            price INTEGER,
+            source TEXT,
+            last_seen TEXT,
+            UNIQUE (city, brand, model, fuel, transmission, variant)
+        )
+    """)
+    if connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'variant_fts'").fetchone():
         return
+    tokenize = _fts_tokenizer(connection)
+    connection.execute(f"""
+        CREATE VIRTUAL TABLE variant_fts USING fts5(
+            brand, model, variant, content='variant_names', content_rowid='id', tokenize='{tokenize}'
+        )
+    """)
+    connection.executescript("""
+        CREATE TRIGGER IF NOT EXISTS variant_names_ai AFTER INSERT ON variant_names BEGIN
+            INSERT INTO variant_fts(rowid, brand, model, variant) VALUES (new.id, new.brand, new.model, new.variant);
+        END;
+        CREATE TRIGGER IF NOT EXISTS variant_names_ad AFTER DELETE ON variant_names BEGIN
+            INSERT INTO variant_fts(variant_fts, rowid, brand, model, variant)
+            VALUES ('delete', old.id, old.brand, old.model, old.variant);
+        END;
+    """)
+    # Existing history: index every variant name with its latest price
+    connection.execute(f"""
+        INSERT OR IGNORE INTO variant_names ({", ".join(CHANGE_KEY)}, price, source, last_seen)
+        SELECT COALESCE(city, '{DEFAULT_CITY}'), brand, model, COALESCE(fuel, ''), COALESCE(transmission, ''),
+               COALESCE(variant, ''), price, source, timestamp
+        FROM prices
+        WHERE id IN (SELECT MAX(id) FROM prices WHERE brand IS NOT NULL AND model IS NOT NULL
+                     GROUP BY city, brand, model, fuel, transmission, variant)
+        ORDER BY id
+    """)
+
+
+def _index_variants(conn, rows, source, timestamp):
+    conn.executemany(f"""
+        INSERT INTO variant_names ({", ".join(CHANGE_KEY)}, price, source, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT ({", ".join(CHANGE_KEY)})
+        DO UPDATE SET price = excluded.price, source = excluded.source, last_seen = excluded.last_seen
+        WHERE excluded.last_seen >= variant_names.last_seen
+    """, (
+        (r.city, r.brand, r.model, r.fuel or "", r.transmission or "", r.variant or "", r.price, source, timestamp)
+        for r in rows
+    ))
+
+
+def _fts_query(terms, trigram):
+    """FTS5 MATCH string: each term as a quoted phrase (so "+" or "-" stay literal), all required."""
+    quoted = ['"' + t.replace('"', '""') + '"' for t in terms]
+    return " ".join(quoted if trigram else [q + "*" for q in quoted])
+
+
+def _fts_trigram(conn):
+    return "trigram" in conn.execute("SELECT sql FROM sqlite_master WHERE name = 'variant_fts'").fetchone()[0]
+
+
+def search_variants(text, city=None, limit=50):
+    """
+    Variants whose brand, model or variant match every word of `text`, best first.
+
+    Words shorter than three characters cannot use the trigram index and are
+    matched with LIKE on the rows the index returns.
+    """
+    words = text.split()
+    if not words:
+        return pd.DataFrame()
+    conn = sqlite3.connect(DB_FILE)
+    trigram = _fts_trigram(conn)
+    long_words = [w for w in words if len(w) >= 3] if trigram else words
+    short_words = [w for w in words if w not in long_words]
+    if long_words:
+        q = f"""
+            SELECT v.brand, v.model, v.fuel, v.transmission, v.variant, v.price, v.source, v.last_seen, v.city
+            FROM variant_fts
+            JOIN variant_names v ON v.id = variant_fts.rowid
+            WHERE variant_fts MATCH ?
+        """
+        params = [_fts_query(long_words, trigram)]
+    else:
+        q = """
+            SELECT brand, model, fuel, transmission, variant, price, source, last_seen, city
+            FROM variant_names v
+            WHERE 1 = 1
+        """
+        params = []
+    for w in short_words:
+        q += " AND (v.brand || ' ' || v.model || ' ' || v.variant) LIKE ?"
+        params.append(f"%{w}%")
+    if city:
+        q += " AND v.city = ?"
+        params.append(city)
+    q += " ORDER BY bm25(variant_fts, {}, {}, {})".format(*SEARCH_WEIGHTS) if long_words else " ORDER BY brand, model, variant"
+    q += " LIMIT ?"
+    params.append(limit)
+    df = pd.read_sql_query(q, conn, params=params)
+    conn.close()
+    return df
+
+
+# =====================
+# AGGREGATES
+# =====================
+# Summaries of the rows get_latest_prices returns, rebuilt in the same
+# transaction as every write so reruns read them instead of grouping raw rows:
+# - model_stats: min/max/sum/count of price per (city, brand, model, fuel,
+#   transmission), small enough to re-filter by fuel and transmission and
+#   roll up per model or per (model, fuel);
+# - variant_ranks: each latest row's price rank within its (city, brand, model),
+#   ties broken by variant name like the Excel export does.
+# A write only recomputes the (city, brand, model) groups it touched: its own
+# rows' groups plus, when it replaces a snapshot (scrape, PDF load), the groups
+# of the snapshot it replaces. Reads go through the latest-row indexes, so the
+# cost does not grow with history.
+LATEST_WHERE = """
+    (p.source = 'manual'
+    OR p.timestamp = (SELECT MAX(timestamp) FROM prices WHERE source = 'scraped')
+    -- latest PDF price-list load per brand
+    OR (p.source = 'pdf' AND p.timestamp = (
+        SELECT MAX(timestamp) FROM prices WHERE source = 'pdf' AND brand = p.brand
+    )))
+"""
+
+
+def init_aggregate_tables(connection):
+    created = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'model_stats'").fetchone() is None
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS model_stats (
+            city TEXT,
+            brand TEXT,
+            model TEXT,
+            fuel TEXT,
+            transmission TEXT,
+            min_price INTEGER,
+            max_price INTEGER,
+            sum_price INTEGER,
+            n INTEGER
+        )
+    """)
+    rank_columns = [r[1] for r in connection.execute("PRAGMA table_info(variant_ranks)")]
+    rebuild = rank_columns and "city" not in rank_columns  # ranks from before per-group refreshes
+    if rebuild:
+        connection.execute("DROP TABLE variant_ranks")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS variant_ranks (
+            id INTEGER PRIMARY KEY,
+            city TEXT,
+            brand TEXT,
+            model TEXT,
+            variant_rank INTEGER
+        )
+    """)
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_model_stats_group ON model_stats(city, brand, model)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_variant_ranks_group ON variant_ranks(city, brand, model)")
+    # Built once; from then on every write refreshes its groups, so init_db
+    # (run on every rerun) does not write here or bump the data version
+    if created or rebuild:
+        refresh_aggregates(connection)
+
+
+def _latest_groups(conn, source, brands=None):
+    """(city, brand, model) groups of the current latest `source` snapshot (of `brands`, for PDF loads)."""
+    if source == "scraped":
+        q, params = "timestamp = (SELECT MAX(timestamp) FROM prices WHERE source = 'scraped')", []
+    elif source == "pdf":
+        q = "timestamp = (SELECT MAX(timestamp) FROM prices WHERE source = 'pdf' AND brand = p.brand)"
+        q += " AND brand IN ({})".format(",".join(["?"] * len(brands)))
+        params = list(brands)
+    else:
+        return set()  # manual rows are never replaced by a write
+    return set(conn.execute(f"""
+        SELECT DISTINCT COALESCE(city, '{DEFAULT_CITY}'), brand, model FROM prices p
+        WHERE source = ? AND {q}
+    """, [source] + params))
+
+
+def refresh_aggregates(conn, groups=None):
+    """Recompute model_stats and variant_ranks for `groups` ((city, brand, model) tuples), or for everything."""
+    if groups is None:
+        scope = ""
+        conn.execute("DELETE FROM model_stats")
+        conn.execute("DELETE FROM variant_ranks")
+    else:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS agg_groups (city TEXT, brand TEXT, model TEXT, "
+                     "PRIMARY KEY (city, brand, model))")
+        conn.execute("DELETE FROM temp.agg_groups")
+        conn.executemany("INSERT OR IGNORE INTO temp.agg_groups VALUES (?, ?, ?)", groups)
+        conn.execute("DELETE FROM model_stats WHERE (city, brand, model) IN (SELECT * FROM temp.agg_groups)")
+        conn.execute("DELETE FROM variant_ranks WHERE (city, brand, model) IN (SELECT * FROM temp.agg_groups)")
+        scope = f"AND (COALESCE(city, '{DEFAULT_CITY}'), brand, model) IN (SELECT * FROM temp.agg_groups)"
+    conn.execute(f"""
+        INSERT INTO model_stats
+        SELECT COALESCE(city, '{DEFAULT_CITY}'), brand, model, fuel, transmission,
+               MIN(price), MAX(price), SUM(price), COUNT(*)
+        FROM prices p
+        WHERE price IS NOT NULL AND {LATEST_WHERE} {scope}
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+    conn.execute(f"""
+        INSERT INTO variant_ranks (id, city, brand, model, variant_rank)
+        SELECT id, COALESCE(city, '{DEFAULT_CITY}'), brand, model, ROW_NUMBER() OVER (
+            PARTITION BY COALESCE(city, '{DEFAULT_CITY}'), brand, model
+            ORDER BY ROUND(price / 100000.0, 2), variant
+        )
+        FROM prices p
+        WHERE price IS NOT NULL AND {LATEST_WHERE} {scope}
+    """)
+    # Every write that changes the latest rows passes through here, so this is
+    # also where the shared dataset (dataset.py) learns it is stale
+    conn.execute("""
+        INSERT INTO meta (key, value) VALUES ('data_version', 1)
+        ON CONFLICT (key) DO UPDATE SET value = value + 1
+    """)
+
+
+def get_data_version():
+    conn = sqlite3.connect(DB_FILE)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+
+def get_model_stats():
+    conn = sqlite3.connect(DB_FILE)
+    df = pd.read_sql_query("SELECT * FROM model_stats", conn)
+    conn.close()
+    return df
+
+
+def store_prices(prices, source="scraped"):
+    """Append a snapshot; scraped snapshots also go through change detection. Returns the event count."""
+    if not prices:
+        return 0
     conn = sqlite3.connect(DB_FILE)
     now = datetime.now().isoformat()
+    rows = [records.as_record(p, DEFAULT_CITY) for p in prices]
+    groups = _latest_groups(conn, source, {r.brand for r in rows}) | {(r.city, r.brand, r.model) for r in rows}
     conn.executemany("""
-        INSERT INTO prices (timestamp, brand, model, fuel, transmission, variant, price)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, [
-        (now, r["Brand"], r["Model"], r["Fuel"], r["Transmission"], r["Variant"], r["Price"])
-        for r in prices
-    ])
+        INSERT INTO prices (timestamp, brand, model, fuel, transmission, variant, price, source, city)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, ((now, r.brand, r.model, r.fuel, r.transmission, r.variant, r.price, source, r.city) for r in rows))
+    _index_variants(conn, rows, source, now)
+    changes = detect_changes(conn, rows, now) if source == "scraped" else 0
+    refresh_aggregates(conn, groups)
     conn.commit()
     conn.close()
+    return changes
 
 def get_latest_prices():
     conn = sqlite3.connect(DB_FILE)
-    q = """
-        SELECT brand, model, fuel, transmission, variant, price, source, timestamp
-        FROM prices
-        WHERE source='manual'
-        OR timestamp = (
-            SELECT MAX(timestamp) FROM prices WHERE source='scraped'
-        )
+    q = f"""
+        SELECT p.brand, p.model, p.fuel, p.transmission, p.variant, p.price, p.source, p.timestamp, p.city,
+               r.variant_rank
+        FROM prices p
+        LEFT JOIN variant_ranks r ON r.id = p.id
+        WHERE {LATEST_WHERE}
     """
     df = pd.read_sql_query(q, conn)
     conn.close()
     return df
 
-def add_price(brand, model, variant, price, fuel, transmission,timestamp):
+def add_price(brand, model, variant, price, fuel, transmission,timestamp, city=DEFAULT_CITY):
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
     c.execute("""
-        INSERT INTO prices (brand, model, variant, price, fuel, transmission, timestamp, source)
-        VALUES (?, ?, ?, ?, ?, ?, ?, 'manual')
-    """, (brand, model, variant, price, fuel, transmission, timestamp))
+        INSERT INTO prices (brand, model, variant, price, fuel, transmission, timestamp, source, city)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 'manual', ?)
+    """, (brand, model, variant, price, fuel, transmission, timestamp, city))
+    _index_variants(conn, [records.PriceRecord(brand, model, fuel, transmission, variant, price, city)],
+                    "manual", timestamp)
+    refresh_aggregates(conn, [(city or DEFAULT_CITY, brand, model)])
     conn.commit()
     conn.close()
 
 def delete_price(record_id):
+    delete_prices([record_id])
+
+def delete_prices(record_ids):
+    """Delete manual rows by id in one transaction; returns how many were deleted."""
+    ids = [int(i) for i in record_ids]
+    if not ids:
+        return 0
     conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("DELETE FROM prices WHERE id = ? AND source='manual'", (record_id,))
+    conn.execute("CREATE TEMP TABLE doomed_ids (id INTEGER PRIMARY KEY)")
+    conn.executemany("INSERT OR IGNORE INTO doomed_ids VALUES (?)", ((i,) for i in ids))
+    keys = {
+        (city or DEFAULT_CITY, brand, model, fuel or "", trans or "", variant or "")
+        for city, brand, model, fuel, trans, variant in conn.execute("""
+            SELECT city, brand, model, fuel, transmission, variant FROM prices
+            WHERE source = 'manual' AND id IN (SELECT id FROM doomed_ids)
+        """)
+    }
+    deleted = conn.execute(
+        "DELETE FROM prices WHERE source = 'manual' AND id IN (SELECT id FROM doomed_ids)"
+    ).rowcount
+    if keys:
+        # Drop names from the search index once no stored price uses them (one scan for the whole batch)
+        brands = list({k[1] for k in keys})
+        remaining = {
+            (city or DEFAULT_CITY, brand, model, fuel or "", trans or "", variant or "")
+            for city, brand, model, fuel, trans, variant in conn.execute(
+                "SELECT DISTINCT city, brand, model, fuel, transmission, variant FROM prices WHERE brand IN ({})"
+                .format(",".join(["?"] * len(brands))), brands)
+        }
+        conn.executemany(
+            f"DELETE FROM variant_names WHERE {' AND '.join(col + ' = ?' for col in CHANGE_KEY)}",
+            keys - remaining,
+        )
+    refresh_aggregates(conn, {k[:3] for k in keys})
     conn.commit()
-    conn.close()
\ No newline at end of file
+    conn.close()
+    return deleted
+
+def get_manual_entries(search="", limit=100, after=None):
+    """
+    One page of manual rows, newest first, and the cursor of the next page
+    (None on the last one). Pass that cursor back as `after`: pages are read
+    by key from the (source, timestamp) index, so a page costs the same
+    however deep it is, and no total is counted.
+
+    Every word of `search` must match the brand, model or variant (through the
+    variant search index) or the city.
+    """
+    conn = sqlite3.connect(DB_FILE)
+    where, params = "p.source = 'manual'", []
+    words = search.split()
+    if words:
+        trigram = _fts_trigram(conn)
+        conditions = []
+        for w in words:
+            if len(w) >= 3 or not trigram:
+                conditions.append("(v.id IN (SELECT rowid FROM variant_fts WHERE variant_fts MATCH ?) OR v.city LIKE ?)")
+                params += [_fts_query([w], trigram), f"%{w}%"]
+            else:
+                conditions.append("(v.brand || ' ' || v.model || ' ' || v.variant || ' ' || v.city) LIKE ?")
+                params.append(f"%{w}%")
+        where += f"""
+            AND (COALESCE(p.city, '{DEFAULT_CITY}'), p.brand, p.model, COALESCE(p.fuel, ''),
+                 COALESCE(p.transmission, ''), COALESCE(p.variant, '')) IN (
+                SELECT {", ".join(CHANGE_KEY)} FROM variant_names v WHERE {" AND ".join(conditions)}
+            )"""
+    if after is not None:
+        where += " AND (p.timestamp, p.id) < (?, ?)"
+        params += list(after)
+    df = pd.read_sql_query(f"""
+        SELECT p.id, p.timestamp, p.city, p.brand, p.model, p.fuel, p.transmission, p.variant, p.price
+        FROM prices p
+        WHERE {where}
+        ORDER BY p.timestamp DESC, p.id DESC
+        LIMIT ?
+    """, conn, params=params + [limit + 1])
+    conn.close()
+    if len(df) <= limit:
+        return df, None
+    df = df.iloc[:limit]
+    last = df.iloc[-1]
+    return df, (last["timestamp"], int(last["id"]))
+
+def get_prices_since(since, brands=None):
+    """All rows (scraped and manual) with timestamp >= `since`, optionally limited to `brands`."""
+    conn = sqlite3.connect(DB_FILE)
+    q = """
+        SELECT brand, model, fuel, transmission, variant, price, source, timestamp, city
+        FROM prices
+        WHERE timestamp >= ?
+    """
+    params = [since]
+    if brands:
+        q += " AND brand IN ({})".format(",".join(["?"] * len(brands)))
+        params += list(brands)
+    q += " ORDER BY timestamp"
+    df = pd.read_sql_query(q, conn, params=params)
+    conn.close()
+    return df
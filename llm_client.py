@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import threading
+
+import groq
+from groq import AsyncGroq
+
+# =====================
+# SHARED ASYNC LLM CLIENT
+# =====================
+# One event loop thread per server process runs every outbound completion, so
+# Streamlit script threads only wait on a token buffer. A global semaphore caps
+# concurrent calls across sessions, a queue limit rejects overload early, and
+# identical in-flight prompts share one upstream call.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 4))
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", 16))  # waiting + running
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 60))     # seconds, queue wait included
+
+
+class LLMError(RuntimeError):
+    """Base of every error a caller of LLMClient sees; the message is fit for the user."""
+
+
+class LLMBusyError(LLMError):
+    pass
+
+
+class LLMTimeoutError(LLMError, TimeoutError):
+    pass
+
+
+class LLMUpstreamError(LLMError):
+    pass
+
+
+def _upstream_error(e):
+    """Map a Groq client exception onto the LLMError hierarchy."""
+    if isinstance(e, groq.APITimeoutError):
+        return LLMTimeoutError("The assistant timed out, please retry.")
+    if isinstance(e, groq.APIConnectionError):
+        return LLMUpstreamError("The assistant service could not be reached, please retry later.")
+    if isinstance(e, groq.RateLimitError):
+        return LLMUpstreamError("The assistant is rate limited, please retry in a minute.")
+    if isinstance(e, (groq.AuthenticationError, groq.PermissionDeniedError)):
+        return LLMUpstreamError("The assistant is not configured correctly (API key rejected).")
+    if isinstance(e, groq.APIStatusError):
+        return LLMUpstreamError(f"The assistant service returned an error ({e.status_code}).")
+    return LLMUpstreamError(f"The assistant failed: {e}")
+
+
+class _Flight:
+    """Token buffer for one upstream completion, readable by any number of threads."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def push(self, text):
+        with self._cond:
+            self.chunks.append(text)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def iter_chunks(self, timeout):
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self.chunks) and not self.done:
+                    if not self._cond.wait(timeout):
+                        raise LLMTimeoutError(f"No tokens received for {timeout:g}s")
+                new = self.chunks[i:]
+                i = len(self.chunks)
+                finished, error = self.done, self.error
+            yield from new
+            if finished and i >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class LLMClient:
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, max_queue=LLM_MAX_QUEUE, timeout=LLM_TIMEOUT):
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._client = AsyncGroq(
+            api_key=os.environ.get("GROQ_API_KEY", "GROQ_API_KEY"),
+            base_url=os.environ.get("GROQ_BASE_URL") or None,
+            max_retries=0,
+        )
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._pending = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+        self._sem = asyncio.run_coroutine_threadsafe(self._make_semaphore(max_concurrency), self._loop).result()
+
+    @staticmethod
+    async def _make_semaphore(n):
+        return asyncio.Semaphore(n)
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "inflight_prompts": len(self._inflight)}
+
+    async def _run(self, key, flight, model, messages, temperature):
+        async def consume():
+            async with self._sem:
+                kwargs = {"model": model, "messages": messages, "stream": True}
+                if temperature is not None:
+                    kwargs["temperature"] = temperature
+                stream = await self._client.chat.completions.create(**kwargs)
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        flight.push(delta)
+
+        try:
+            await asyncio.wait_for(consume(), self.timeout)
+            flight.finish()
+        except asyncio.TimeoutError:
+            flight.finish(LLMTimeoutError(f"LLM call exceeded {self.timeout:g}s"))
+        except groq.GroqError as e:
+            flight.finish(_upstream_error(e))
+        except Exception as e:
+            flight.finish(LLMUpstreamError(f"The assistant failed: {e}"))
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._pending -= 1
+
+    def stream(self, messages, model, temperature=None):
+        """Yield completion text chunks; joins an identical in-flight request instead of issuing a new one."""
+        key = json.dumps([model, temperature, messages], sort_keys=True)
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is None:
+                if self._pending >= self.max_queue:
+                    raise LLMBusyError("The assistant is busy, please retry in a moment.")
+                flight = self._inflight[key] = _Flight()
+                self._pending += 1
+                asyncio.run_coroutine_threadsafe(
+                    self._run(key, flight, model, messages, temperature), self._loop
+                )
+        # Readers wait a little longer than the upstream deadline so its error surfaces first
+        return flight.iter_chunks(self.timeout + 5)
+
+    def complete(self, messages, model, temperature=None):
+        return "".join(self.stream(messages, model, temperature))
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide LLMClient shared by all Streamlit sessions."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient()
+        return _shared_client
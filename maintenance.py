@@ -0,0 +1,162 @@
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import initialization
+
+# =====================
+# HISTORY RETENTION
+# =====================
+# Every refresh appends a full catalog, so old history is thinned out:
+# - rows newer than FULL_RESOLUTION_DAYS are kept as they are;
+# - older rows keep one point per variant per day (the day's last row);
+# - rows older than DAILY_DAYS keep one point per variant per week.
+# Manual rows are never touched, and neither is the latest scraped snapshot or
+# the latest PDF load of each brand (get_latest_prices reads those).
+# Individual price moves are not lost: they are in price_changes.
+#
+# The job runs against the live database: it switches it to WAL so dashboard
+# readers keep their snapshot while it writes, and deletes in short batches so
+# no single write transaction holds the lock for long.
+FULL_RESOLUTION_DAYS = 30
+DAILY_DAYS = 365
+DELETE_BATCH = 5000
+VACUUM_STEP_PAGES = 2000
+BATCH_PAUSE = 0.05  # seconds between write transactions, lets other writers in
+ANALYSIS_LIMIT = 1000  # rows sampled per index by ANALYZE
+
+# Rows sharing a bucket collapse to the newest one (highest id, i.e. inserted
+# last). One pass over the old rows, read through idx_source_timestamp: the
+# window numbers each bucket's rows newest first and everything after the
+# first goes. The latest snapshots are looked up once, not per row.
+_DOOMED_SQL = """
+    CREATE TEMP TABLE doomed AS
+    WITH old AS (
+        SELECT id, source, brand, timestamp,
+               ROW_NUMBER() OVER (
+                   PARTITION BY city, brand, model, fuel, transmission, variant, source,
+                                CASE WHEN timestamp < :daily_cutoff THEN date(timestamp, 'weekday 0')
+                                     ELSE date(timestamp) END
+                   ORDER BY id DESC
+               ) AS newest_first
+        FROM prices
+        WHERE source IN ('scraped', 'pdf') AND timestamp < :full_cutoff
+    ),
+    latest_pdf AS MATERIALIZED (
+        SELECT brand, MAX(timestamp) AS timestamp FROM prices WHERE source = 'pdf' GROUP BY brand
+    )
+    SELECT id FROM old
+    WHERE newest_first > 1
+      AND NOT (source = 'scraped' AND timestamp = (SELECT MAX(timestamp) FROM prices WHERE source = 'scraped'))
+      AND NOT EXISTS (
+          SELECT 1 FROM latest_pdf l
+          WHERE old.source = 'pdf' AND l.brand IS old.brand AND l.timestamp = old.timestamp
+      )
+    ORDER BY id
+"""
+
+
+def db_size(path=None):
+    """Bytes on disk, write-ahead log included."""
+    path = path or initialization.DB_FILE
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)  # explicit transactions below
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def prune_history(conn, full_days=FULL_RESOLUTION_DAYS, daily_days=DAILY_DAYS, batch=DELETE_BATCH, dry_run=False):
+    """Delete the rows the retention policy drops; returns how many (would be) deleted."""
+    now = datetime.now()
+    conn.execute("DROP TABLE IF EXISTS temp.doomed")
+    conn.execute(_DOOMED_SQL, {
+        "full_cutoff": (now - timedelta(days=full_days)).isoformat(),
+        "daily_cutoff": (now - timedelta(days=daily_days)).isoformat(),
+    })
+    total = conn.execute("SELECT COUNT(*) FROM doomed").fetchone()[0]
+    if dry_run:
+        return total
+    last = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM doomed").fetchone()[0]
+    for start in range(0, last, batch):
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(
+            "DELETE FROM prices WHERE id IN (SELECT id FROM doomed WHERE rowid > ? AND rowid <= ?)",
+            (start, start + batch),
+        )
+        conn.execute("COMMIT")
+        time.sleep(BATCH_PAUSE)
+    conn.execute("DROP TABLE temp.doomed")
+    return total
+
+
+def reclaim_space(conn, step=VACUUM_STEP_PAGES, convert=False):
+    """
+    Return free pages to the filesystem a few thousand at a time.
+
+    Incremental vacuum needs auto_vacuum=INCREMENTAL, which an existing database
+    only picks up through one full VACUUM. That rewrites the whole file under
+    an exclusive lock, so it only runs when asked for (`convert`); until then
+    freed pages stay in the file and are reused by later inserts.
+    Returns "converted", "incremental" or "skipped".
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        if not convert:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return "skipped"
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return "converted"
+    while conn.execute("PRAGMA freelist_count").fetchone()[0]:
+        conn.execute(f"PRAGMA incremental_vacuum({step})")
+        time.sleep(BATCH_PAUSE)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return "incremental"
+
+
+def run_maintenance(path=None, full_days=FULL_RESOLUTION_DAYS, daily_days=DAILY_DAYS, dry_run=False,
+                    convert_auto_vacuum=False):
+    path = path or initialization.DB_FILE
+    size_before = db_size(path)
+    conn = _connect(path)
+    try:
+        t0 = time.perf_counter()
+        deleted = prune_history(conn, full_days, daily_days, dry_run=dry_run)
+        if dry_run:
+            print(f"Would delete {deleted} rows (full resolution {full_days} days, daily until {daily_days} days).")
+            return {"deleted": deleted, "bytes_reclaimed": 0}
+        vacuum = reclaim_space(conn, convert=convert_auto_vacuum)
+        conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    size_after = db_size(path)
+    print(f"Deleted {deleted} rows in {time.perf_counter() - t0:.1f}s"
+          f"{' (converted to incremental auto-vacuum)' if vacuum == 'converted' else ''}.")
+    if vacuum == "skipped":
+        print("Free pages were left for reuse: run once with --convert-auto-vacuum "
+              "(full VACUUM, locks the database) to return space to the filesystem from then on.")
+    print(f"Size {size_before / 1e6:.2f} MB -> {size_after / 1e6:.2f} MB, "
+          f"reclaimed {(size_before - size_after) / 1e6:.2f} MB.")
+    return {"deleted": deleted, "bytes_reclaimed": size_before - size_after}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Downsample old price history and compact prices.db")
+    parser.add_argument("--db", default=initialization.DB_FILE)
+    parser.add_argument("--full-days", type=int, default=FULL_RESOLUTION_DAYS,
+                        help="keep every row newer than this")
+    parser.add_argument("--daily-days", type=int, default=DAILY_DAYS,
+                        help="keep one row per variant per day until this age, then one per week")
+    parser.add_argument("--dry-run", action="store_true", help="only count the rows that would be deleted")
+    parser.add_argument("--convert-auto-vacuum", action="store_true",
+                        help="one-off: switch the database to incremental auto-vacuum with a full VACUUM "
+                             "(rewrites the file and blocks writers while it runs)")
+    args = parser.parse_args()
+    run_maintenance(args.db, args.full_days, max(args.daily_days, args.full_days), args.dry_run,
+                    args.convert_auto_vacuum)
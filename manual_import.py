@@ -0,0 +1,184 @@
+import io
+import re
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import initialization
+from records import PriceRecord
+
+# =====================
+# BULK MANUAL IMPORT
+# =====================
+# Dealer price sheets (CSV/XLSX) are validated column-wise with pandas string
+# and numeric operations, compared against the last stored price of each
+# variant, and committed as one manual snapshot through store_prices.
+REQUIRED_COLUMNS = ["brand", "model", "variant", "price"]
+
+# Header spellings seen in dealer sheets -> our column names
+COLUMN_ALIASES = {
+    "make": "brand", "manufacturer": "brand",
+    "model name": "model",
+    "variant name": "variant", "trim": "variant", "version": "variant",
+    "fuel type": "fuel",
+    "gearbox": "transmission", "trans": "transmission", "transmission type": "transmission",
+    "location": "city",
+    "ex-showroom": "price", "ex showroom": "price", "ex-showroom price": "price", "price (₹)": "price",
+    "price (₹ lakhs)": "price_lakhs", "price (lakhs)": "price_lakhs", "price lakhs": "price_lakhs",
+}
+
+FUEL_NAMES = {"petrol": "Petrol", "diesel": "Diesel", "cng": "CNG", "electric": "EV", "ev": "EV",
+              "hybrid": "Hybrid", "strong hybrid": "Hybrid", "strong-hybrid": "Hybrid", "lpg": "LPG"}
+TRANSMISSION_NAMES = {"manual": "Manual", "automatic": "Automatic", "mt": "MT", "at": "AT", "amt": "AMT",
+                      "cvt": "CVT", "e-cvt": "e-CVT", "ecvt": "e-CVT", "dct": "DCT", "dca": "DCA",
+                      "ivt": "IVT", "imt": "iMT", "tc": "AT"}
+LAKH = 100000
+CRORE = 100 * LAKH
+LAKH_THRESHOLD = 1000  # a plain "price" below this is probably lakhs (8.49), but that is not assumed
+PRICE_RANGE = (LAKH, 50 * CRORE)  # rupees; anything outside means the units were misread
+
+# Currency markers around the number: "₹", "Rs", "Rs.", "INR", and the "/-" some sheets end amounts with
+CURRENCY_TOKENS = r"₹|\brs\.?|\binr\b|/-"
+# One number (Indian or western digit grouping) with an optional unit, nothing else
+PRICE_PATTERN = r"^(\d+(?:,\d+)*(?:\.\d+)?)(lakhs?|lacs?|l|crores?|cr)?$"
+
+KEY = ["city", "brand", "model", "fuel", "transmission", "variant"]
+
+STATUS_NEW = "new"
+STATUS_CHANGED = "changed"
+STATUS_UNCHANGED = "unchanged"
+STATUS_DUPLICATE = "duplicate in file"
+STATUS_INVALID = "invalid"
+
+
+def read_sheet(name, data):
+    """DataFrame from an uploaded .csv/.xlsx/.xls file, every cell as text."""
+    if name.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(io.BytesIO(data), dtype=str)
+    return pd.read_csv(io.BytesIO(data), dtype=str, skipinitialspace=True)
+
+
+def _clean_text(col):
+    return col.fillna("").astype(str).str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def _parse_price(col, lakhs):
+    """
+    'Rs. 8,49,000' / '₹8.49 lakh' / '1.2 Cr' / '849000' -> (rupees, ambiguous).
+
+    Rupees is NaN when the cell is not exactly one number with an optional
+    unit (ranges, two numbers, stray text). `ambiguous` flags plain numbers
+    below LAKH_THRESHOLD in a rupee column: "8.49" may well mean lakhs, but
+    the sheet has to say so.
+    """
+    text = (_clean_text(col).str.lower()
+            .str.replace(CURRENCY_TOKENS, "", regex=True)
+            .str.replace(r"\s+", "", regex=True))
+    parts = text.str.extract(PRICE_PATTERN)
+    number = pd.to_numeric(parts[0].str.replace(",", "", regex=False), errors="coerce")
+    unit = parts[1].fillna("")
+    scale = np.select(
+        [unit.str.startswith("c"), (unit != "") | lakhs],
+        [CRORE, LAKH],
+        default=1,
+    )
+    ambiguous = (unit == "") & (not lakhs) & (number < LAKH_THRESHOLD)
+    return number * scale, ambiguous
+
+
+def _vocabulary(col, names):
+    key = col.str.lower().str.replace(r"^\d+\s*", "", regex=True)  # "6MT" -> "mt"
+    return key.map(names)
+
+
+def normalize(raw, default_city=initialization.DEFAULT_CITY):
+    """
+    Map a raw sheet to brand/model/variant/fuel/transmission/city/price with an
+    `error` column ("" for valid rows). Fuel and transmission are mapped onto
+    the app's vocabulary; anything outside it is an error rather than a guess.
+    """
+    raw = raw.rename(columns=lambda c: re.sub(r"\s+", " ", str(c)).strip().lower())
+    raw = raw.rename(columns=COLUMN_ALIASES)
+    raw = raw.loc[:, ~raw.columns.duplicated()]
+    if "price" not in raw.columns and "price_lakhs" in raw.columns:
+        raw["price"], lakhs = raw["price_lakhs"], True
+    else:
+        lakhs = False
+    missing = [c for c in REQUIRED_COLUMNS if c not in raw.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    n = len(raw)
+    blank = pd.Series([""] * n, index=raw.index)
+    price, price_ambiguous = _parse_price(raw["price"], lakhs)
+    df = pd.DataFrame({
+        "brand": _clean_text(raw["brand"]),
+        "model": _clean_text(raw["model"]),
+        "variant": _clean_text(raw["variant"]),
+        "fuel": _clean_text(raw.get("fuel", blank)),
+        "transmission": _clean_text(raw.get("transmission", blank)),
+        "city": _clean_text(raw.get("city", blank)).replace("", default_city),
+        "price": price,
+    })
+    fuel = _vocabulary(df["fuel"], FUEL_NAMES)
+    trans = _vocabulary(df["transmission"], TRANSMISSION_NAMES)
+
+    errors = [
+        (df["brand"] == "", "brand missing"),
+        (df["model"] == "", "model missing"),
+        (df["variant"] == "", "variant missing"),
+        (df["price"].isna(), "price unreadable"),
+        (price_ambiguous, "price ambiguous (add a unit, e.g. 8.49 L)"),
+        (~price_ambiguous & ((df["price"] < PRICE_RANGE[0]) | (df["price"] > PRICE_RANGE[1])),
+         "price out of range (check units)"),
+        ((df["fuel"] != "") & fuel.isna(), "unknown fuel"),
+        ((df["transmission"] != "") & trans.isna(), "unknown transmission"),
+    ]
+    df["fuel"] = fuel.fillna(df["fuel"])
+    df["transmission"] = trans.fillna(df["transmission"])
+    df["price"] = df["price"].round().astype("Int64")
+    error = blank.copy()
+    for mask, message in errors:
+        error = error.where(~mask, error + np.where(error == "", "", "; ") + message)
+    df["error"] = error
+    return df
+
+
+def _stored_prices(df):
+    """Last stored price per variant key for the brands in `df` (from the search index)."""
+    brands = sorted(df["brand"].unique())
+    conn = sqlite3.connect(initialization.DB_FILE)
+    stored = pd.read_sql_query(
+        "SELECT {}, price AS old_price FROM variant_names WHERE brand IN ({})".format(
+            ", ".join(KEY), ",".join(["?"] * len(brands))),
+        conn, params=brands,
+    )
+    conn.close()
+    return stored
+
+
+def preview(raw, default_city=initialization.DEFAULT_CITY):
+    """Normalized rows with `old_price` and `status` (new / changed / unchanged / duplicate / invalid)."""
+    df = normalize(raw, default_city)
+    valid = df["error"] == ""
+    # A later valid row for the same variant wins; invalid rows never shadow a valid one
+    dup = df[valid].duplicated(KEY, keep="last").reindex(df.index, fill_value=False)
+    df = df.merge(_stored_prices(df[valid]), how="left", on=KEY) if valid.any() else df.assign(old_price=np.nan)
+    df["old_price"] = df["old_price"].astype("Int64")
+    df["status"] = np.select(
+        [~valid, dup, df["old_price"].isna(), (df["old_price"] == df["price"]).fillna(False)],
+        [STATUS_INVALID, STATUS_DUPLICATE, STATUS_NEW, STATUS_UNCHANGED],
+        default=STATUS_CHANGED,
+    )
+    return df
+
+
+def import_rows(df, statuses=(STATUS_NEW, STATUS_CHANGED)):
+    """Store the previewed rows with the given statuses as one manual snapshot; returns the row count."""
+    rows = df[df["status"].isin(statuses)]
+    initialization.store_prices([
+        PriceRecord(r.brand, r.model, r.fuel, r.transmission, r.variant, int(r.price), r.city)
+        for r in rows.itertuples(index=False)
+    ], source="manual")
+    return len(rows)
@@ -0,0 +1,242 @@
+import argparse
+import functools
+import json
+import os
+import re
+import resource
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+import decoding
+import parsers
+import scraping
+from records import PriceRecord
+
+# =====================
+# PARSER BENCHMARKS
+# =====================
+# Time and peak memory of scrape parsers on recorded (or generated) payloads.
+# Every measurement runs in a fresh worker process so one parser's heap does
+# not count against the next. Python heap peaks come from tracemalloc; the RSS
+# growth column also covers C-level allocations (libxml2, orjson) that
+# tracemalloc cannot see. "items" is the number of rows (parsers) or top-level
+# entries (JSON decoders) produced.
+PAYLOAD_DIR = "scrape_payloads"
+
+
+def _read_payloads(folder, prefix):
+    names = sorted(n for n in os.listdir(folder) if n.startswith(prefix))
+    payloads = []
+    for name in names:
+        with open(os.path.join(folder, name), "rb") as f:
+            payloads.append(f.read())
+    return payloads
+
+
+def _measure(fn, payloads, repeat):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for p in payloads:
+            fn(p)
+    elapsed = (time.perf_counter() - t0) / repeat
+
+    tracemalloc.start()
+    items = sum(len(fn(p)) for p in payloads)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024  # KiB on Linux
+    return elapsed, heap_peak, rss_growth, items
+
+
+def run_cases(cases, repeat=3):
+    """`cases`: [(label, fn, payloads)]; fn must be a picklable module-level function."""
+    results = []
+    for label, fn, payloads in cases:
+        with ProcessPoolExecutor(max_workers=1) as ex:
+            elapsed, heap_peak, rss_growth, items = ex.submit(_measure, fn, payloads, repeat).result()
+        nbytes = sum(len(p) for p in payloads)
+        results.append((label, elapsed, heap_peak, rss_growth, items))
+        print(f"  {label:<28} {elapsed * 1000:9.1f} ms  {nbytes / elapsed / 1e6:7.1f} MB/s  "
+              f"heap peak {heap_peak / 1e6:7.2f} MB  rss +{rss_growth / 1e6:7.2f} MB  {items} items")
+    return results
+
+
+# =====================
+# TOYOTA XML
+# =====================
+def soup_toyota_prices(payload, model_name="bench"):
+    """The previous BeautifulSoup implementation of parsers.parse_toyota_prices, kept as the baseline."""
+    soup = BeautifulSoup(payload, "xml")
+    rows = []
+    for p in soup.find_all("Price"):
+        grade = p.find("PriceGrade")
+        if grade:
+            variant_tag = grade.find("Name", recursive=False)
+            variant = variant_tag.text.strip() if variant_tag else ""
+            variant = re.sub(r"\b2WD \b", "", variant)
+            variant = re.sub(r"\[.*?]", "", variant)
+            fuel_tag = grade.find("FuelType", recursive=False)
+            fuel = fuel_tag.text.strip() if fuel_tag else ""
+            trans_tag = grade.find("Details", recursive=False)
+            trans = trans_tag.text.strip() if trans_tag else ""
+        else:
+            variant, fuel, trans = "", "", ""
+        amount_tag = p.find("Amount")
+        amount = int(amount_tag.text.strip()) if amount_tag and amount_tag.text.strip().isdigit() else None
+        rows.append(PriceRecord(
+            brand="Toyota",
+            model=model_name,
+            fuel=parsers.normalize_toyota_fuel(fuel),
+            transmission=trans,
+            variant=variant,
+            price=amount,
+            city=scraping.DEFAULT_CITY,
+        ))
+    return rows
+
+
+def iterparse_toyota_prices(payload, model_name="bench"):
+    return parsers.parse_toyota_prices(payload, model_name, scraping.DEFAULT_CITY)
+
+
+def record_toyota(folder=PAYLOAD_DIR, dealer_id=scraping.CITY_CODES[scraping.DEFAULT_CITY]["Toyota"]):
+    """Save the live model list and every model's price XML for offline benchmarking."""
+    os.makedirs(folder, exist_ok=True)
+    url = f"{scraping.TOYOTA_BASE_URL}/models"
+    resp = scraping._request("POST", url, "Toyota", "models", client=scraping.requests,
+                             headers=scraping.TOYOTA_HEADERS, data="")
+    with open(os.path.join(folder, "toyota_models.xml"), "wb") as f:
+        f.write(resp.content)
+    for m in parsers.parse_toyota_models(resp.content):
+        url = f"{scraping.TOYOTA_BASE_URL}/list/{dealer_id}/{m['id']}"
+        resp = scraping._request("POST", url, "Toyota", m["name"], client=scraping.requests,
+                                 headers=scraping.TOYOTA_HEADERS, data="")
+        with open(os.path.join(folder, f"toyota_prices_{m['id']}.xml"), "wb") as f:
+            f.write(resp.content)
+
+
+def generate_toyota(folder=PAYLOAD_DIR, n_models=20, n_grades=80):
+    """Synthetic price lists shaped like the Toyota API's (namespaced, nested grade and colour details)."""
+    os.makedirs(folder, exist_ok=True)
+    fuels, trans = ["P", "D", "H", "C"], ["MT", "AT", "CVT"]
+    for m in range(n_models):
+        prices = []
+        for g in range(n_grades):
+            colours = "".join(
+                f"<Colour><Name>Colour {c}</Name><Code>C{c:03d}</Code><Details>Metallic</Details></Colour>"
+                for c in range(6)
+            )
+            prices.append(
+                f"<Price><Id>{m * 1000 + g}</Id>"
+                f"<PriceGrade><Id>{g}</Id><Name>Grade {g} 2WD [{trans[g % 3]}]</Name>"
+                f"<FuelType>{fuels[g % 4]}</FuelType><Details>{trans[g % 3]}</Details>"
+                f"<Colours>{colours}</Colours></PriceGrade>"
+                f"<Amount>{900000 + (m * 7919 + g * 104729) % 4000000}</Amount><Currency>INR</Currency></Price>"
+            )
+        xml = ('<?xml version="1.0" encoding="utf-8"?>'
+               '<ArrayOfPrice xmlns:i="http://www.w3.org/2001/XMLSchema-instance" '
+               'xmlns="http://schemas.datacontract.org/2004/07/Toyota.Api">' + "".join(prices) + "</ArrayOfPrice>")
+        with open(os.path.join(folder, f"toyota_prices_{m:03d}.xml"), "w", encoding="utf-8") as f:
+            f.write(xml)
+
+
+def bench_toyota(folder=PAYLOAD_DIR, repeat=3):
+    payloads = _read_payloads(folder, "toyota_prices_")
+    if iterparse_toyota_prices(payloads[0]) != soup_toyota_prices(payloads[0]):
+        print("  [WARN] parsers disagree on the first payload")
+    print(f"Toyota: {len(payloads)} payloads, {sum(map(len, payloads)) / 1e6:.2f} MB")
+    return run_cases([
+        ("BeautifulSoup (xml)", soup_toyota_prices, payloads),
+        ("lxml iterparse", iterparse_toyota_prices, payloads),
+    ], repeat)
+
+
+# =====================
+# JSON DECODING (per brand schema)
+# =====================
+# Payloads are the files SCRAPE_RECORD_DIR=<folder> writes during a normal
+# scrape ("<schema>_<n>.json"), or the synthetic ones from generate_json.
+def _mg_delhi(payload):
+    return decoding.decode_mg(payload, {scraping.DEFAULT_CITY})
+
+
+def generate_json(folder=PAYLOAD_DIR, n_states=30, n_cities=12):
+    """Synthetic MG all-state pricing blob and Maruti Arena catalog, padded with fields the scrapers ignore."""
+    os.makedirs(folder, exist_ok=True)
+    states = ["Delhi"] + [f"State {i}" for i in range(1, n_states)]
+    mg = [{
+        "modelLine": f"Model {m}", "model_code": f"M{m}", "image": "x" * 200, "features": [f"f{i}" for i in range(40)],
+        "variants": [{
+            "model_text1": f"MG Model {m} Variant {v} Petrol MT", "fuel_type": "02", "vehicle_type": "MANL",
+            "colours": [{"name": f"c{c}", "hex": "#ffffff", "image": "y" * 120} for c in range(8)],
+            "pricing": [{
+                "State": s, "state_code": s[:3].upper(),
+                "cities": [{"City": "Delhi" if s == "Delhi" and c == 0 else f"City {c}",
+                            "price": f"{1000000 + m * 10000 + v * 1000 + c}", "insurance": "55000", "rto": "120000"}
+                           for c in range(n_cities)],
+            } for s in states],
+        } for v in range(12)],
+    } for m in range(6)]
+    with open(os.path.join(folder, "mg_variants_0000.json"), "w") as f:
+        json.dump(mg, f)
+
+    catalog = {"data": {"carVariantList": {"items": [{
+        "variantCd": f"V{i:04d}", "variantName": f"Model {i % 10} VXI {i}", "fuelType": "Petrol",
+        "transmission": "MT", "modelCd": f"M{i % 10}", "features": {f"k{k}": "value " * 5 for k in range(30)},
+        "images": [{"url": "https://example.com/" + "z" * 80, "alt": "car"} for _ in range(6)],
+    } for i in range(600)]}}}
+    with open(os.path.join(folder, "maruti_variants_0000.json"), "w") as f:
+        json.dump(catalog, f)
+
+
+def bench_json(folder=PAYLOAD_DIR, repeat=3):
+    by_schema = {}
+    for name in sorted(os.listdir(folder)):
+        schema, ext = name.rsplit("_", 1)[0], os.path.splitext(name)[1]
+        if ext == ".json":
+            by_schema.setdefault(schema, []).extend(_read_payloads(folder, name))
+    results = {}
+    for schema, payloads in sorted(by_schema.items()):
+        print(f"{schema}: {len(payloads)} payloads, {sum(map(len, payloads)) / 1e6:.2f} MB")
+        cases = [("json (stdlib)", json.loads, payloads)]
+        if decoding.orjson is not None:
+            cases.append(("orjson", decoding.orjson.loads, payloads))
+        if schema in decoding.SCHEMAS:
+            cases.append(("msgspec schema", functools.partial(decoding.decode, schema=schema), payloads))
+        if schema == "mg_variants":
+            cases.append(("msgspec schema + Delhi only", _mg_delhi, payloads))
+        results[schema] = run_cases(cases, repeat)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scrape payload parsers")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_record = sub.add_parser("record", help="save live Toyota payloads")
+    p_record.add_argument("--folder", default=PAYLOAD_DIR)
+    p_gen = sub.add_parser("generate", help="write synthetic Toyota payloads")
+    p_gen.add_argument("--folder", default=PAYLOAD_DIR)
+    p_gen.add_argument("--models", type=int, default=20)
+    p_bench = sub.add_parser("toyota", help="BeautifulSoup vs iterparse on saved payloads")
+    p_bench.add_argument("--folder", default=PAYLOAD_DIR)
+    p_bench.add_argument("--repeat", type=int, default=3)
+    p_json = sub.add_parser("json", help="decode time and memory per brand schema on saved JSON payloads")
+    p_json.add_argument("--folder", default=PAYLOAD_DIR)
+    p_json.add_argument("--repeat", type=int, default=3)
+    p_json.add_argument("--generate", action="store_true", help="write synthetic MG/Maruti payloads first")
+    args = parser.parse_args()
+
+    if args.cmd == "record":
+        record_toyota(args.folder)
+    elif args.cmd == "generate":
+        generate_toyota(args.folder, args.models)
+    elif args.cmd == "json":
+        if args.generate:
+            generate_json(args.folder)
+        bench_json(args.folder, args.repeat)
+    else:
+        bench_toyota(args.folder, args.repeat)
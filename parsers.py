@@ -0,0 +1,293 @@
+import io
+import re
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+import decoding
+from records import PriceRecord
+
+# =====================
+# PAYLOAD PARSERS
+# =====================
+# CPU-heavy parsing of raw brand responses (HTML/XML) into PriceRecords. These
+# functions run in the scraper's parse processes, which start by importing
+# this module, so it must stay free of import-time work: no requests, no
+# sessions, no database access. Anything a parser needs beyond the payload
+# (model name, city) is passed in.
+
+
+def parse_price_rupees(v):
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return int(round(v))
+    s = str(v).strip().replace(",", "").replace(" ", "").replace("₹", "")
+    if not s:
+        return None
+    s = re.sub(r"(?i)Lakhs?|L$", "L", s)
+    try:
+        if s.lower().endswith("l"):
+            return int(float(s[:-1]) * 100000)
+        if s.lower().endswith("cr"):
+            return int(float(s[:-2]) * 10000000)
+        return int(float(s))
+    except:
+        return None
+
+
+# =====================
+# MAHINDRA
+# =====================
+def parse_mahindra(model_name, payload, city):
+    """Variant cards (HTML snippets inside the JSON response) -> rows. Runs in the parse pool."""
+    data = decoding.decode(payload, "mahindra_variants")
+    variant_html_list = data.get("product", {}).get("variantCardHtml", [])
+    rows = []
+
+    for html_snippet in variant_html_list:
+        soup = BeautifulSoup(html_snippet, "html.parser")
+        input_tag = soup.find("input", {"class": "js-radio"})
+        variant_name = (
+            input_tag.attrs.get("data-variantName") or
+            input_tag.attrs.get("data-variantname") or
+            "N/A"
+        )
+        price_tag = soup.find("span", {"class": "approx-price"})
+        price_text = price_tag.text.strip() if price_tag else "N/A"
+        price_int = parse_price_rupees(price_text)
+        fuel = ""
+        transmission = ""
+
+        # Detect fuel
+        if re.search(r"\bD\b", variant_name, flags=re.IGNORECASE):
+            fuel = "Diesel"
+        elif re.search(r"\bP\b", variant_name, flags=re.IGNORECASE):
+            fuel = "Petrol"
+
+        if re.search(r"\bDiesel\b", variant_name, flags=re.IGNORECASE) or re.search(r"\bD\b", variant_name):
+            fuel = "Diesel"
+        elif re.search(r"\bPetrol\b", variant_name, flags=re.IGNORECASE) or re.search(r"\bP\b", variant_name):
+            fuel = "Petrol"
+
+        # Detect transmission
+        if re.search(r"\bAT\b", variant_name, flags=re.IGNORECASE):
+            transmission = "Automatic"
+        elif re.search(r"\bMT\b", variant_name, flags=re.IGNORECASE):
+            transmission = "Manual"
+
+        variant_name = re.sub(r'\b(Petrol|Diesel|CNG|EV|Hybrid)\b', '', variant_name, flags=re.I)
+        variant_name = variant_name.strip()
+        rows.append(PriceRecord(
+            brand="Mahindra",
+            model=model_name,
+            fuel=fuel,
+            transmission=transmission,
+            variant=variant_name,
+            price=price_int,
+            city=city,
+        ))
+    return rows
+
+
+# =====================
+# TOYOTA
+# =====================
+def normalize_toyota_fuel(fuel: str) -> str:
+    if not fuel:
+        return "NA"
+    fuel = fuel.upper().strip()
+    if fuel == "C":
+        return "CNG"
+    if fuel == "P":
+        return "Petrol"
+    if fuel == "D":
+        return "Diesel"
+    if fuel == "H":
+        return "Hybrid"
+    if fuel in ["E", "EV"]:
+        return "EV"
+    return fuel.title()
+
+
+# ----------------------------
+# Streaming XML helpers: one pass with lxml iterparse, each record element is
+# read and then freed, so memory stays flat however long the list is. Tags are
+# matched on local name, as the API may wrap them in a default namespace.
+# ----------------------------
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _xml_child(el, name, direct=False):
+    for child in (el if direct else el.iterdescendants()):
+        if _local_name(child.tag) == name:
+            return child
+    return None
+
+
+def _xml_text(el):
+    return "".join(el.itertext()).strip() if el is not None else ""
+
+
+def _iter_xml_records(payload, name):
+    """Yield every <name> element of `payload` (bytes), clearing each once the caller is done with it."""
+    if not payload or not payload.strip():
+        return
+    for _, el in etree.iterparse(io.BytesIO(payload), events=("end",), tag=f"{{*}}{name}", recover=True):
+        yield el
+        el.clear(keep_tail=True)
+        while el.getprevious() is not None:
+            del el.getparent()[0]
+
+
+def parse_toyota_models(payload):
+    return [
+        {"id": _xml_text(_xml_child(m, "Id")), "name": _xml_text(_xml_child(m, "Name"))}
+        for m in _iter_xml_records(payload, "PriceModel")
+    ]
+
+
+def parse_toyota_prices(payload, model_name, city):
+    rows = []
+    for p in _iter_xml_records(payload, "Price"):
+        grade = _xml_child(p, "PriceGrade")
+
+        if grade is not None:
+            # get the *variant name* only from direct children of <PriceGrade>
+            variant = _xml_text(_xml_child(grade, "Name", direct=True))
+            variant = re.sub(r"\b2WD \b", "", variant)
+            variant=re.sub(r"\[.*?]", "", variant)
+
+            fuel = _xml_text(_xml_child(grade, "FuelType", direct=True))
+            trans = _xml_text(_xml_child(grade, "Details", direct=True))
+        else:
+            variant, fuel, trans = "", "", ""
+
+        amount_text = _xml_text(_xml_child(p, "Amount"))
+        amount = int(amount_text) if amount_text.isdigit() else None
+
+        rows.append(PriceRecord(
+            brand="Toyota",
+            model=model_name,
+            fuel=normalize_toyota_fuel(fuel),
+            transmission=trans,
+            variant=variant,
+            price=amount,
+            city=city,
+        ))
+    return rows
+
+
+# =====================
+# NISSAN
+# =====================
+# ----------------------------
+# Helper: find model name for a table
+# ----------------------------
+def find_nissan_name_for_table(table):
+    # 1) Prefer <h2 class="heading"> near the table
+    prev = table.find_previous('h2', class_='heading')
+    if prev and prev.get_text(strip=True):
+        model = prev.get_text(" ", strip=True)
+    else:
+        # 2) Scan previous tags for the first one that mentions "Nissan"
+        model = None
+        for tag in table.find_all_previous():
+            if tag.name in ('h2', 'h3', 'span', 'p', 'div') and tag.get_text(strip=True):
+                text = tag.get_text(" ", strip=True)
+                if re.search(r'\bNissan\b', text, re.I):
+                    model = text
+                    break
+        # 3) fallback to nearest heading-like tag
+        if not model:
+            prev = table.find_previous(['h2', 'h3', 'p', 'strong'])
+            model = prev.get_text(" ", strip=True) if prev and prev.get_text(strip=True) else "Unknown Model"
+
+    # Normalize: remove leading "New " and "Nissan " from model name
+    model = re.sub(r'^(New\s+)?Nissan\s+', '', model, flags=re.I).strip()
+    return model if model else "Unknown Model"
+
+
+def nissan_models_from_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+
+    models = {}
+    for table in soup.find_all("table"):
+        model_name = find_nissan_name_for_table(table)
+        models.setdefault(model_name, []).append(table)
+    return models
+
+
+# ----------------------------
+# Parse fuel & transmission from variant string
+# ----------------------------
+def parse_fuel_trans(variant):
+    fuel, trans = "", ""
+    v = variant.upper()
+    if re.search(r'\bCVT\b|\bAT\b|AUTOMATIC', v):
+        trans = "Automatic"
+    elif re.search(r'\bMT\b|\bMANUAL', v):
+        trans = "Manual"
+    elif re.search(r'\bEZ-SHIFT', v):
+        trans = "AMT"
+
+    if re.search(r'DIESEL', v):
+        fuel = "Diesel"
+    elif re.search(r'PETROL', v):
+        fuel = "Petrol"
+    return fuel, trans
+
+
+# ----------------------------
+# Clean variant name: remove "Nissan", "New Nissan", and transmission tokens
+# ----------------------------
+def clean_variant_name(variant, model_name):
+    if model_name:
+        variant = re.sub(re.escape(model_name), '', variant, flags=re.I)
+    variant = re.sub(r'^(New\s+)?Nissan\s+', '', variant, flags=re.I)
+    variant = re.sub(r'\b(MT|CVT|AT|Manual|Automatic|EZ-SHIFT|X-TRONIC)\b', '', variant, flags=re.I)
+    variant = re.sub(r'\s{2,}', ' ', variant).strip()
+    variant = variant.strip(" -–—:;()[]")
+
+    return variant
+
+
+# ----------------------------
+# Rows for one model (accepts list of tables for that model)
+# ----------------------------
+def _nissan_prices(model_name, tables, city):
+    rows = []
+    for table in tables:
+        for row in table.find_all("tr")[1:]:  # skip header row
+            cols = [c.get_text(strip=True).replace("\xa0", " ") for c in row.find_all("td")]
+            if len(cols) == 2:
+                variant_raw, price_raw = cols
+                # parse price
+                clean_price = price_raw.replace(",", "").replace("₹", "").strip()
+                try:
+                    clean_price = int(clean_price)
+                except:
+                    clean_price = None
+
+                fuel, trans = parse_fuel_trans(variant_raw)
+                variant = clean_variant_name(variant_raw,model_name)
+
+                rows.append(PriceRecord(
+                    brand="Nissan",
+                    model=model_name,          # normalized model (no 'Nissan' prefix)
+                    fuel="Petrol",
+                    transmission=trans,
+                    variant=variant,
+                    price=clean_price,
+                    city=city,
+                ))
+    return rows
+
+
+def parse_nissan(html, city):
+    """Whole price-list page -> rows for every model. Runs in the parse pool."""
+    rows = []
+    for model_name, tables in nissan_models_from_html(html).items():
+        rows.extend(_nissan_prices(model_name, tables, city))
+    return rows
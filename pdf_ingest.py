@@ -0,0 +1,316 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+import initialization
+import records
+from records import PriceRecord
+
+# =====================
+# PDF PRICE-LIST INGESTION
+# =====================
+PDF_TEXT_CACHE_DIR = ".pdf_text_cache"
+PAGES_PER_TASK = 8
+PDF_SOURCE = "pdf"
+BRAND_ACRONYMS = {"MG", "BMW", "BYD"}  # other brands are written title-case, like the scrapers do
+
+_PRICE_RE = re.compile(
+    r"(?:₹|rs\.?|inr)?\s*(\d{1,2},\d{2},\d{3}|\d{1,3}(?:,\d{3}){1,2}|\d{5,8}|\d{1,3}(?:\.\d{1,2})?\s*(?:lakhs?|lacs?|l)\b)",
+    re.IGNORECASE,
+)
+_FUEL_RE = re.compile(r"\b(petrol|diesel|cng|electric|ev|hybrid|strong[- ]hybrid)\b", re.IGNORECASE)
+_TRANS_RE = re.compile(r"\b(\d?\s?(?:AMT|MT|AT|CVT|e-CVT|DCT|DCA|IVT|iMT)|manual|automatic)\b", re.IGNORECASE)
+_FUEL_NAMES = {"petrol": "Petrol", "diesel": "Diesel", "cng": "CNG", "electric": "EV", "ev": "EV",
+               "hybrid": "Hybrid", "strong-hybrid": "Hybrid", "strong hybrid": "Hybrid"}
+
+
+# =====================
+# TEXT EXTRACTION
+# =====================
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _extract_page_range(path, start, end):
+    """Worker: text of pages [start, end) of one PDF."""
+    reader = PdfReader(path)
+    return [(reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def _load_cached(digest, cache_dir):
+    try:
+        with open(_cache_path(digest, cache_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached(digest, pages, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = _cache_path(digest, cache_dir) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(pages, f)
+    os.replace(tmp_path, _cache_path(digest, cache_dir))
+
+
+def extract_pages_many(paths, workers=None, cache_dir=PDF_TEXT_CACHE_DIR, use_cache=True):
+    """
+    Page texts for several PDFs, keyed by path.
+
+    Files whose content hash is already cached are read from disk; the rest are
+    split into page ranges and extracted in one shared process pool.
+    """
+    results, pending = {}, {}
+    for path in paths:
+        digest = file_hash(path)
+        cached = _load_cached(digest, cache_dir) if use_cache else None
+        if cached is not None:
+            results[path] = cached
+        else:
+            pending[path] = digest
+    if not pending:
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        jobs = {}
+        for path in pending:
+            n_pages = len(PdfReader(path).pages)
+            jobs[path] = [
+                ex.submit(_extract_page_range, path, start, min(start + PAGES_PER_TASK, n_pages))
+                for start in range(0, n_pages, PAGES_PER_TASK)
+            ]
+        for path, futures in jobs.items():
+            pages = [text for f in futures for text in f.result()]
+            results[path] = pages
+            if use_cache:
+                _store_cached(pending[path], pages, cache_dir)
+    return results
+
+
+def extract_text_from_pdf(file_path):
+    pages = extract_pages_many([file_path])[file_path]
+    return "\n".join(pages) + "\n"
+
+
+# =====================
+# PRICE TABLE PARSER
+# =====================
+def _price_to_rupees(token):
+    t = token.lower().replace(",", "").replace(" ", "")
+    m = re.match(r"([\d.]+)(lakhs?|lacs?|l)?$", t)
+    if not m:
+        return None
+    value = float(m.group(1))
+    if m.group(2):
+        return int(round(value * 100000))
+    return int(value) if value >= 100000 else None  # ignore small numbers (kW, seats, years)
+
+
+def _normalize_trans(token):
+    t = token.replace(" ", "").upper()
+    if t in ("MANUAL",) or t.endswith("MT") and not t.endswith("AMT"):
+        return "Manual"
+    if t == "AMT" or t.endswith("AMT"):
+        return "AMT"
+    return "Automatic"
+
+
+def parse_price_lines(text, brand, model=None, known_models=()):
+    """
+    Parse OEM price-list text into scraper-style rows.
+
+    A line carrying a rupee amount becomes a variant row. A short line without
+    a price that names a known model (or looks like a heading) switches the
+    current model; fuel/transmission default to the last seen section values.
+    """
+    rows = []
+    current_model, current_fuel = model, ""
+    known = sorted((m for m in known_models if m), key=len, reverse=True)
+
+    for raw in text.splitlines():
+        line = re.sub(r"\s+", " ", raw.replace("\xa0", " ")).strip(" |\t")
+        if not line:
+            continue
+
+        prices = [p for p in (_price_to_rupees(m.group(1)) for m in _PRICE_RE.finditer(line)) if p]
+        named = next((m for m in known if re.search(rf"\b{re.escape(m)}\b", line, re.IGNORECASE)), None)
+
+        if not prices:
+            fuel_only = _FUEL_RE.fullmatch(line)
+            if fuel_only:
+                current_fuel = _FUEL_NAMES.get(fuel_only.group(1).lower(), fuel_only.group(1).title())
+            elif named:
+                current_model = named
+            elif model is None and len(line) <= 30 and not re.search(r"\d{3,}", line) and line[:1].isupper():
+                current_model = line.title() if line.isupper() else line
+            continue
+
+        row_model = named or current_model
+        if not row_model:
+            continue
+        fuel_m = _FUEL_RE.search(line)
+        fuel = _FUEL_NAMES.get(fuel_m.group(1).lower(), fuel_m.group(1).title()) if fuel_m else current_fuel
+        trans_m = _TRANS_RE.search(line)
+        trans = _normalize_trans(trans_m.group(1)) if trans_m else ""
+
+        variant = _PRICE_RE.sub(" ", line)
+        variant = re.sub(re.escape(row_model), " ", variant, flags=re.IGNORECASE)
+        variant = re.sub(rf"\b{re.escape(brand)}\b", " ", variant, flags=re.IGNORECASE)
+        variant = _FUEL_RE.sub(" ", variant)
+        variant = re.sub(r"\b(ex-?showroom|price|rs\.?|inr)\b|₹", " ", variant, flags=re.IGNORECASE)
+        variant = re.sub(r"\s{2,}", " ", variant.replace("|", " ")).strip(" -–:,")
+        if not variant:
+            continue
+
+        rows.append(PriceRecord(
+            brand=brand,
+            model=row_model,
+            fuel=fuel,
+            transmission=trans,
+            variant=variant,
+            price=prices[-1],  # ex-showroom is the last amount on a row
+            city=initialization.DEFAULT_CITY,
+        ))
+    return rows
+
+
+_KNOWN_BRANDS = {name.lower(): name for name in records.BRAND_NAMES}
+
+
+def brand_from_filename(path):
+    """'tata_nexon_pricelist.pdf' -> 'Tata', 'kia_sonet.pdf' -> 'Kia' (spelled as the scraper stores it)"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    first = re.split(r"[_\-\s]+", stem)[0]
+    if first.lower() in _KNOWN_BRANDS:
+        return _KNOWN_BRANDS[first.lower()]
+    return first.upper() if first.upper() in BRAND_ACRONYMS else first.title()
+
+
+def ingest_pdfs(paths, brand=None, known_models=(), workers=None, store=True, cache_dir=PDF_TEXT_CACHE_DIR):
+    """Extract, parse and (optionally) bulk-store price rows from OEM PDFs; returns the parsed rows."""
+    pages = extract_pages_many(paths, workers=workers, cache_dir=cache_dir)
+    rows = list(records.dedupe(
+        r
+        for path in paths
+        for r in parse_price_lines("\n".join(pages[path]), brand or brand_from_filename(path),
+                                   known_models=known_models)
+    ))
+    if store and rows:
+        initialization.store_prices(rows, source=PDF_SOURCE)
+    return rows
+
+
+def pdf_paths(folder):
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder) if name.lower().endswith(".pdf")
+    )
+
+
+# =====================
+# BENCHMARK
+# =====================
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_sample_pdf(path, pages):
+    """Minimal PDF writer (Helvetica text only) for generating benchmark price lists."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(f"({_pdf_escape(l)}) '" for l in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_sample_pdfs(folder, n_files=20, n_pages=30, rows_per_page=45):
+    os.makedirs(folder, exist_ok=True)
+    fuels, trans = ["Petrol", "Diesel", "CNG"], ["MT", "AMT", "AT"]
+    for f in range(n_files):
+        pages = []
+        for p in range(n_pages):
+            lines = [f"Model{f}X{p}"]
+            for r in range(rows_per_page):
+                price = 500000 + (f * 7919 + p * 104729 + r * 1299) % 2000000
+                lakh, rest = divmod(price, 100000)
+                lines.append(f"Trim{r} {fuels[r % 3]} {trans[r % 3]} Rs. {lakh},{rest // 1000:02d},{rest % 1000:03d}")
+            pages.append(lines)
+        write_sample_pdf(os.path.join(folder, f"bench_{f:03d}.pdf"), pages)
+
+
+def benchmark(folder, workers_list=(1, None)):
+    """Pages/second for cold extraction at different pool sizes, then for a fully cached pass."""
+    paths = pdf_paths(folder)
+    n_pages = sum(len(PdfReader(p).pages) for p in paths)
+    cache_dir = os.path.join(folder, ".bench_cache")
+    results = []
+    for workers in workers_list:
+        t0 = time.perf_counter()
+        pages = extract_pages_many(paths, workers=workers, use_cache=False)
+        elapsed = time.perf_counter() - t0
+        rows = sum(len(parse_price_lines("\n".join(p), "Bench")) for p in pages.values())
+        results.append((f"cold, workers={workers or os.cpu_count()}", elapsed, rows))
+
+    extract_pages_many(paths, cache_dir=cache_dir)  # warm the cache
+    t0 = time.perf_counter()
+    extract_pages_many(paths, cache_dir=cache_dir)
+    results.append(("cached", time.perf_counter() - t0, None))
+
+    print(f"{len(paths)} files, {n_pages} pages")
+    for label, elapsed, rows in results:
+        extra = f", {rows} rows parsed" if rows is not None else ""
+        print(f"  {label:<22} {elapsed:7.2f}s  {n_pages / elapsed:9.1f} pages/s{extra}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest OEM price-list PDFs into prices.db")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_ingest = sub.add_parser("ingest", help="parse and store every PDF in a folder")
+    p_ingest.add_argument("folder")
+    p_ingest.add_argument("--brand", help="brand for all files (default: from file name)")
+    p_ingest.add_argument("--workers", type=int)
+    p_ingest.add_argument("--dry-run", action="store_true")
+    p_bench = sub.add_parser("bench", help="throughput benchmark on generated PDFs")
+    p_bench.add_argument("--folder", default="pdf_bench")
+    p_bench.add_argument("--files", type=int, default=20)
+    p_bench.add_argument("--pages", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.cmd == "ingest":
+        initialization.init_db()
+        parsed = ingest_pdfs(pdf_paths(args.folder), brand=args.brand, workers=args.workers, store=not args.dry_run)
+        print(f"Parsed {len(parsed)} rows{'' if args.dry_run else ' and stored them'}.")
+    else:
+        generate_sample_pdfs(args.folder, args.files, args.pages)
+        benchmark(args.folder)
@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import plotly.graph_objects as go
+
+# =====================
+# RERUN PROFILER
+# =====================
+PROFILE_LOG_FILE = "rerun_timings.jsonl"
+PROFILE_LOG_MAX_LINES = 1000  # rolling window kept on disk
+
+_log_lock = threading.Lock()  # sessions are threads of one server process
+_trim_at = {}  # log path -> size in bytes that triggers the next trim
+
+
+class RerunProfiler:
+    """Collects named timing spans for one Streamlit rerun of the dashboard."""
+
+    def __init__(self):
+        self.started_at = datetime.now().isoformat()
+        self._t0 = time.perf_counter()
+        self.spans = []  # list of (name, start_offset_s, duration_s)
+        self.flushed = False
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start - self._t0, time.perf_counter() - start))
+
+    def total(self):
+        if not self.spans:
+            return 0.0
+        return max(start + dur for _, start, dur in self.spans)
+
+    def to_record(self):
+        return {
+            "timestamp": self.started_at,
+            "total_ms": round(self.total() * 1000, 2),
+            "spans": [
+                {"name": n, "start_ms": round(s * 1000, 2), "duration_ms": round(d * 1000, 2)}
+                for n, s, d in self.spans
+            ],
+        }
+
+
+def append_log(record, path=PROFILE_LOG_FILE, max_lines=PROFILE_LOG_MAX_LINES):
+    """
+    Append one rerun record to the JSON-lines log.
+
+    Each record is a single appended line, so concurrent sessions never rewrite
+    each other's records. The file is cut back to the last `max_lines` only
+    once it has doubled in size since the previous trim.
+    """
+    line = json.dumps(record) + "\n"
+    with _log_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+        if os.path.getsize(path) > _trim_at.get(path, 0):
+            _trim_log(path, max_lines)
+
+
+def _trim_log(path, max_lines):
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    if len(lines) > max_lines:
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(os.path.abspath(path)),
+                                         prefix=os.path.basename(path), suffix=".tmp", delete=False) as f:
+            f.writelines(lines[-max_lines:])
+        os.replace(f.name, path)
+    _trim_at[path] = 2 * max(os.path.getsize(path), 4096)
+
+
+def read_log(path=PROFILE_LOG_FILE, limit=50):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()[-limit:]
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def start_rerun(session_state, log_path=PROFILE_LOG_FILE):
+    """
+    Start profiling the current rerun.
+
+    The script can end early via st.stop(), so the previous rerun's profiler is
+    only complete once the next rerun begins: flush it to the log here and keep
+    it around for the sidebar panel.
+    """
+    previous = session_state.get("_rerun_profiler")
+    if previous is not None and previous.spans and not previous.flushed:
+        try:
+            append_log(previous.to_record(), log_path)
+        except OSError as e:
+            print(f"[WARN] Could not write rerun timings: {e}")
+        previous.flushed = True
+    session_state["_last_rerun_profiler"] = previous
+    prof = RerunProfiler()
+    session_state["_rerun_profiler"] = prof
+    return prof
+
+
+def waterfall_figure(prof, plot_bgcolor="#181818", font_color="white"):
+    names = [n for n, _, _ in prof.spans]
+    fig = go.Figure(go.Bar(
+        y=names,
+        x=[d * 1000 for _, _, d in prof.spans],
+        base=[s * 1000 for _, s, _ in prof.spans],
+        orientation="h",
+        marker=dict(color="#66b3ff"),
+        hovertemplate="<b>%{y}</b><br>%{x:.1f} ms<extra></extra>",
+    ))
+    fig.update_layout(
+        height=max(180, 26 * len(names)),
+        margin=dict(l=0, r=0, t=10, b=0),
+        xaxis=dict(title="ms since rerun start"),
+        yaxis=dict(autorange="reversed"),
+        plot_bgcolor=plot_bgcolor,
+        paper_bgcolor=plot_bgcolor,
+        font=dict(color=font_color),
+        showlegend=False,
+    )
+    return fig
+
+
+def render_sidebar_panel(st, session_state, plot_bgcolor, font_color, log_path=PROFILE_LOG_FILE):
+    """Sidebar debug panel: waterfall of the last completed rerun plus recent totals."""
+    with st.sidebar.expander("⏱ Rerun Profiler", expanded=True):
+        last = session_state.get("_last_rerun_profiler")
+        if last is None or not last.spans:
+            st.caption("Interact with the dashboard once to see timings of the previous rerun.")
+        else:
+            st.caption(f"Previous rerun: {last.total() * 1000:.0f} ms")
+            st.plotly_chart(waterfall_figure(last, plot_bgcolor, font_color), use_container_width=True)
+
+        history = read_log(log_path)
+        if history:
+            st.caption(f"Last {len(history)} reruns (total ms)")
+            st.line_chart([r["total_ms"] for r in history], height=120)
@@ -0,0 +1,311 @@
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pandas as pd
+import plotly.express as px
+
+import initialization
+
+# =====================
+# LOCAL QUERY ROUTER
+# =====================
+# Structured questions ("cheapest diesel automatic under 10 lakh", "price gap
+# between X and Y", "which models changed price this week") are answered with
+# pandas over df_filtered / price history; anything else falls back to the LLM.
+
+RouterResult = namedtuple("RouterResult", ["intent", "answer", "table", "fig"])
+
+VARIANT_KEY = ["brand", "model", "fuel", "transmission", "variant"]
+DEFAULT_TOP_N = 5
+
+# question word -> regex over the lower-cased fuel column
+_FUEL_WORDS = {
+    "petrol": "petrol", "diesel": "diesel", "cng": "cng",
+    "ev": r"\bev\b|electric", "electric": r"\bev\b|electric", "hybrid": "hybrid",
+}
+_AUTO_RE = re.compile(r"AUTO|AMT|CVT|DCT|DCA|IVT|E-?CVT|\bAT\b|^\d?AT$")
+_MANUAL_RE = re.compile(r"MANUAL|\bI?MT\b|^\d?MT$|IMT")
+# Questions about averages or counts mention "highest"/"cheapest" as a ranking, not as the answer
+_AVERAGE_RE = re.compile(r"\b(average|avg|mean)\b")
+_COUNT_RE = re.compile(r"\bhow many\b|\bnumber of\b|\bcount\b")
+_NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+                 "eight": 8, "nine": 9, "ten": 10}
+
+
+def transmission_kind(series):
+    """Map free-form brand transmission strings (MT, AMT, 6AT, Automatic, ...) to automatic/manual."""
+    upper = series.astype(str).str.upper()
+    kind = pd.Series("", index=series.index)
+    kind[upper.str.contains(_MANUAL_RE)] = "manual"
+    kind[upper.str.contains(_AUTO_RE)] = "automatic"
+    return kind
+
+
+def _to_lakhs(value, unit):
+    value = float(value)
+    unit = (unit or "").lower()
+    if unit.startswith("cr"):
+        return value * 100
+    if unit.startswith(("k", "thousand")):
+        return value / 100
+    if value > 1000:  # plain rupees
+        return value / 100000
+    return value
+
+
+_AMOUNT = r"(?:₹|rs\.?\s*)?(\d+(?:\.\d+)?)\s*(lakhs?|lacs?|l\b|cr|crores?|k\b)?"
+
+
+def parse_price_bounds(q):
+    """Return (low, high) in lakhs from phrases like 'under 10 lakh', 'between 8 and 12L'."""
+    m = re.search(r"between\s+" + _AMOUNT + r"\s+(?:and|to|-)\s+" + _AMOUNT, q)
+    if m:
+        unit = m.group(2) or m.group(4)
+        return _to_lakhs(m.group(1), m.group(2) or unit), _to_lakhs(m.group(3), m.group(4) or unit)
+    low = high = None
+    m = re.search(r"(?:under|below|less than|upto|up to|within|<)\s*" + _AMOUNT, q)
+    if m:
+        high = _to_lakhs(m.group(1), m.group(2))
+    m = re.search(r"(?:over|above|more than|greater than|>)\s*" + _AMOUNT, q)
+    if m:
+        low = _to_lakhs(m.group(1), m.group(2))
+    return low, high
+
+
+def _mentioned(q, values):
+    """Values (brands/models) whose lower-cased name appears as a whole word in the question."""
+    hits = []
+    for v in values:
+        name = str(v).lower()
+        if name and re.search(r"(?<![\w-])" + re.escape(name) + r"(?![\w-])", q):
+            hits.append(v)
+    return hits
+
+
+def _apply_filters(q, df):
+    """Narrow df by fuel, transmission, price bounds and any mentioned brands/models."""
+    desc = []
+    fuels = sorted(word for word in _FUEL_WORDS if re.search(rf"\b{word}\b", q))
+    if fuels:
+        pattern = "|".join(_FUEL_WORDS[w] for w in fuels)
+        df = df[df["fuel"].astype(str).str.lower().str.contains(pattern)]
+        desc.append("/".join(fuels))
+
+    if re.search(r"\b(automatic|auto|amt|cvt|dct)\b", q):
+        df = df[transmission_kind(df["transmission"]) == "automatic"]
+        desc.append("automatic")
+    elif re.search(r"\b(manual)\b", q):
+        df = df[transmission_kind(df["transmission"]) == "manual"]
+        desc.append("manual")
+
+    low, high = parse_price_bounds(q)
+    if low is not None:
+        df = df[df["price_lakhs"] >= low]
+        desc.append(f"above ₹{low:g}L")
+    if high is not None:
+        df = df[df["price_lakhs"] <= high]
+        desc.append(f"under ₹{high:g}L")
+
+    brands = _mentioned(q, df["brand"].unique())
+    if brands:
+        df = df[df["brand"].isin(brands)]
+        desc.append(", ".join(map(str, brands)))
+    models = _mentioned(q, df["model"].astype(str).unique())
+    if models:
+        df = df[df["model"].astype(str).isin(models)]
+        desc.append(", ".join(models))
+    return df, desc
+
+
+def _top_n(q):
+    m = re.search(r"\b(?:top|cheapest|costliest|most expensive|first)\s+(\d+|" + "|".join(_NUMBER_WORDS) + r")\b"
+                  r"(?!\s*(?:lakhs?|lacs?|l\b|cr|crores?|k\b))", q)
+    if not m:
+        return DEFAULT_TOP_N if re.search(r"\b(variants|cars|models|options)\b", q) else 1
+    token = m.group(1)
+    return int(token) if token.isdigit() else _NUMBER_WORDS[token]
+
+
+def _table(df):
+    return (
+        df[["brand", "model", "fuel", "transmission", "variant", "price_lakhs"]]
+        .assign(model=lambda d: d["model"].astype(str))
+        .reset_index(drop=True)
+    )
+
+
+def _bar(table, title):
+    table = table.assign(name=table["model"] + " " + table["variant"])
+    return px.bar(table, x="name", y="price_lakhs", color="brand", title=title,
+                  labels={"price_lakhs": "Price (₹ Lakhs)", "name": "Variant"})
+
+
+# =====================
+# INTENTS
+# =====================
+def _intent_extreme(q, df):
+    if _AVERAGE_RE.search(q) or _COUNT_RE.search(q):
+        return None
+    if re.search(r"\b(cheapest|lowest|least expensive|most affordable|minimum price)\b", q):
+        ascending, word = True, "Cheapest"
+    elif re.search(r"\b(costliest|most expensive|priciest|highest|maximum price|top end)\b", q):
+        ascending, word = False, "Most expensive"
+    else:
+        return None
+    subset, desc = _apply_filters(q, df)
+    scope = f" ({'; '.join(desc)})" if desc else ""
+    if subset.empty:
+        return RouterResult("extreme", f"No variants match{scope}.", _table(subset), None)
+    n = _top_n(q)
+    table = _table(subset.sort_values("price_lakhs", ascending=ascending).head(n))
+    lines = [f"- {r.brand} {r.model} {r.variant} ({r.fuel}, {r.transmission}): ₹{r.price_lakhs:.2f} L"
+             for r in table.itertuples(index=False)]
+    answer = f"{word}{scope}:\n" + "\n".join(lines)
+    return RouterResult("extreme", answer, table, _bar(table, f"{word}{scope}"))
+
+
+def _match_variant(text, df):
+    """Best row for a free-text variant reference such as 'Nexon Creative+ AMT'."""
+    tokens = [t for t in re.findall(r"[a-z0-9+().]+", text.lower()) if t not in {"the", "variant"}]
+    if not tokens:
+        return None
+    haystack = (df["model"].astype(str) + " " + df["variant"].astype(str) + " " +
+                df["fuel"].astype(str) + " " + df["transmission"].astype(str)).str.lower()
+    score = pd.Series(0, index=df.index)
+    for t in tokens:
+        score += haystack.str.contains(t, regex=False).astype(int)
+    if score.max() < max(1, (len(tokens) + 1) // 2):
+        return None
+    best = score[score == score.max()].index
+    # Prefer the shortest variant name among ties (most exact match)
+    return df.loc[best].assign(_len=df.loc[best, "variant"].astype(str).str.len()).sort_values("_len").iloc[0]
+
+
+def _intent_gap(q, df):
+    m = re.search(r"(?:difference|gap|diff)\s+(?:in price\s+)?between\s+(.+?)\s+(?:and|vs\.?|versus)\s+(.+)$", q)
+    if not m:
+        m = re.search(r"^(?:compare\s+)?(.+?)\s+(?:vs\.?|versus)\s+(.+?)(?:\s+price)?$", q)
+    if not m:
+        return None
+    a, b = _match_variant(m.group(1), df), _match_variant(m.group(2), df)
+    if a is None or b is None:
+        return None
+    table = _table(pd.DataFrame([a, b]))
+    gap = b["price_lakhs"] - a["price_lakhs"]
+    pct = (gap / a["price_lakhs"] * 100) if a["price_lakhs"] else float("nan")
+    answer = (
+        f"{a['model']} {a['variant']}: ₹{a['price_lakhs']:.2f} L\n\n"
+        f"{b['model']} {b['variant']}: ₹{b['price_lakhs']:.2f} L\n\n"
+        f"Gap: ₹{abs(gap):.2f} L ({abs(pct):.1f}%), "
+        f"{b['model']} {b['variant']} is {'costlier' if gap > 0 else 'cheaper' if gap < 0 else 'the same price'}."
+    )
+    return RouterResult("gap", answer, table, _bar(table, "Price Gap"))
+
+
+def _window_days(q):
+    if re.search(r"\btoday\b", q):
+        return 1
+    if re.search(r"\bthis month\b|\blast month\b", q):
+        return 30
+    m = re.search(r"last\s+(\d+)\s+days?", q)
+    if m:
+        return int(m.group(1))
+    return 7
+
+
+def _intent_changes(q, df, history_loader):
+    if not re.search(r"\b(changed?|changes|increased?|decreased?|hike[ds]?|drop(?:ped)?|revis(?:ed|ion))\b", q):
+        return None
+    if not re.search(r"\bprices?\b|\bcost\b", q):
+        return None
+    days = _window_days(q)
+    since = (datetime.now() - timedelta(days=days)).isoformat()
+    brands = sorted(df["brand"].unique())
+    hist = history_loader(since, brands)
+    models = set(df["model"].astype(str))
+    hist = hist[hist["model"].isin(models)]
+    if "city" in df.columns:
+        hist = hist[hist["city"].isin(set(df["city"]))]
+    if hist.empty:
+        return RouterResult("changes", f"No price history in the last {days} day(s).", hist, None)
+
+    hist = hist.sort_values("timestamp")
+    grouped = hist.groupby(VARIANT_KEY, observed=True)["price"]
+    summary = pd.DataFrame({"old_price": grouped.first(), "new_price": grouped.last()}).reset_index()
+    summary = summary[summary["old_price"] != summary["new_price"]]
+    if re.search(r"\b(increased?|hike[ds]?|up)\b", q):
+        summary = summary[summary["new_price"] > summary["old_price"]]
+    elif re.search(r"\b(decreased?|drop(?:ped)?|cut|down)\b", q):
+        summary = summary[summary["new_price"] < summary["old_price"]]
+    if summary.empty:
+        return RouterResult("changes", f"No price changes in the last {days} day(s).", summary, None)
+
+    summary["change_lakhs"] = ((summary["new_price"] - summary["old_price"]) / 100000).round(2)
+    summary["change_pct"] = ((summary["new_price"] / summary["old_price"] - 1) * 100).round(2)
+    per_model = (
+        summary.groupby(["brand", "model"], observed=True)
+        .agg(variants_changed=("variant", "count"), avg_change_pct=("change_pct", "mean"))
+        .reset_index()
+        .sort_values("variants_changed", ascending=False)
+    )
+    lines = [f"- {r.brand} {r.model}: {r.variants_changed} variant(s), avg {r.avg_change_pct:+.2f}%"
+             for r in per_model.itertuples(index=False)]
+    answer = f"Models with price changes in the last {days} day(s):\n" + "\n".join(lines)
+    fig = px.bar(per_model, x="model", y="avg_change_pct", color="brand",
+                 hover_data=["variants_changed"], title=f"Average Price Change, last {days} day(s)",
+                 labels={"avg_change_pct": "Avg change (%)"})
+    return RouterResult("changes", answer, summary.reset_index(drop=True), fig)
+
+
+def _intent_average(q, df):
+    if not _AVERAGE_RE.search(q):
+        return None
+    subset, desc = _apply_filters(q, df)
+    if subset.empty:
+        return None
+    by = "brand" if re.search(r"\b(?:by|per|each|which|what) brands?\b", q) else "model"
+    # "which brand has the highest average price" lists the highest first
+    highest_first = bool(re.search(r"\b(highest|costliest|most expensive|priciest|maximum)\b", q))
+    table = (
+        subset.assign(model=subset["model"].astype(str))
+        .groupby(by, observed=True)["price_lakhs"].mean().round(2).reset_index()
+        .sort_values("price_lakhs", ascending=not highest_first, ignore_index=True)
+    )
+    scope = f" ({'; '.join(desc)})" if desc else ""
+    lines = [f"- {getattr(r, by)}: ₹{r.price_lakhs:.2f} L" for r in table.itertuples(index=False)]
+    answer = f"Average price by {by}{scope}:\n" + "\n".join(lines)
+    fig = px.bar(table, x=by, y="price_lakhs", title=f"Average Price by {by.title()}{scope}",
+                 labels={"price_lakhs": "Average Price (₹ Lakhs)"})
+    return RouterResult("average", answer, table, fig)
+
+
+def _intent_count(q, df):
+    if not _COUNT_RE.search(q):
+        return None
+    subset, desc = _apply_filters(q, df)
+    scope = f" ({'; '.join(desc)})" if desc else ""
+    table = (
+        subset.assign(model=subset["model"].astype(str))
+        .groupby(["brand", "model"], observed=True).size().reset_index(name="variants")
+    )
+    answer = f"{len(subset)} variant(s) across {len(table)} model(s){scope}."
+    fig = px.bar(table, x="model", y="variants", color="brand", title=f"Variants per Model{scope}") if len(table) else None
+    return RouterResult("count", answer, table, fig)
+
+
+def route(question, df, history_loader=initialization.get_prices_since):
+    """Answer structured questions locally; returns a RouterResult, or None to fall back to the LLM."""
+    q = re.sub(r"\s+", " ", (question or "").lower()).strip().rstrip("?!. ")
+    if not q or df.empty:
+        return None
+    result = _intent_changes(q, df, history_loader)
+    if result is None:
+        result = _intent_extreme(q, df)
+    if result is None:
+        result = _intent_gap(q, df)
+    if result is None:
+        result = _intent_average(q, df)
+    if result is None:
+        result = _intent_count(q, df)
+    return result
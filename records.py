@@ -0,0 +1,69 @@
+import sys
+
+# =====================
+# PRICE RECORDS
+# =====================
+# Scraped rows travel as slotted PriceRecord objects instead of six-key dicts.
+# Brand, model, fuel, transmission and city repeat across thousands of rows
+# and every city, so they are interned: each distinct string is stored once.
+FIELDS = ("brand", "model", "fuel", "transmission", "variant", "price", "city")
+# Brand names as the scrapers store them (scraping.BRAND_PLANNERS); rows from
+# other sources (PDF file names) are mapped onto these so brands do not split
+BRAND_NAMES = ("Maruti", "Tata", "Hyundai", "Mahindra", "Toyota", "Kia", "MG", "Nissan")
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class PriceRecord:
+    __slots__ = FIELDS
+
+    def __init__(self, brand, model, fuel, transmission, variant, price, city):
+        self.brand = _intern(brand)
+        self.model = _intern(model)
+        self.fuel = _intern(fuel)
+        self.transmission = _intern(transmission)
+        self.variant = variant
+        self.price = price
+        self.city = _intern(city)
+
+    def key(self):
+        """Identity used for de-duplication: every field."""
+        return (self.city, self.brand, self.model, self.variant, self.fuel, self.transmission, self.price)
+
+    def __eq__(self, other):
+        return isinstance(other, PriceRecord) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return "PriceRecord(" + ", ".join(f"{f}={getattr(self, f)!r}" for f in FIELDS) + ")"
+
+    def __reduce__(self):
+        # Rebuilt through __init__ so strings are re-interned after crossing a
+        # process boundary (rows returned by the scrape parse pool).
+        return PriceRecord, tuple(getattr(self, f) for f in FIELDS)
+
+
+def as_record(row, default_city):
+    """Accept a PriceRecord or a legacy {"Brand": ..., "Price": ...} dict."""
+    if isinstance(row, PriceRecord):
+        return row
+    return PriceRecord(row["Brand"], row["Model"], row["Fuel"], row["Transmission"], row["Variant"],
+                       row["Price"], row.get("City") or default_city)
+
+
+def dedupe(records, seen=None):
+    """
+    Yield each record the first time its key is seen; streaming and order-preserving.
+
+    Pass the same `seen` set to several calls to de-duplicate across batches.
+    """
+    seen = set() if seen is None else seen
+    for r in records:
+        k = r.key()
+        if k not in seen:
+            seen.add(k)
+            yield r
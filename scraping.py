@@ -1,23 +1,90 @@
 import requests
-from bs4 import BeautifulSoup
 from urllib3.util.retry import Retry
 from requests.adapters import HTTPAdapter
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import pandas as pd
+import json
+import zlib
+import os
+import threading
+import contextvars
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 import asyncio
 import aiohttp
 import itertools
+from collections import Counter, deque, namedtuple
+import time
+import telemetry
+import initialization
+import decoding
+import records
+import parsers
+from records import PriceRecord
 
 def remove_duplicates(prices_list):
-    df = pd.DataFrame(prices_list)
-    df = df.drop_duplicates(subset=["Brand", "Model", "Variant", "Fuel", "Transmission", "Price"])
-    df = df.reset_index(drop=True)
-    return df.to_dict(orient="records")
+    return list(records.dedupe(prices_list))
 
 # =====================
 # CONFIG
 # =====================
+# Location code each brand's API expects, per city: a brand missing from a
+# city's map is not scraped there. Tata and MG codes are built from state and
+# city names; numeric ids (Maruti, Hyundai, Kia, Toyota) have to be looked up
+# on the brand sites and are added through CITY_CODES_FILE, whose entries
+# extend or override these. Mahindra and Nissan publish one national list,
+# recorded under DEFAULT_CITY.
+DEFAULT_CITY = initialization.DEFAULT_CITY
+CITY_CODES = {
+    "Delhi": {
+        "Maruti": "08",
+        "Tata": "India-DL-DELHI",
+        "Hyundai": 1370,
+        "Kia": ("DL", "N10"),       # (stateCode, cityCode)
+        "MG": ("Delhi", "Delhi"),   # (State, City) keys in the pricing blob
+        "Toyota": 704,              # dealer id
+    },
+    "Mumbai": {
+        "Tata": "India-MH-MUMBAI",
+        "MG": ("Maharashtra", "Mumbai"),
+    },
+    "Bengaluru": {
+        "Tata": "India-KA-BENGALURU",
+        "MG": ("Karnataka", "Bengaluru"),
+    },
+    "Chennai": {
+        "Tata": "India-TN-CHENNAI",
+        "MG": ("Tamil Nadu", "Chennai"),
+    },
+}
+CITY_CODES_FILE = os.environ.get("CITY_CODES_FILE", "city_codes.json")  # {"City": {"Brand": code, ...}}
+
+
+def _load_city_codes(path=CITY_CODES_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            extra = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Could not read {path}: {e}")
+        return
+    for city, codes in extra.items():
+        # JSON has no tuples; pair-valued codes arrive as lists
+        CITY_CODES.setdefault(city, {}).update(
+            {brand: tuple(code) if isinstance(code, list) else code for brand, code in codes.items()}
+        )
+
+
+_load_city_codes()
+SCRAPE_CONCURRENCY = 16  # jobs (≈ requests) in flight across all brands and cities
+PARSE_WORKERS = os.cpu_count() or 1
+PARSE_BACKLOG = 4 * PARSE_WORKERS  # raw payloads waiting to be parsed before fetching pauses
+# Parse workers are started from a clean process, never forked from the app:
+# the Streamlit server runs other threads (LLM event loop, image renderer)
+# whose locks a fork would copy mid-use. Workers only import parsers.
+PARSE_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
 
 # =====================
 # SESSION + HELPERS
@@ -28,25 +95,198 @@ adapter = HTTPAdapter(max_retries=retry_strategy)
 session.mount("https://", adapter)
 session.mount("http://", adapter)
 
-def _parse_price_rupees(v):
-    if v is None:
-        return None
-    if isinstance(v, (int, float)):
-        return int(round(v))
-    s = str(v).strip().replace(",", "").replace(" ", "").replace("₹", "")
-    if not s:
-        return None
-    s = re.sub(r"(?i)Lakhs?|L$", "L", s)
+def _request(method, url, brand, model="", client=None, **kwargs):
+    """Issue an HTTP request and record latency, bytes, status and retries in the run's metrics."""
+    client = client or session
+    start = time.perf_counter()
+    resp = None
     try:
-        if s.lower().endswith("l"):
-            return int(float(s[:-1]) * 100000)
-        if s.lower().endswith("cr"):
-            return int(float(s[:-2]) * 10000000)
-        return int(float(s))
-    except:
-        return None
+        resp = client.request(method, url, **kwargs)
+        return resp
+    finally:
+        status, nbytes, retries = None, 0, 0
+        if resp is not None:
+            status = resp.status_code
+            nbytes = len(resp.content)
+            history = getattr(getattr(resp.raw, "retries", None), "history", None)
+            retries = len(history) if history else 0
+        telemetry.current().record_request(brand, model, url, time.perf_counter() - start, status, nbytes, retries)
+
+
+# =====================
+# JOB RUNNER
+# =====================
+# A scrape is a set of jobs `(fn, args)` run on one pool whose size is the
+# global concurrency budget. A job returns rows, or a FollowUp list of further
+# jobs (per-brand planners fetch model/filter metadata once, then fan out into
+# one job per city × model/combo). Adding cities adds jobs, not threads.
+#
+# Fetchers whose parsing is CPU-heavy (HTML/XML) return a ParseTask instead of
+# rows: the raw payload plus a module-level parse function, run on a process
+# pool so parsing is not serialized by the GIL. Parse functions live in
+# parsers.py, which the worker processes import instead of this module.
+#
+# Row counts are recorded as rows are collected, after de-duplication, so the
+# metrics count what the scrape returns (and parse workers, whose metrics would
+# not cross the process boundary, record nothing).
+class FollowUp(list):
+    pass
+
+
+ParseTask = namedtuple("ParseTask", ["brand", "model", "fn", "args"])
+
+
+def brand_cities(brand, cities=None):
+    """[(city, code)] for the requested cities (default: all) that have a `brand` code."""
+    return [
+        (city, CITY_CODES[city][brand])
+        for city in (cities or CITY_CODES)
+        if brand in CITY_CODES.get(city, {})
+    ]
+
+
+class _RunMetadata:
+    """Metadata fetched by one scrape run, shared by that run's jobs only."""
+
+    def __init__(self):
+        self._values = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key, load):
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._values:
+                self._values[key] = load()
+            return self._values[key]
+
+
+# Set by run_jobs; jobs see it through the context they are submitted with
+_run_metadata = contextvars.ContextVar("scrape_metadata")
+
+def shared_metadata(key, load):
+    """Return load() once per scrape run; concurrent callers of the same key wait for the first."""
+    cache = _run_metadata.get(None)
+    return load() if cache is None else cache.get(key, load)
+
+
+def run_jobs(jobs, max_workers=SCRAPE_CONCURRENCY, parse_workers=PARSE_WORKERS, parse_backlog=PARSE_BACKLOG):
+    """
+    Run fetch jobs on `max_workers` threads and their ParseTasks on `parse_workers` processes.
+
+    New fetches are only started while fewer than `parse_backlog` payloads are
+    waiting in the parse stage, so a slow parser holds back the fetchers
+    instead of letting raw responses pile up in memory.
+    """
+    metadata_token = _run_metadata.set(_RunMetadata())
+    try:
+        rows, seen = [], set()
+
+        def collect(new_rows):
+            # repeated rows are dropped as they arrive, not after the whole scrape
+            kept = list(records.dedupe(new_rows, seen))
+            rows.extend(kept)
+            for (brand, model), n in Counter((r.brand, r.model) for r in kept).items():
+                telemetry.current().record_rows(brand, model, n)
+
+        queue = deque(jobs)
+        fetching, parsing = {}, {}
+        with ThreadPoolExecutor(max_workers=max_workers) as io, ProcessPoolExecutor(max_workers=parse_workers, mp_context=PARSE_CONTEXT) as cpu:
+            while queue or fetching or parsing:
+                while queue and len(fetching) < max_workers and len(parsing) < parse_backlog:
+                    fn, args = queue.popleft()
+                    # each job runs in a copy of this context: it sees this run's metrics and metadata
+                    fetching[io.submit(contextvars.copy_context().run, fn, *args)] = fn
+                done, _ = wait([*fetching, *parsing], return_when=FIRST_COMPLETED)
+                for fut in done:
+                    if fut in parsing:
+                        task = parsing.pop(fut)
+                        try:
+                            parsed = fut.result()
+                        except Exception as e:
+                            print(f"❌ Parse failed for {task.brand} {task.model}: {e}")
+                            continue
+                        collect(parsed)
+                        continue
+
+                    fn = fetching.pop(fut)
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        print(f"❌ Scrape job {fn.__name__} failed: {e}")
+                        continue
+                    if isinstance(result, FollowUp):
+                        queue.extend(result)
+                    elif isinstance(result, ParseTask):
+                        parsing[cpu.submit(result.fn, *result.args)] = result
+                    elif result:
+                        collect(result)
+        return rows
+    finally:
+        _run_metadata.reset(metadata_token)
 
 
+# =====================
+# LEARNED REQUEST PLANS
+# =====================
+# Remembers, per request key, how many rows the last successful call returned.
+# Keys that came back empty are skipped on routine runs and re-probed once
+# their last probe is older than `reprobe_days`, stretched by up to 50% per
+# key so re-probes trickle in over several runs. Failed requests are never
+# recorded, so an outage cannot mark a combination as empty.
+class RequestPlan:
+    def __init__(self, path, reprobe_days):
+        self.path = path
+        self.reprobe_days = reprobe_days
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self.stats = Counter()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = Counter()
+
+    def _reprobe_due(self, key, probed, now):
+        stretch = 1 + (zlib.crc32(key.encode()) % 51) / 100
+        return now - probed >= self.reprobe_days * 86400 * stretch
+
+    def should_request(self, key, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["rows"] > 0:
+                self.stats["requested"] += 1
+                return True
+            if self._reprobe_due(key, entry["probed"], now):
+                self.stats["reprobed"] += 1
+                return True
+            self.stats["skipped"] += 1
+            return False
+
+    def count(self, event, n=1):
+        with self._lock:
+            self.stats[event] += n
+
+    def record(self, key, rows, now=None):
+        with self._lock:
+            self._entries[key] = {"rows": rows, "probed": time.time() if now is None else now}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self._entries, indent=0, sort_keys=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
 
 # =====================
 # TATA SCRAPER
@@ -83,8 +323,14 @@ TATA_HEADERS_TEMPLATE = {
 }
 TATA_COOKIES = {"at_check": "true"}
 
+# Most edition × fuel × transmission combinations have no variants; the plan
+# learns which ones and stops asking for them (see RequestPlan).
+TATA_PLAN_FILE = "tata_request_plan.json"
+TATA_REPROBE_DAYS = 7
+TATA_PLAN = RequestPlan(TATA_PLAN_FILE, TATA_REPROBE_DAYS)
+
 session = requests.Session()
-FILTER_CACHE = {}  # cache filters per model
+FILTER_CACHE = {}  # (city code, model name) -> filter options
 
 # =============================
 # Helpers
@@ -111,9 +357,10 @@ def _clean_variant_name(model_name, raw_name):
 # =============================
 # Fetch filter options (cached)
 # =============================
-def _tata_get_filters(model_cfg):
-    if model_cfg["name"] in FILTER_CACHE:
-        return FILTER_CACHE[model_cfg["name"]]
+def _tata_get_filters(model_cfg, city_code=CITY_CODES[DEFAULT_CITY]["Tata"]):
+    cache_key = (city_code, model_cfg["name"])
+    if cache_key in FILTER_CACHE:
+        return FILTER_CACHE[cache_key]
 
     url = f"{model_cfg['baseUrl']}/price.getpricefilteroptions.json"
 
@@ -133,25 +380,26 @@ def _tata_get_filters(model_cfg):
         "vehicleCategory": "TMPC",
         "modelId": model_cfg["modelId"],
         "parentProductId": model_cfg["parentProductId"],
-        "cityId": "India-DL-DELHI"
+        "cityId": city_code
     }
 
     try:
-        resp = session.post(url, headers=headers, cookies=TATA_COOKIES, data=payload, timeout=12)
+        resp = _request("POST", url, "Tata", model_cfg["name"],
+                        headers=headers, cookies=TATA_COOKIES, data=payload, timeout=12)
 
         # If 403, fail gracefully
         if resp.status_code == 403:
             print(f"[WARN] Tata blocked filter fetch for {model_cfg['name']} (403 Forbidden). Skipping model.")
             empty_map = {"fuel_type": {}, "transmission_type": {}, "edition": {}}
-            FILTER_CACHE[model_cfg["name"]] = empty_map
+            FILTER_CACHE[cache_key] = empty_map
             return empty_map
 
         resp.raise_for_status()
-        data = resp.json()
+        data = decoding.decode(resp.content, "tata_filters")
     except Exception as e:
         print(f"[WARN] Tata request failed for {model_cfg['name']}: {e}")
         empty_map = {"fuel_type": {}, "transmission_type": {}, "edition": {}}
-        FILTER_CACHE[model_cfg["name"]] = empty_map
+        FILTER_CACHE[cache_key] = empty_map
         return empty_map
 
     # Extract filters normally
@@ -162,7 +410,7 @@ def _tata_get_filters(model_cfg):
             for item in opt.get("filterOption", []):
                 filter_map[ftype][item["optionId"]] = item["optionLabel"]
 
-    FILTER_CACHE[model_cfg["name"]] = filter_map
+    FILTER_CACHE[cache_key] = filter_map
     return filter_map
 
 
@@ -170,7 +418,8 @@ def _tata_get_filters(model_cfg):
 # =============================
 # Fetch prices for one combo
 # =============================
-def _tata_fetch_one(model_cfg, edition, fuel, trans):
+def _tata_post_prices(model_cfg, editions, fuels, trans, city_code):
+    """One price.getpricefilteredresult call; each filter takes a list of values. Raises on failure."""
     headers = TATA_HEADERS_TEMPLATE.copy()
     headers["referer"] = f"{model_cfg['baseUrl']}/price.html"
     headers["content-type"] = "application/json"
@@ -179,77 +428,187 @@ def _tata_fetch_one(model_cfg, edition, fuel, trans):
         "vehicleCategory": "TMPC",
         "modelId": model_cfg["modelId"],
         "parentProductId": model_cfg["parentProductId"],
-        "cityId": "India-DL-DELHI",
+        "cityId": city_code,
         "filtersSelected": [
-            {"filterType": "fuel_type", "values": [fuel]},
-            {"filterType": "transmission_type", "values": [trans]},
-            {"filterType": "edition", "values": [edition]},
+            {"filterType": "fuel_type", "values": list(fuels)},
+            {"filterType": "transmission_type", "values": list(trans)},
+            {"filterType": "edition", "values": list(editions)},
             {"filterType": "price", "values": TATA_PRICE_RANGE},
         ]
     }
 
-    try:
-        url = f"{model_cfg['baseUrl']}/price.getpricefilteredresult.json"
-        resp = session.post(url, headers=headers, cookies=TATA_COOKIES, json=payload, timeout=12)
-        resp.raise_for_status()
-        data = resp.json()
-    except Exception as e:
-        print(f"Error fetching {model_cfg['name']} {fuel}/{trans}: {e}")
-        return []
+    url = f"{model_cfg['baseUrl']}/price.getpricefilteredresult.json"
+    resp = _request("POST", url, "Tata", model_cfg["name"],
+                    headers=headers, cookies=TATA_COOKIES, json=payload, timeout=12)
+    resp.raise_for_status()
+    data = decoding.decode(resp.content, "tata_prices")
+    return data.get("results", {}).get("variantPriceFeatures", []) or []
 
-    variants = data.get("results", {}).get("variantPriceFeatures", []) or []
+
+def _tata_rows(model_cfg, variants, fuel_label, trans_label, city):
     out = []
     for v in variants:
-        price = _parse_price_rupees(v.get("priceDetails", {}).get("originalPrice"))
+        price = parsers.parse_price_rupees(v.get("priceDetails", {}).get("originalPrice"))
         if not price:
             continue
 
         variant_name = _clean_variant_name(model_cfg["name"], v.get("variantLabel", ""))
 
-        out.append({
-            "Brand": "Tata",
-            "Model": model_cfg["name"],
-            "Fuel": FUEL_MAP.get(fuel, fuel),
-            "Transmission": TRANS_MAP.get(trans, trans),
-            "Variant": variant_name,
-            "Price": price
-        })
+        out.append(PriceRecord(
+            brand="Tata",
+            model=model_cfg["name"],
+            fuel=fuel_label,
+            transmission=trans_label,
+            variant=variant_name,
+            price=price,
+            city=city,
+        ))
+    return out
+
+
+def _tata_fetch_one(model_cfg, edition, fuel, trans, city, city_code):
+    try:
+        variants = _tata_post_prices(model_cfg, [edition], [fuel], [trans], city_code)
+    except Exception as e:
+        print(f"Error fetching {model_cfg['name']} {fuel}/{trans}: {e}")
+        return []
+
+    TATA_PLAN.record(_tata_plan_key(model_cfg, edition, fuel, trans, city_code), len(variants))
+    out = _tata_rows(model_cfg, variants, FUEL_MAP.get(fuel, fuel), TRANS_MAP.get(trans, trans), city)
+    return out
+
+
+# =============================
+# Batched fetch: all fuels × transmissions of one edition in one call.
+# Variants are attributed back to a fuel/transmission from their label; if
+# any variant cannot be placed unambiguously the batch is discarded and the
+# combos are fetched one by one instead.
+# =============================
+TATA_BATCH_FILTERS = True
+
+_TATA_FUEL_WORDS = [
+    ("CNG", re.compile(r"\b(?:i?CNG|bi[- ]?fuel)\b", re.IGNORECASE)),
+    ("Diesel", re.compile(r"\bdiesel\b", re.IGNORECASE)),
+    ("Petrol", re.compile(r"\bpetrol\b", re.IGNORECASE)),
+]
+_TATA_TRANS_WORDS = [
+    ("AT", re.compile(r"\b(?:DCA|DCT|\d?AT)\b", re.IGNORECASE)),
+    ("AMT", re.compile(r"\bAMT\b", re.IGNORECASE)),
+    ("MT", re.compile(r"\b\d?MT\b", re.IGNORECASE)),
+]
+
+
+def _attribute(label, candidates, words):
+    """The single candidate label `label` points to, or None when it is ambiguous."""
+    if len(candidates) == 1:
+        return next(iter(candidates))
+    found = {name for name, pattern in words if name in candidates and pattern.search(label)}
+    return found.pop() if len(found) == 1 else None
+
 
+def _tata_attribute(variants, fuels, trans):
+    """{(fuel_label, trans_label): [variant, ...]} or None if any variant is ambiguous."""
+    fuel_labels = {FUEL_MAP.get(f, f) for f in fuels}
+    trans_labels = {TRANS_MAP.get(t, t) for t in trans}
+    groups = {}
+    for v in variants:
+        label = v.get("variantLabel") or ""
+        fuel = _attribute(label, fuel_labels, _TATA_FUEL_WORDS)
+        tran = _attribute(label, trans_labels, _TATA_TRANS_WORDS)
+        if fuel is None or tran is None:
+            return None
+        groups.setdefault((fuel, tran), []).append(v)
+    return groups
+
+
+def _tata_fetch_batch(model_cfg, edition, combos, city, city_code):
+    fuels = sorted({f for f, _ in combos})
+    trans = sorted({t for _, t in combos})
+    per_combo = FollowUp((_tata_fetch_one, (model_cfg, edition, f, t, city, city_code)) for f, t in combos)
+    try:
+        variants = _tata_post_prices(model_cfg, [edition], fuels, trans, city_code)
+    except Exception as e:
+        print(f"[WARN] Tata batch request failed for {model_cfg['name']} ({e}); fetching per combo.")
+        TATA_PLAN.count("batch_fallback")
+        return per_combo
+
+    groups = _tata_attribute(variants, fuels, trans)
+    if groups is None:
+        TATA_PLAN.count("batch_fallback")
+        return per_combo
+
+    TATA_PLAN.count("batched")
+    out = []
+    # every fuel × transmission pair in the request was effectively probed
+    for f, t in itertools.product(fuels, trans):
+        found = groups.get((FUEL_MAP.get(f, f), TRANS_MAP.get(t, t)), [])
+        TATA_PLAN.record(_tata_plan_key(model_cfg, edition, f, t, city_code), len(found))
+    for (fuel_label, trans_label), group in groups.items():
+        out.extend(_tata_rows(model_cfg, group, fuel_label, trans_label, city))
     return out
+
+
 # =============================
-# Main parallel fetch
+# Job planning: filters once per model, then per city either one batched
+# call per edition or one call per combo, limited to the combos the learned
+# plan still expects to return variants
 # =============================
-def fetch_tata_prices_parallel():
-    rows = []
-    with ThreadPoolExecutor(max_workers=6) as ex:
-        futures = []
-        for cfg in TATA_MODEL_CONFIGS:
-            filter_map = _tata_get_filters(cfg)
-            fuels = list(filter_map["fuel_type"].keys())
-            trans = list(filter_map["transmission_type"].keys())
-            editions = list(filter_map["edition"].keys()) or TATA_EDITION_LIST
-
-            for edition, fuel, tran in itertools.product(editions, fuels, trans):
-                futures.append(ex.submit(_tata_fetch_one, cfg, edition, fuel, tran))
-
-        for f in as_completed(futures):
-            r = f.result()
-            if r:
-                rows.extend(r)
+def _tata_plan_key(model_cfg, edition, fuel, trans, city_code):
+    return f"{city_code}|{model_cfg['modelId']}|{edition}|{fuel}|{trans}"
+
+
+def _tata_model_jobs(cfg, city, code):
+    # filter options (and so the combinations worth asking for) differ by city
+    filter_map = _tata_get_filters(cfg, code)
+    fuels = list(filter_map["fuel_type"].keys())
+    trans = list(filter_map["transmission_type"].keys())
+    editions = list(filter_map["edition"].keys()) or TATA_EDITION_LIST
+    jobs = FollowUp()
+    for edition in editions:
+        combos = [
+            (fuel, tran) for fuel, tran in itertools.product(fuels, trans)
+            if TATA_PLAN.should_request(_tata_plan_key(cfg, edition, fuel, tran, code))
+        ]
+        if TATA_BATCH_FILTERS and len(combos) > 1:
+            jobs.append((_tata_fetch_batch, (cfg, edition, combos, city, code)))
+        else:
+            jobs += [(_tata_fetch_one, (cfg, edition, fuel, tran, city, code)) for fuel, tran in combos]
+    return jobs
+
+
+def _plan_tata(cities):
+    cities = brand_cities("Tata", cities)
+    if not cities:
+        return FollowUp()
+    TATA_PLAN.reset_stats()
+    return FollowUp((_tata_model_jobs, (cfg, city, code)) for city, code in cities for cfg in TATA_MODEL_CONFIGS)
+
+
+def _save_tata_plan():
+    try:
+        TATA_PLAN.save()
+    except OSError as e:
+        print(f"[WARN] Could not save Tata request plan: {e}")
+    if TATA_PLAN.stats:
+        print(f"Tata request plan: {dict(TATA_PLAN.stats)}")
+
+
+def fetch_tata_prices_parallel(cities=None):
+    rows = run_jobs([(_plan_tata, (cities,))])
+    _save_tata_plan()
     return rows
 
 # =====================
 # MARUTI SCRAPER (parallel by model)
 # =====================
-CITY_CODE = "08"  # Maruti city code: 08 = Delhi
 ARENA_CHANNELS = "NRM,NRC"
 VARIANT_URL = f"https://www.marutisuzuki.com/graphql/execute.json/msil-platform/arenaVariantList"
 PRICE_URL = "https://www.marutisuzuki.com/pricing/v2/common/pricing/ex-showroom-detail"
 PLACEHOLDER_URL = "https://www.marutisuzuki.com/placeholders.json"
 def fetch_placeholders():
     try:
-        res = session.get(PLACEHOLDER_URL, timeout=15)
-        data = res.json().get("data", [])
+        res = _request("GET", PLACEHOLDER_URL, "Maruti", "placeholders", timeout=15)
+        data = decoding.decode(res.content, "maruti_placeholders").get("data", [])
         price_str = next((d["Text"] for d in data if "prices" in d["Key"].lower()), "")
         # Convert "VARIANT:PRICE,..." → dict
         price_map = {
@@ -265,24 +624,39 @@ def fetch_placeholders():
         return {}
 PLACEHOLDER_PRICES = fetch_placeholders()
 
-def _maruti_fetch_arena_model(modelCd, modelName):
+MARUTI_ARENA_MODELS = {
+    "DE": "Dzire", "AT": "Alto K10", "VZ": "Brezza", "SI": "Swift",
+    "CL": "Celerio", "WA": "WagonR", "VR": "Eeco", "ER": "Ertiga", "SP": "S-Presso", "EC": "victoris"
+}
+MARUTI_NEXA_MODELS = {
+    "BZ": "Baleno", "CI": "Ciaz", "FR": "Fronx", "GV": "Grand Vitara",
+    "IG": "Ignis", "IN": "Invicto", "JM": "Jimny", "XL": "XL6"
+}
+
+def _maruti_arena_variants():
+    """The Arena variant list covers every model and every city: fetched once per scrape."""
+    def load():
+        var_res = _request("GET", VARIANT_URL, "Maruti", "variants", timeout=15)
+        return decoding.decode(var_res.content, "maruti_variants").get("data", {}).get("carVariantList", {}).get("items", [])
+    return shared_metadata(("maruti", "arena-variants"), load)
+
+def _maruti_fetch_arena_model(modelCd, modelName, city, city_code):
     rows = []
     try:
-        var_res = session.get(VARIANT_URL, timeout=15)
-        variants = var_res.json().get("data", {}).get("carVariantList", {}).get("items", [])
+        variants = _maruti_arena_variants()
         if not variants:
             return rows
 
         params = {
-            "forCode": CITY_CODE,
+            "forCode": city_code,
             "modelCodes": modelCd,
             "channel": ARENA_CHANNELS,
             "variantInfoRequired": "true"
         }
-        price_res = session.get(PRICE_URL, params=params, timeout=15)
+        price_res = _request("GET", PRICE_URL, "Maruti", modelName, params=params, timeout=15)
         price_map = {
             v["variantCd"]: int(round(v["exShowroomPrice"]))
-            for m in price_res.json().get("data", {}).get("models", [])
+            for m in decoding.decode(price_res.content, "maruti_prices").get("data", {}).get("models", [])
             for v in m.get("exShowroomDetailResponseDTOList", [])
             if v.get("colorType") == "M"
         }
@@ -293,31 +667,41 @@ def _maruti_fetch_arena_model(modelCd, modelName):
                 fuel = v.get("fuelType", "")
                 if fuel.lower() in ["strong-hybrid"]:
                     fuel = "Petrol"
-                rows.append({
-                    "Brand": "Maruti",
-                    "Model": modelName,
-                    "Fuel": fuel,
-                    "Transmission": v.get("transmission", ""),
-                    "Variant": re.sub(r"\b(5MT|MT)\b", "",
-                                      v.get("variantName", "").replace(modelName, "").replace("AGS", "AMT")).strip(),
-                    "Price": price
-                })
+                rows.append(PriceRecord(
+                    brand="Maruti",
+                    model=modelName,
+                    fuel=fuel,
+                    transmission=v.get("transmission", ""),
+                    variant=re.sub(r"\b(5MT|MT)\b", "",
+                                   v.get("variantName", "").replace(modelName, "").replace("AGS", "AMT")).strip(),
+                    price=price,
+                    city=city,
+                ))
     except Exception as e:
         print(f"❌ Error fetching Maruti Arena model {modelName}: {e}")
     return rows
 
 NEXA_CHANNEL = "EXC"
-def _maruti_fetch_nexa_model(modelCd, modelName):
+NEXA_PRICES_URL = "https://www.nexaexperience.com/pricing/v2/common/pricing/ex-showroom-detail"
+def _maruti_fetch_nexa_model(modelCd, modelName, city, city_code):
     ACTIVE_VARIANTS_URL = f"https://www.nexaexperience.com/graphql/execute.json/msil-platform/VariantFeaturesList;modelCd={modelCd};locale=en;"
-    PRICES_URL = "https://www.nexaexperience.com/pricing/v2/common/pricing/ex-showroom-detail"
     rows = []
     try:
-        variants_data = session.get(ACTIVE_VARIANTS_URL, timeout=20).json()
-        prices_data = session.get(PRICES_URL, params={
-            "forCode": CITY_CODE,
-            "channel": NEXA_CHANNEL,
-            "variantInfoRequired": "true"
-        }, timeout=20).json()
+        # Variant features are city-independent; the Nexa price list covers all models of a city
+        variants_data = shared_metadata(
+            ("nexa", "variants", modelCd),
+            lambda: decoding.decode(
+                _request("GET", ACTIVE_VARIANTS_URL, "Maruti", modelName, timeout=20).content, "nexa_variants"
+            ),
+        )
+        prices_data = shared_metadata(
+            ("nexa", "prices", city_code),
+            lambda: decoding.decode(_request("GET", NEXA_PRICES_URL, "Maruti", "nexa-prices", params={
+                "forCode": city_code,
+                "channel": NEXA_CHANNEL,
+                "variantInfoRequired": "true"
+            }, timeout=20).content, "maruti_prices"),
+        )
 
         variant_prices = {
             var["variantCd"]: var["exShowroomPrice"]
@@ -341,41 +725,29 @@ def _maruti_fetch_nexa_model(modelCd, modelName):
                 fuel = variant.get("fuelType", "")
                 if fuel.lower() in ["strong-hybrid"]:
                     fuel = "Petrol"
-                rows.append({
-                    "Brand": "Maruti",
-                    "Model": modelName,
-                    "Fuel": fuel,
-                    "Transmission": transmission,
-                    "Variant": re.sub(r"\b(5MT|MT)\b", "",
-                                      variant.get("variantName", "").replace(modelName, "").replace("AGS", "AMT")).strip(),
-                    "Price": int(round(price))
-                })
+                rows.append(PriceRecord(
+                    brand="Maruti",
+                    model=modelName,
+                    fuel=fuel,
+                    transmission=transmission,
+                    variant=re.sub(r"\b(5MT|MT)\b", "",
+                                   variant.get("variantName", "").replace(modelName, "").replace("AGS", "AMT")).strip(),
+                    price=int(round(price)),
+                    city=city,
+                ))
     except Exception as e:
         print(f"❌ Error fetching Maruti Nexa model {modelName}: {e}")
     return rows
 
-def fetch_maruti_prices_parallel():
-    arena_models = {
-        "DE": "Dzire", "AT": "Alto K10", "VZ": "Brezza", "SI": "Swift",
-        "CL": "Celerio", "WA": "WagonR", "VR": "Eeco", "ER": "Ertiga", "SP": "S-Presso", "EC": "victoris"
-    }
-    nexa_models = {
-        "BZ": "Baleno", "CI": "Ciaz", "FR": "Fronx", "GV": "Grand Vitara",
-        "IG": "Ignis", "IN": "Invicto", "JM": "Jimny", "XL": "XL6"
-    }
-    rows = []
-    with ThreadPoolExecutor(max_workers=6) as ex:
-        futures = []
-        for cd, name in arena_models.items():
-            futures.append(ex.submit(_maruti_fetch_arena_model, cd, name))
-        for cd, name in nexa_models.items():
-            futures.append(ex.submit(_maruti_fetch_nexa_model, cd, name))
-
-        for f in as_completed(futures):
-            r = f.result()
-            if r:
-                rows.extend(r)
-    return rows
+def _plan_maruti(cities):
+    jobs = FollowUp()
+    for city, code in brand_cities("Maruti", cities):
+        jobs += [(_maruti_fetch_arena_model, (cd, name, city, code)) for cd, name in MARUTI_ARENA_MODELS.items()]
+        jobs += [(_maruti_fetch_nexa_model, (cd, name, city, code)) for cd, name in MARUTI_NEXA_MODELS.items()]
+    return jobs
+
+def fetch_maruti_prices_parallel(cities=None):
+    return run_jobs([(_plan_maruti, (cities,))])
 
 
 # =====================
@@ -399,35 +771,35 @@ HYUNDAI_HEADERS = {
     "user-agent": ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
                    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36")
 }
-# Delhi cityId=1370 (you can add more cities later)
 HYUNDAI_MODELS = [
-    {"cityId": 1370, "modelId": 24, "modelName": "Grand i10 NIOS"},
-    {"cityId": 1370, "modelId": 39, "modelName": "i20"},
-    {"cityId": 1370, "modelId": 41, "modelName": "i20 N Line"},
-    {"cityId": 1370, "modelId": 35, "modelName": "AURA"},
-    {"cityId": 1370, "modelId": 45, "modelName": "Verna"},
-    {"cityId": 1370, "modelId": 18, "modelName": "Venue"},
-    {"cityId": 1370, "modelId": 37, "modelName": "Creta"},
-    {"cityId": 1370, "modelId": 40, "modelName": "Alcazar"},
-    {"cityId": 1370, "modelId": 46, "modelName": "EXTER"},
-    {"cityId": 1370, "modelId": 42, "modelName": "Tucson"},
-    {"cityId": 1370, "modelId": 43, "modelName": "Venue N Line"},
-    {"cityId": 1370, "modelId": 47, "modelName": "Creta N Line"},
-    {"cityId": 1370, "modelId": 48, "modelName": "Creta Electric"},
+    {"modelId": 24, "modelName": "Grand i10 NIOS"},
+    {"modelId": 39, "modelName": "i20"},
+    {"modelId": 41, "modelName": "i20 N Line"},
+    {"modelId": 35, "modelName": "AURA"},
+    {"modelId": 45, "modelName": "Verna"},
+    {"modelId": 18, "modelName": "Venue"},
+    {"modelId": 37, "modelName": "Creta"},
+    {"modelId": 40, "modelName": "Alcazar"},
+    {"modelId": 46, "modelName": "EXTER"},
+    {"modelId": 42, "modelName": "Tucson"},
+    {"modelId": 43, "modelName": "Venue N Line"},
+    {"modelId": 47, "modelName": "Creta N Line"},
+    {"modelId": 48, "modelName": "Creta Electric"},
 ]
-def _hyundai_fetch_one(model):
+def _hyundai_fetch_one(model, city, city_code):
     params = {
-        "cityId": model["cityId"],
+        "cityId": city_code,
         "modelId": model["modelId"],
         "loc": "IN",
         "lan": "en"
     }
     rows = []
     try:
-        r = session.get(HYUNDAI_BASE_URL, headers=HYUNDAI_HEADERS, params=params, timeout=20)
+        r = _request("GET", HYUNDAI_BASE_URL, "Hyundai", model["modelName"],
+                     headers=HYUNDAI_HEADERS, params=params, timeout=20)
         if r.status_code != 200:
             return rows
-        data = r.json()
+        data = decoding.decode(r.content, "hyundai_prices")
         # Some endpoints return list; some return dict with "modelPrice"
         variants = []
         if isinstance(data, dict) and "modelPrice" in data:
@@ -438,7 +810,7 @@ def _hyundai_fetch_one(model):
             variants = []
 
         for v in variants:
-            price_rupees = _parse_price_rupees(v.get("price"))
+            price_rupees = parsers.parse_price_rupees(v.get("price"))
             fuel = v.get("fuelType", "")
             if "CNG" in fuel:  # covers "Bi-Fuel CNG", "CNG", etc.
                 fuel = "CNG"
@@ -465,27 +837,28 @@ def _hyundai_fetch_one(model):
 
             if not price_rupees:
                 continue
-            rows.append({
-                "Brand": "Hyundai",
-                "Model": model["modelName"],
-                "Fuel": fuel,
-                "Transmission": transmission,
-                "Variant": variant_name,
-                "Price": price_rupees
-            })
+            rows.append(PriceRecord(
+                brand="Hyundai",
+                model=model["modelName"],
+                fuel=fuel,
+                transmission=transmission,
+                variant=variant_name,
+                price=price_rupees,
+                city=city,
+            ))
     except Exception as e:
         print(f"❌ Error fetching Hyundai model {model['modelName']}: {e}")
     return rows
 
-def fetch_hyundai_prices_parallel():
-    rows = []
-    with ThreadPoolExecutor(max_workers=14) as ex:
-        futures = [ex.submit(_hyundai_fetch_one, m) for m in HYUNDAI_MODELS]
-        for f in as_completed(futures):
-            r = f.result()
-            if r:
-                rows.extend(r)
-    return rows
+def _plan_hyundai(cities):
+    return FollowUp(
+        (_hyundai_fetch_one, (m, city, code))
+        for city, code in brand_cities("Hyundai", cities)
+        for m in HYUNDAI_MODELS
+    )
+
+def fetch_hyundai_prices_parallel(cities=None):
+    return run_jobs([(_plan_hyundai, (cities,))])
 
 # =====================
 # MAHINDRA SCRAPER
@@ -514,69 +887,21 @@ def _mahindra_fetch_one(model):
         "quantity": 1
     }
     try:
-        resp = session.get(MAHINDRA_BASE_URL, params=params, timeout=20)
-        data = resp.json()
-
+        resp = _request("GET", MAHINDRA_BASE_URL, "Mahindra", model["name"], params=params, timeout=20)
     except Exception as e:
         print(f"Failed to fetch {model['name']}: {e}")
         return []
+    return ParseTask("Mahindra", model["name"], parsers.parse_mahindra, (model["name"], resp.content, DEFAULT_CITY))
 
-    variant_html_list = data.get("product", {}).get("variantCardHtml", [])
-    rows = []
 
-    for html_snippet in variant_html_list:
-        soup = BeautifulSoup(html_snippet, "html.parser")
-        input_tag = soup.find("input", {"class": "js-radio"})
-        variant_name = (
-            input_tag.attrs.get("data-variantName") or
-            input_tag.attrs.get("data-variantname") or
-            "N/A"
-        )
-        price_tag = soup.find("span", {"class": "approx-price"})
-        price_text = price_tag.text.strip() if price_tag else "N/A"
-        price_int = _parse_price_rupees(price_text)
-        fuel = ""
-        transmission = ""
-
-        # Detect fuel
-        if re.search(r"\bD\b", variant_name, flags=re.IGNORECASE):
-            fuel = "Diesel"
-        elif re.search(r"\bP\b", variant_name, flags=re.IGNORECASE):
-            fuel = "Petrol"
-
-        if re.search(r"\bDiesel\b", variant_name, flags=re.IGNORECASE) or re.search(r"\bD\b", variant_name):
-            fuel = "Diesel"
-        elif re.search(r"\bPetrol\b", variant_name, flags=re.IGNORECASE) or re.search(r"\bP\b", variant_name):
-            fuel = "Petrol"
-
-        # Detect transmission
-        if re.search(r"\bAT\b", variant_name, flags=re.IGNORECASE):
-            transmission = "Automatic"
-        elif re.search(r"\bMT\b", variant_name, flags=re.IGNORECASE):
-            transmission = "Manual"
-
-        variant_name = re.sub(r'\b(Petrol|Diesel|CNG|EV|Hybrid)\b', '', variant_name, flags=re.I)
-        variant_name = variant_name.strip()
-        rows.append({
-            "Brand": "Mahindra",
-            "Model": model["name"],
-            "Fuel": fuel,
-            "Transmission": transmission,
-            "Variant": variant_name,
-            "Price": price_int,
-        })
-    return rows
+def _plan_mahindra(cities):
+    if DEFAULT_CITY not in (cities or CITY_CODES):  # national price list
+        return FollowUp()
+    return FollowUp((_mahindra_fetch_one, (m,)) for m in MAHINDRA_MODELS)
 
 
-def fetch_mahindra_prices_parallel():
-    rows = []
-    with ThreadPoolExecutor(max_workers=8) as ex:
-        futures = [ex.submit(_mahindra_fetch_one, m) for m in MAHINDRA_MODELS]
-        for f in as_completed(futures):
-            result = f.result()
-            if result:
-                rows.extend(result)
-    return rows
+def fetch_mahindra_prices_parallel(cities=None):
+    return run_jobs([(_plan_mahindra, (cities,))])
 
 
 # =====================
@@ -592,21 +917,6 @@ TOYOTA_HEADERS = {
                   "AppleWebKit/537.36 (KHTML, like Gecko) "
                   "Chrome/139.0.0.0 Safari/537.36"
 }
-def normalize_toyota_fuel(fuel: str) -> str:
-    if not fuel:
-        return "NA"
-    fuel = fuel.upper().strip()
-    if fuel == "C":
-        return "CNG"
-    if fuel == "P":
-        return "Petrol"
-    if fuel == "D":
-        return "Diesel"
-    if fuel == "H":
-        return "Hybrid"
-    if fuel in ["E", "EV"]:
-        return "EV"
-    return fuel.title()
 
 
 # ----------------------------
@@ -615,73 +925,37 @@ def normalize_toyota_fuel(fuel: str) -> str:
 def fetch_toyota_models():
     """Fetch all Toyota models (id + name)."""
     url = f"{TOYOTA_BASE_URL}/models"
-    resp = requests.post(url, headers=TOYOTA_HEADERS, data="")
-    soup = BeautifulSoup(resp.text, "xml")
+    resp = _request("POST", url, "Toyota", "models", client=requests, headers=TOYOTA_HEADERS, data="")
+    return parsers.parse_toyota_models(resp.content)
 
-    models = []
-    for m in soup.find_all("PriceModel"):
-        models.append({
-            "id": m.find("Id").text.strip(),
-            "name": m.find("Name").text.strip()
-        })
-    return models
 
 # ----------------------------
 # Function 2: Fetch prices for one model
 # ----------------------------
-def _toyota_prices(dealer_id, model_id, model_name):
-    """Fetch price details for a given dealer & model."""
+def _toyota_prices(dealer_id, model_id, model_name, city=DEFAULT_CITY):
+    """Fetch price details for a given dealer & model; parsing is handed to the parse pool."""
     url = f"{TOYOTA_BASE_URL}/list/{dealer_id}/{model_id}"
-    resp = requests.post(url, headers=TOYOTA_HEADERS, data="")
-    soup = BeautifulSoup(resp.text, "xml")
-
-    rows = []
-    for p in soup.find_all("Price"):
-        grade = p.find("PriceGrade")
-
-        if grade:
-            # get the *variant name* only from direct children of <PriceGrade>
-            variant_tag = grade.find("Name", recursive=False)
-            variant = variant_tag.text.strip() if variant_tag else ""
-            variant = re.sub(r"\b2WD \b", "", variant)
-            variant=re.sub(r"\[.*?]", "", variant)
-
-            fuel_tag = grade.find("FuelType", recursive=False)
-            fuel = fuel_tag.text.strip() if fuel_tag else ""
-
-            trans_tag = grade.find("Details", recursive=False)
-            trans = trans_tag.text.strip() if trans_tag else ""
-        else:
-            variant, fuel, trans = "", "", ""
-
-        amount_tag = p.find("Amount")
-        amount = int(amount_tag.text.strip()) if amount_tag and amount_tag.text.strip().isdigit() else None
-
-        rows.append({
-            "Brand": "Toyota",
-            "Model": model_name,
-            "Fuel": normalize_toyota_fuel(fuel),
-            "Transmission": trans,
-            "Variant": variant,
-            "Price": amount
-        })
-    return rows
+    resp = _request("POST", url, "Toyota", model_name, client=requests, headers=TOYOTA_HEADERS, data="")
+    return ParseTask("Toyota", model_name, parsers.parse_toyota_prices, (resp.content, model_name, city))
 
 
 # ----------------------------
-# Combine everything into DataFrame
+# Plan: model list once, one price call per dealer (city) × model
 # ----------------------------
-def fetch_toyota_prices(dealer_id=704):
-    all_data = []
+def _plan_toyota(cities):
+    cities = brand_cities("Toyota", cities)
+    if not cities:
+        return FollowUp()
     models = fetch_toyota_models()
-    for m in models:
-        model_id, model_name = m["id"], m["name"]
-        try:
-            prices = _toyota_prices(dealer_id, model_id, model_name)
-            all_data.extend(prices)
-        except Exception as e:
-            print(f"❌ Failed for {model_name}: {e}")
-    return all_data
+    return FollowUp(
+        (_toyota_prices, (dealer_id, m["id"], m["name"], city))
+        for city, dealer_id in cities
+        for m in models
+    )
+
+
+def fetch_toyota_prices(cities=None):
+    return run_jobs([(_plan_toyota, (cities,))])
 
 
 # =====================
@@ -721,16 +995,18 @@ def normalize_trans(name: str) -> str:
 # ----------------------------
 def fetch_models(state="DL", city="N10"):
     url = f"{KIA_API}/configure.getModelList.do"
-    resp = requests.post(url, headers=HEADERS, data={"stateCode": state, "cityCode": city})
-    return [{"name": m["modelName"], "code": m["modelCode"]} for m in resp.json().get("data", [])]
+    resp = _request("POST", url, "Kia", "models", client=requests,
+                    headers=HEADERS, data={"stateCode": state, "cityCode": city})
+    return [{"name": m["modelName"], "code": m["modelCode"]} for m in decoding.decode(resp.content, "kia_models").get("data", [])]
 
 # ----------------------------
 # Fetch Variants for One Model
 # ----------------------------
-def fetch_variants(model, state="DL", city="N10"):
+def fetch_variants(model, state="DL", city="N10", city_name=DEFAULT_CITY):
     url = f"{KIA_API}/configure.getVrntList.do"
-    resp = requests.get(f"{url}?modelCode={model['code']}&stateCode={state}&cityCode={city}", headers=HEADERS)
-    data = resp.json().get("data", {})
+    resp = _request("GET", f"{url}?modelCode={model['code']}&stateCode={state}&cityCode={city}",
+                    "Kia", model["name"], client=requests, headers=HEADERS)
+    data = decoding.decode(resp.content, "kia_variants").get("data", {})
 
     engines = {e["dmsEngineCode"]: (e["engineName"], e["fuelType"]) for e in data.get("engines", [])}
     trans = {t["dmsTmdtCode"]: t["tmName"] for t in data.get("transmissions", [])}
@@ -744,31 +1020,34 @@ def fetch_variants(model, state="DL", city="N10"):
             engine_name, fuel = engines.get(code[4:-1], ("NA", "NA"))
             raw_trans = trans.get(code[-1:], "NA")
             transmission = normalize_trans(raw_trans)
-            rows.append({
-                "Brand": "Kia",
-                "Model": model["name"],
-                "Variant": clean_variant(v.get("variantName", "")),
-                "Fuel": fuel,
-                "Transmission": transmission,
-                "Price": price
-            })
+            rows.append(PriceRecord(
+                brand="Kia",
+                model=model["name"],
+                fuel=fuel,
+                transmission=transmission,
+                variant=clean_variant(v.get("variantName", "")),
+                price=price,
+                city=city_name,
+            ))
     return rows
 
 # ----------------------------
-# Fast Parallel Fetch
+# Plan: model list once, variants per city × model
 # ----------------------------
-def fetch_kia_prices(state="DL", city="N10", workers=8):
-    models = fetch_models(state, city)
-    all_data = []
+def _plan_kia(cities):
+    cities = brand_cities("Kia", cities)
+    if not cities:
+        return FollowUp()
+    models = fetch_models(*cities[0][1])
+    return FollowUp(
+        (fetch_variants, (m, state, city_code, city))
+        for city, (state, city_code) in cities
+        for m in models
+    )
+
 
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {executor.submit(fetch_variants, m, state, city): m for m in models}
-        for fut in as_completed(futures):
-            try:
-                all_data.extend(fut.result())
-            except Exception as e:
-                print(f"❌ Failed for {futures[fut]['name']}: {e}")
-    return all_data
+def fetch_kia_prices(cities=None):
+    return run_jobs([(_plan_kia, (cities,))])
 
 
 # =====================
@@ -834,9 +1113,21 @@ def normalize_mg_fuel(code: str) -> str:
 # ----------------------------
 # Fetch MG Variants
 # ----------------------------
-def fetch_mg_prices(state="Delhi", city="Delhi"):
-    resp = requests.get(MG_API, headers=MG_HEADERS)
-    data = resp.json()
+def _mg_variants(states):
+    """
+    One blob holds every model's price in every state and city: fetched once
+    per scrape, keeping only the pricing entries of the scraped `states`.
+    """
+    states = frozenset(states)
+    return shared_metadata(
+        ("mg", "variants", states),
+        lambda: decoding.decode_mg(
+            _request("GET", MG_API, "MG", "all", client=requests, headers=MG_HEADERS).content, states
+        ),
+    )
+
+def fetch_mg_prices(state="Delhi", city="Delhi", city_name=DEFAULT_CITY, states=None):
+    data = _mg_variants(states or (state,))
     rows = []
 
     for model in data:
@@ -846,7 +1137,7 @@ def fetch_mg_prices(state="Delhi", city="Delhi"):
             fuel = normalize_mg_fuel(v.get("fuel_type"))
             transmission = normalize_mg_trans(v.get("vehicle_type"))
 
-            # find Delhi price only
+            # price for the requested state/city only
             price = None
             for p in v.get("pricing", []):
                 if p.get("State") == state:
@@ -856,17 +1147,24 @@ def fetch_mg_prices(state="Delhi", city="Delhi"):
                             break
 
             if price:
-                rows.append({
-                    "Brand": "MG",
-                    "Model": model_line,
-                    "Variant": variant_name,
-                    "Fuel": fuel,
-                    "Transmission": transmission,
-                    "Price": price
-                })
+                rows.append(PriceRecord(
+                    brand="MG",
+                    model=model_line,
+                    fuel=fuel,
+                    transmission=transmission,
+                    variant=variant_name,
+                    price=price,
+                    city=city_name,
+                ))
     return rows
 
 
+def _plan_mg(cities):
+    cities = brand_cities("MG", cities)
+    states = {state for _, (state, _) in cities}
+    return FollowUp((fetch_mg_prices, (state, city_code, city, states)) for city, (state, city_code) in cities)
+
+
 # =====================
 # Nissan SCRAPER
 # =====================
@@ -879,149 +1177,54 @@ headers = {
                   "Chrome/139.0.0.0 Safari/537.36"
 }
 
-# ----------------------------
-# Helper: find model name for a table
-# ----------------------------
-def find_nissan_name_for_table(table):
-    # 1) Prefer <h2 class="heading"> near the table
-    prev = table.find_previous('h2', class_='heading')
-    if prev and prev.get_text(strip=True):
-        model = prev.get_text(" ", strip=True)
-    else:
-        # 2) Scan previous tags for the first one that mentions "Nissan"
-        model = None
-        for tag in table.find_all_previous():
-            if tag.name in ('h2', 'h3', 'span', 'p', 'div') and tag.get_text(strip=True):
-                text = tag.get_text(" ", strip=True)
-                if re.search(r'\bNissan\b', text, re.I):
-                    model = text
-                    break
-        # 3) fallback to nearest heading-like tag
-        if not model:
-            prev = table.find_previous(['h2', 'h3', 'p', 'strong'])
-            model = prev.get_text(" ", strip=True) if prev and prev.get_text(strip=True) else "Unknown Model"
-
-    # Normalize: remove leading "New " and "Nissan " from model name
-    model = re.sub(r'^(New\s+)?Nissan\s+', '', model, flags=re.I).strip()
-    return model if model else "Unknown Model"
-
-
 # ----------------------------
 # Function 1: Fetch all models -> returns dict { model_name: [table, ...] }
 # ----------------------------
 def fetch_nissan_models():
-    resp = requests.get(BASE_URL, headers=headers)
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    models = {}
-    for table in soup.find_all("table"):
-        model_name = find_nissan_name_for_table(table)
-        models.setdefault(model_name, []).append(table)
-    return models
-
-
-# ----------------------------
-# Parse fuel & transmission from variant string
-# ----------------------------
-def parse_fuel_trans(variant):
-    fuel, trans = "", ""
-    v = variant.upper()
-    if re.search(r'\bCVT\b|\bAT\b|AUTOMATIC', v):
-        trans = "Automatic"
-    elif re.search(r'\bMT\b|\bMANUAL', v):
-        trans = "Manual"
-    elif re.search(r'\bEZ-SHIFT', v):
-        trans = "AMT"
-
-    if re.search(r'DIESEL', v):
-        fuel = "Diesel"
-    elif re.search(r'PETROL', v):
-        fuel = "Petrol"
-    return fuel, trans
-
-
-# ----------------------------
-# Clean variant name: remove "Nissan", "New Nissan", and transmission tokens
-# ----------------------------
-def clean_variant_name(variant, model_name):
-    if model_name:
-        variant = re.sub(re.escape(model_name), '', variant, flags=re.I)
-    variant = re.sub(r'^(New\s+)?Nissan\s+', '', variant, flags=re.I)
-    variant = re.sub(r'\b(MT|CVT|AT|Manual|Automatic|EZ-SHIFT|X-TRONIC)\b', '', variant, flags=re.I)
-    variant = re.sub(r'\s{2,}', ' ', variant).strip()
-    variant = variant.strip(" -–—:;()[]")
+    resp = _request("GET", BASE_URL, "Nissan", "prices-list", client=requests, headers=headers)
+    return parsers.nissan_models_from_html(resp.content)
 
-    return variant
 
+def _nissan_fetch():
+    resp = _request("GET", BASE_URL, "Nissan", "prices-list", client=requests, headers=headers)
+    return ParseTask("Nissan", "prices-list", parsers.parse_nissan, (resp.content, DEFAULT_CITY))
 
 
 # ----------------------------
-# Function 2: Fetch prices for one model (accepts list of tables for that model)
+# Function 3: Plan the page fetch (national price list)
 # ----------------------------
-def _nissan_prices(model_name, tables):
-    rows = []
-    for table in tables:
-        for row in table.find_all("tr")[1:]:  # skip header row
-            cols = [c.get_text(strip=True).replace("\xa0", " ") for c in row.find_all("td")]
-            if len(cols) == 2:
-                variant_raw, price_raw = cols
-                # parse price
-                clean_price = price_raw.replace(",", "").replace("₹", "").strip()
-                try:
-                    clean_price = int(clean_price)
-                except:
-                    clean_price = None
-
-                fuel, trans = parse_fuel_trans(variant_raw)
-                variant = clean_variant_name(variant_raw,model_name)
-
-                rows.append({
-                    "Brand": "Nissan",
-                    "Model": model_name,          # normalized model (no 'Nissan' prefix)
-                    "Fuel": "Petrol",
-                    "Transmission": trans,
-                    "Variant": variant,
-                    "Price": clean_price
-                })
-    return rows
+def _plan_nissan(cities):
+    if DEFAULT_CITY not in (cities or CITY_CODES):
+        return FollowUp()
+    return FollowUp([(_nissan_fetch, ())])
 
 
-# ----------------------------
-# Function 3: Combine everything into a DataFrame
-# ----------------------------
-def fetch_nissan_prices():
-    all_data = []
-    models = fetch_nissan_models()  # dict: model -> [table, ...]
-    for model_name, tables in models.items():
-        try:
-            prices = _nissan_prices(model_name, tables)
-            all_data.extend(prices)
-        except Exception as e:
-            print(f"❌ Failed for {model_name}: {e}")
-    return all_data
+def fetch_nissan_prices(cities=None):
+    return run_jobs([(_plan_nissan, (cities,))])
 
 # =====================
 # MASTER SCRAPER (button triggers calls)
 # =====================
-def scrape_all_brands_parallel():
-    with ThreadPoolExecutor(max_workers=3) as ex:
-        f_maruti = ex.submit(fetch_maruti_prices_parallel)
-        f_tata = ex.submit(fetch_tata_prices_parallel)
-        f_hyundai = ex.submit(fetch_hyundai_prices_parallel)
-        f_mahindra = ex.submit(fetch_mahindra_prices_parallel)
-        f_toyota = ex.submit(fetch_toyota_prices)
-        f_kia =ex.submit(fetch_kia_prices)
-        f_mg = ex.submit(fetch_mg_prices)
-        f_nissan = ex.submit(fetch_nissan_prices)
-        maruti = f_maruti.result()
-        tata = f_tata.result()
-        hyundai = f_hyundai.result()
-        mahindra = f_mahindra.result()
-        toyota = f_toyota.result()
-        kia = f_kia.result()
-        mg = f_mg.result()
-        nissan = f_nissan.result()
-
-    all_prices = (maruti or []) + (tata or []) + (hyundai or []) + (mahindra or []) + (toyota or []) + (kia or [])+ (mg or []) + (nissan or [])
-    all_prices= remove_duplicates(all_prices)
-    return all_prices
+BRAND_PLANNERS = {
+    "Maruti": _plan_maruti,
+    "Tata": _plan_tata,
+    "Hyundai": _plan_hyundai,
+    "Mahindra": _plan_mahindra,
+    "Toyota": _plan_toyota,
+    "Kia": _plan_kia,
+    "MG": _plan_mg,
+    "Nissan": _plan_nissan,
+}
+
+
+def scrape_all_brands_parallel(cities=None, max_workers=SCRAPE_CONCURRENCY):
+    """
+    Scrape every brand in every city of CITY_CODES (or just `cities`).
+
+    Returns (rows, per brand/model request metrics summary).
+    """
+    metrics = telemetry.use(telemetry.ScrapeMetrics())
+    all_prices = run_jobs([(plan, (cities,)) for plan in BRAND_PLANNERS.values()], max_workers)
+    _save_tata_plan()
+    metrics.export()
+    return all_prices, metrics.summary()
@@ -0,0 +1,189 @@
+import bisect
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+# =====================
+# SCRAPER TELEMETRY
+# =====================
+METRICS_PROM_FILE = "scrape_metrics.prom"
+METRICS_JSONL_FILE = "scrape_metrics.jsonl"
+METRICS_JSONL_MAX_BYTES = 20 * 1024 * 1024  # then rotated to <file>.1, replacing the previous one
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)  # seconds
+
+
+class _SeriesStats:
+    __slots__ = ("requests", "errors", "retries", "bytes", "rows", "latencies", "buckets", "statuses")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.rows = 0
+        self.latencies = []
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.statuses = {}
+
+
+class ScrapeMetrics:
+    """Thread-safe per brand/model request metrics for one scrape run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._events = []
+        self.started_at = datetime.now().isoformat()
+
+    def _get(self, brand, model):
+        key = (brand, model or "")
+        stats = self._series.get(key)
+        if stats is None:
+            stats = self._series[key] = _SeriesStats()
+        return stats
+
+    def record_request(self, brand, model, url, latency, status, nbytes, retries):
+        with self._lock:
+            stats = self._get(brand, model)
+            stats.requests += 1
+            stats.retries += retries
+            stats.bytes += nbytes
+            stats.latencies.append(latency)
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            status_key = str(status) if status is not None else "error"
+            stats.statuses[status_key] = stats.statuses.get(status_key, 0) + 1
+            if status is None or status >= 400:
+                stats.errors += 1
+            self._events.append({
+                "ts": time.time(), "brand": brand, "model": model or "", "url": url,
+                "latency_ms": round(latency * 1000, 2), "status": status,
+                "bytes": nbytes, "retries": retries,
+            })
+
+    def record_rows(self, brand, model, count):
+        with self._lock:
+            self._get(brand, model).rows += count
+
+    def summary(self):
+        """One row per brand/model, ready for st.dataframe."""
+        with self._lock:
+            items = sorted(self._series.items())
+            records = []
+            for (brand, model), s in items:
+                lat = pd.Series(s.latencies, dtype="float64") * 1000
+                records.append({
+                    "brand": brand,
+                    "model": model,
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "retries": s.retries,
+                    "bytes": s.bytes,
+                    "rows": s.rows,
+                    "p50_ms": round(lat.quantile(0.5), 1) if len(lat) else None,
+                    "p95_ms": round(lat.quantile(0.95), 1) if len(lat) else None,
+                    "max_ms": round(lat.max(), 1) if len(lat) else None,
+                    "statuses": ", ".join(f"{k}×{v}" for k, v in sorted(s.statuses.items())),
+                })
+        return pd.DataFrame(records, columns=[
+            "brand", "model", "requests", "errors", "retries", "bytes", "rows",
+            "p50_ms", "p95_ms", "max_ms", "statuses",
+        ])
+
+    def to_prometheus(self):
+        """Render all series in the Prometheus text exposition format."""
+        out = [
+            "# HELP scraper_requests_total HTTP requests issued by the brand scrapers.",
+            "# TYPE scraper_requests_total counter",
+        ]
+        with self._lock:
+            items = sorted(self._series.items())
+
+            def labels(brand, model, extra=""):
+                model = model.replace('"', '\\"')
+                return f'{{brand="{brand}",model="{model}"{extra}}}'
+
+            for (brand, model), s in items:
+                for status, n in sorted(s.statuses.items()):
+                    extra = ',status="%s"' % status
+                    out.append(f"scraper_requests_total{labels(brand, model, extra)} {n}")
+            for name, help_text, attr in [
+                ("scraper_retries_total", "Retries performed by urllib3.", "retries"),
+                ("scraper_response_bytes_total", "Response body bytes received.", "bytes"),
+                ("scraper_rows_total", "Price rows returned, after de-duplication.", "rows"),
+            ]:
+                out.append(f"# HELP {name} {help_text}")
+                out.append(f"# TYPE {name} counter")
+                for (brand, model), s in items:
+                    out.append(f"{name}{labels(brand, model)} {getattr(s, attr)}")
+
+            out.append("# HELP scraper_request_latency_seconds Request latency.")
+            out.append("# TYPE scraper_request_latency_seconds histogram")
+            for (brand, model), s in items:
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), s.buckets):
+                    cumulative += n
+                    extra = ',le="%s"' % bound
+                    out.append(f"scraper_request_latency_seconds_bucket{labels(brand, model, extra)} {cumulative}")
+                out.append(f"scraper_request_latency_seconds_sum{labels(brand, model)} {sum(s.latencies):.6f}")
+                out.append(f"scraper_request_latency_seconds_count{labels(brand, model)} {s.requests}")
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path=METRICS_PROM_FILE):
+        # a private temp file per writer: two runs finishing together must not share one
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path) or ".",
+                                         prefix=os.path.basename(path), delete=False) as f:
+            f.write(self.to_prometheus())
+        os.replace(f.name, path)
+
+    def write_jsonl(self, path=METRICS_JSONL_FILE, max_bytes=METRICS_JSONL_MAX_BYTES):
+        with self._lock:
+            lines = "".join(json.dumps(e) + "\n" for e in self._events)
+        with _jsonl_lock:
+            if os.path.exists(path) and os.path.getsize(path) + len(lines) > max_bytes:
+                os.replace(path, path + ".1")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def export(self):
+        try:
+            self.write_prometheus()
+            self.write_jsonl()
+        except OSError as e:
+            print(f"[WARN] Could not export scrape metrics: {e}")
+
+
+_jsonl_lock = threading.Lock()  # runs from several sessions export into the same log
+
+class _Unrecorded:
+    """Metrics outside a scrape run (direct fetch_* calls, import-time lookups): nothing is kept."""
+
+    def record_request(self, brand, model, url, latency, status, nbytes, retries):
+        pass
+
+    def record_rows(self, brand, model, count):
+        pass
+
+
+# The metrics of the scrape running in this context. A run sets its own
+# instance (see use()); job threads inherit it by running in a copy of the
+# submitting context, so concurrent runs from different sessions never share
+# counters. Outside a run nothing is exported, so nothing is collected either:
+# a process-wide collector would only grow for the life of the server.
+_current = contextvars.ContextVar("scrape_metrics")
+_outside_run = _Unrecorded()
+
+
+def use(metrics):
+    """Make `metrics` the current run's metrics in this context."""
+    _current.set(metrics)
+    return metrics
+
+
+def current():
+    return _current.get(_outside_run)
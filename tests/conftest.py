@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import initialization  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh prices.db in a temporary directory, made the app's database for the test."""
+    monkeypatch.setattr(initialization, "DB_FILE", str(tmp_path / "prices.db"))
+    initialization.init_db()
+    return initialization.DB_FILE
+
+
+@pytest.fixture
+def fresh(db, monkeypatch):
+    """`db`, with no shared snapshot left over from an earlier test's database."""
+    import pyarrow as pa
+
+    import dataset
+
+    monkeypatch.setattr(dataset, "_snapshot", dataset.Snapshot(None, pa.table({}), {}, {}))
+    monkeypatch.setattr(dataset, "_watch", None)
+
+
+@pytest.fixture
+def llm_server(monkeypatch):
+    """A local mock of the Groq completions endpoint, with GROQ_BASE_URL pointing at it."""
+    from llm_mock import MockLLMServer
+
+    server = MockLLMServer().start()
+    monkeypatch.setenv("GROQ_BASE_URL", server.url)
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    yield server
+    server.stop()
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import threading
+
+from aiohttp import web
+
+# =====================
+# MOCK COMPLETION SERVER
+# =====================
+# A local stand-in for the Groq chat completions endpoint: streams `reply` as
+# server-sent events after `delay` seconds, `chunk_delay` seconds apart, and
+# records the body of every request it receives. Point GROQ_BASE_URL at `url`.
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+class MockLLMServer:
+    def __init__(self, reply="The Nexon starts at 8.00 lakh.", delay=0.0, chunk_delay=0.0, status=200):
+        self.reply = reply
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.status = status
+        self.requests = []
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mock-llm", daemon=True)
+
+    def chunks(self):
+        """The reply as the server streams it, one word (and its trailing space) per event."""
+        words = self.reply.split(" ")
+        return [w + " " for w in words[:-1]] + words[-1:]
+
+    async def _completions(self, request):
+        body = await request.json()
+        self.requests.append(body)
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.json_response({"error": {"message": "mock failure"}}, status=self.status)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i, text in enumerate(self.chunks()):
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            await response.write(self._event(body["model"], {"content": text}, None))
+        await response.write(self._event(body["model"], {}, "stop"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    def _event(model, delta, finish_reason):
+        chunk = {
+            "id": "mock", "object": "chat.completion.chunk", "created": 0, "model": model, "x_groq": None,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk)}\n\n".encode()
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_post(COMPLETIONS_PATH, self._completions)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(5)
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
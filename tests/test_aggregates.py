@@ -0,0 +1,56 @@
+import sqlite3
+
+import pandas as pd
+
+import aggregates
+import initialization
+from records import PriceRecord
+
+
+def _row(model, variant, price, brand="Tata", city="Delhi"):
+    return PriceRecord(brand, model, "Petrol", "MT", variant, price, city)
+
+
+def _tables():
+    conn = sqlite3.connect(initialization.DB_FILE)
+    tables = [sorted(conn.execute(f"SELECT * FROM {t}").fetchall(), key=repr) for t in ("model_stats", "variant_ranks")]
+    conn.close()
+    return tables
+
+
+def _full_rebuild():
+    conn = sqlite3.connect(initialization.DB_FILE)
+    initialization.refresh_aggregates(conn)
+    conn.commit()
+    conn.close()
+    return _tables()
+
+
+def test_group_refreshes_match_a_full_rebuild(db):
+    initialization.store_prices([_row("Nexon", "Smart", 800000), _row("Tiago", "XE", 500000),
+                                 _row("Nexon", "Smart", 820000, city="Mumbai")])
+    initialization.store_prices([_row("Punch", "Pure", 600000, brand="Tata")], source="pdf")
+    initialization.add_price("Tata", "Nexon", "Custom", 850000, "Petrol", "MT", "2026-01-01T00:00:00", "Delhi")
+    assert _tables() == _full_rebuild()
+
+    # The next scrape drops Tiago and the next PDF load moves Punch to another city
+    initialization.store_prices([_row("Nexon", "Smart", 810000)])
+    initialization.store_prices([_row("Punch", "Pure", 610000, city="Mumbai")], source="pdf")
+    assert _tables() == _full_rebuild()
+
+    manual = initialization.get_manual_entries()[0]
+    initialization.delete_prices(manual["id"])
+    assert _tables() == _full_rebuild()
+    assert ("Delhi", "Tata", "Tiago") not in {tuple(r[:3]) for r in _tables()[0]}
+
+
+def test_covers_compares_groups_not_just_row_counts():
+    stats = pd.DataFrame({"city": ["Delhi", "Delhi"], "brand": ["Tata", "Tata"], "model": ["Nexon", "Tiago"],
+                          "fuel": ["Petrol", None], "transmission": ["MT", "MT"], "n": [2, 1]})
+    rows = pd.DataFrame({"city": ["Delhi"] * 3, "brand": ["Tata"] * 3, "model": ["Nexon", "Nexon", "Tiago"],
+                         "fuel": pd.array(["Petrol", "Petrol", None], dtype="string"), "transmission": ["MT"] * 3})
+    assert aggregates.covers(stats, rows)
+    # Same number of rows, but one Nexon was cut and another model's row let through
+    swapped = rows.assign(model=["Nexon", "Tiago", "Tiago"])
+    assert not aggregates.covers(stats, swapped)
+    assert not aggregates.covers(stats, rows.iloc[1:])
@@ -0,0 +1,70 @@
+import assistant
+import dataset
+import initialization
+import llm_client
+from records import PriceRecord
+
+NEXON = [("Smart", 800000), ("Pure", 900000), ("Creative", 1050000)]
+
+
+def _store(nexon_smart=800000):
+    rows = [PriceRecord("Tata", "Nexon", "Petrol", "MT", v, nexon_smart if v == "Smart" else p, "Delhi")
+            for v, p in NEXON]
+    rows += [PriceRecord("Tata", "Tiago", "Petrol", "MT", "XE", 500000, "Delhi"),
+             PriceRecord("Kia", "Sonet", "Diesel", "AT", "HTX", 1200000, "Delhi")]
+    initialization.store_prices(rows)
+
+
+def _view():
+    return dataset.view(dataset.current(), "Delhi")
+
+
+def test_context_summarizes_all_models_and_details_only_mentioned_ones(fresh):
+    _store()
+    context = assistant.build_context(_view(), "Which Nexon variants are under 10 lakh?")
+    lines = context.splitlines()
+    assert lines[0] == "# models: brand|model|min_lakh|max_lakh|n_variants"
+    assert {"Kia|Sonet|12.00|12.00|1", "Tata|Tiago|5.00|5.00|1", "Tata|Nexon|8.00|10.50|3"} <= set(lines)
+    assert "Nexon: Smart (8.00), Pure (9.00), Creative (10.50)" in lines
+    assert "Tata|Nexon|Creative|Petrol|MT|10.50" in lines
+    assert not any(line.startswith(("Tiago:", "Sonet:")) for line in lines)
+
+
+def test_answers_are_cached_per_question_and_data_version(fresh, llm_server):
+    _store()
+    llm = llm_client.LLMClient(timeout=5)
+    cache = assistant.ResponseCache()
+
+    first = list(assistant.ask_stream(llm, _view(), "Cheapest Nexon?", cache))
+    assert "".join(first) == llm_server.reply and len(first) > 1  # streamed from the server
+    assert "Tata|Nexon|Smart|Petrol|MT|8.00" in llm_server.requests[0]["messages"][1]["content"]
+
+    # Same data version, same question (up to case and punctuation): one cached piece
+    assert list(assistant.ask_stream(llm, _view(), "cheapest  nexon", cache)) == [llm_server.reply]
+    assert len(llm_server.requests) == 1
+
+    # A write bumps the data version; the new snapshot's answer is asked for again
+    version = dataset.current().version
+    _store(nexon_smart=820000)
+    assert dataset.current().version != version
+    assert assistant.ask(llm, _view(), "Cheapest Nexon?", cache) == llm_server.reply
+    assert len(llm_server.requests) == 2
+    assert "Tata|Nexon|Smart|Petrol|MT|8.20" in llm_server.requests[1]["messages"][1]["content"]
+
+    # A different question misses too
+    assistant.ask(llm, _view(), "Cheapest Kia?", cache)
+    assert len(llm_server.requests) == 3
+
+
+def test_failed_answers_are_not_cached(fresh, llm_server):
+    _store()
+    llm_server.status = 500
+    llm = llm_client.LLMClient(timeout=5)
+    cache = assistant.ResponseCache()
+    try:
+        assistant.ask(llm, _view(), "Cheapest Nexon?", cache)
+    except llm_client.LLMUpstreamError:
+        pass
+    llm_server.status = 200
+    assert assistant.ask(llm, _view(), "Cheapest Nexon?", cache) == llm_server.reply
+    assert len(llm_server.requests) == 2
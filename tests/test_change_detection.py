@@ -0,0 +1,46 @@
+import initialization
+from records import PriceRecord
+
+
+def _row(model, variant, price, brand="Tata", city="Delhi"):
+    return PriceRecord(brand, model, "Petrol", "MT", variant, price, city)
+
+
+def _changes():
+    df = initialization.get_recent_changes()
+    return sorted(zip(df["model"], df["variant"], df["change"]))
+
+
+def test_price_moves_and_new_variants_are_reported(db):
+    initialization.store_prices([_row("Nexon", "Smart", 800000), _row("Nexon", "Pure", 900000)])
+    assert _changes() == []  # first scrape of a brand seeds the state silently
+
+    initialization.store_prices([
+        _row("Nexon", "Smart", 820000), _row("Nexon", "Pure", 900000), _row("Nexon", "Creative", 1000000),
+    ])
+    assert _changes() == [("Nexon", "Creative", "new"), ("Nexon", "Smart", "up")]
+
+
+def test_variant_dropped_from_a_scraped_model_is_discontinued(db):
+    initialization.store_prices([_row("Nexon", "Smart", 800000), _row("Nexon", "Pure", 900000)])
+    initialization.store_prices([_row("Nexon", "Smart", 800000)])
+    assert _changes() == [("Nexon", "Pure", "discontinued")]
+
+
+def test_failed_model_fetch_is_not_reported_as_discontinued(db):
+    first = [_row("Nexon", "Smart", 800000), _row("Tiago", "XE", 500000), _row("Tiago", "XZ", 600000)]
+    initialization.store_prices(first)
+
+    # The Tiago request failed: the snapshot has no Tiago rows at all
+    initialization.store_prices([_row("Nexon", "Smart", 800000)])
+    assert _changes() == []
+
+    # ...and when it comes back its variants are not "new" either
+    initialization.store_prices(first)
+    assert _changes() == []
+
+
+def test_new_model_of_a_known_brand_is_reported_as_new(db):
+    initialization.store_prices([_row("Nexon", "Smart", 800000)])
+    initialization.store_prices([_row("Nexon", "Smart", 800000), _row("Curvv", "Accomplished", 1500000)])
+    assert _changes() == [("Curvv", "Accomplished", "new")]
@@ -0,0 +1,95 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import dataset
+import initialization
+from records import PriceRecord
+
+
+def _row(model, variant, price, fuel="Petrol", city="Delhi"):
+    return PriceRecord("Tata", model, fuel, "MT", variant, price, city)
+
+
+def test_select_matches_the_sidebar_filters_and_carries_labels(fresh):
+    initialization.store_prices([_row("Nexon", "Smart", 800000), _row("Nexon", "Pure", 1250000, fuel="Diesel"),
+                                 _row("Tiago", "XE", 500000), _row("Nexon", "Smart", 820000, city="Mumbai")])
+    snapshot = dataset.current()
+    mask, rows = dataset.select(snapshot, "Delhi", ["Tata"], ["Nexon", "Tiago"], ["Petrol"], ["MT"], (0, 10))
+    assert mask.to_pylist() == [v == "Petrol" for v in dataset.view(snapshot, "Delhi")["fuel"]]
+    assert sorted(rows["label"]) == ["Smart (8.00L)", "XE (5.00L)"]
+    assert sorted(rows["variant_display"]) == ["Nexon - Smart", "Tiago - XE"]
+
+    page, n = dataset.page(snapshot, "Delhi", mask, ["price_lakhs"])
+    assert n == 2 and list(page["variant"]) == ["XE", "Smart"]
+
+
+def test_version_is_reread_only_after_a_commit(fresh):
+    initialization.store_prices([_row("Nexon", "Smart", 800000)])
+    first = dataset.current()
+    statements = []
+    dataset._watch.conn.set_trace_callback(statements.append)
+
+    initialization.init_db()  # runs on every rerun: must not count as a write
+    assert dataset.current() is first
+    assert statements == ["PRAGMA data_version"]
+
+    # A same-size write inside one mtime tick is still seen
+    conn = sqlite3.connect(initialization.DB_FILE)
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+    conn.commit()
+    conn.close()
+    assert dataset.current().version == first.version + 1
+
+
+def test_init_db_does_not_bump_the_data_version(fresh):
+    version = initialization.get_data_version()
+    for _ in range(3):
+        initialization.init_db()  # empty database: nothing to build again on each rerun
+        assert initialization.get_data_version() == version
+    initialization.store_prices([_row("Nexon", "Smart", 800000)])
+    initialization.init_db()
+    assert initialization.get_data_version() == version + 1
+
+
+def _catalog():
+    rows = []
+    for i in range(240):
+        model = ["Nexon", "Tiago", "Punch", "Harrier"][i % 4]
+        fuel = "Diesel" if i % 3 == 0 else "Petrol"
+        rows.append(_row(model, f"V{i % 37:02d}", 500000 + (i * 7919) % 1500000, fuel=fuel))
+    rows.append(_row("Nexon", "Smart", 800000, city="Mumbai"))
+    return rows
+
+
+@pytest.mark.parametrize("keys, descending", [
+    (["brand", "model", "price"], False), (["price"], True), (["model", "variant"], True)])
+def test_pages_follow_the_pandas_order(fresh, keys, descending):
+    initialization.store_prices(_catalog())
+    snapshot = dataset.current()
+    mask, _ = dataset.select(snapshot, "Delhi", ["Tata"], ["Nexon", "Tiago", "Punch"], ["Petrol"], ["MT"], (6, 18))
+    delhi = dataset.view(snapshot, "Delhi")
+    expected = delhi[mask.to_numpy(zero_copy_only=False)].sort_values(keys, ascending=not descending, kind="stable")
+
+    pages, n = [], None
+    for offset in range(0, len(expected) + 50, 50):
+        page, n = dataset.page(snapshot, "Delhi", mask, keys, descending, offset, 50)
+        pages.append(page)
+    got = pd.concat(pages, ignore_index=True)
+    assert n == len(expected) and 0 < n < len(delhi)
+    assert got[keys].values.tolist() == expected[keys].values.tolist()
+    assert pd.api.types.is_float_dtype(got["price_lakhs"])  # numbers, formatted by the table
+    order = snapshot.sort_orders[("Delhi", tuple(keys), descending)]
+    dataset.page(snapshot, "Delhi", mask, keys, descending)
+    assert snapshot.sort_orders[("Delhi", tuple(keys), descending)] is order  # computed once per snapshot
+
+
+def test_page_is_limited_to_the_city(fresh):
+    initialization.store_prices(_catalog())
+    snapshot = dataset.current()
+    mumbai = dataset.view(snapshot, "Mumbai")
+    page, n = dataset.page(snapshot, "Mumbai", [True] * len(mumbai), ["price"])
+    assert n == 1 and list(page["city"]) == ["Mumbai"]
+    page, n = dataset.page(snapshot, "Chennai", [], ["price"])
+    assert n == 0 and page.empty
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import decoding
+import parser_bench
+
+
+def _mg_payload(tmp_path):
+    parser_bench.generate_json(str(tmp_path), n_states=4, n_cities=3)
+    return (tmp_path / "mg_variants_0000.json").read_bytes()
+
+
+def _strip(value, keep):
+    """`value` with only the keys a schema declares, the way a schema decode returns it."""
+    if isinstance(value, list):
+        return [_strip(v, keep) for v in value]
+    if isinstance(value, dict):
+        return {k: _strip(v, keep) for k, v in value.items() if k in keep}
+    return value
+
+
+def test_schema_decode_keeps_only_the_fields_the_scrapers_read(tmp_path):
+    parser_bench.generate_json(str(tmp_path), n_states=2, n_cities=2)
+    payload = (tmp_path / "maruti_variants_0000.json").read_bytes()
+    decoded = decoding.decode(payload, "maruti_variants")
+    keep = {"data", "carVariantList", "items", "variantCd", "variantName", "fuelType", "transmission"}
+    assert decoded == _strip(json.loads(payload), keep)
+    assert decoding.decode(payload) == json.loads(payload)  # no schema: everything
+
+
+def test_missing_fields_stay_missing():
+    assert decoding.decode(b'{"modelPrice": [{"price": 750000, "extra": 1}]}', "hyundai_prices") == {
+        "modelPrice": [{"price": 750000}]}
+    assert decoding.decode(b'[{"variant": "SX"}]', "hyundai_prices") == [{"variant": "SX"}]
+
+
+def test_payload_of_another_shape_is_decoded_in_full():
+    payload = b'{"data": "maintenance", "code": 503}'
+    assert decoding.decode(payload, "maruti_variants") == {"data": "maintenance", "code": 503}
+
+
+@pytest.mark.parametrize("lazy", [True, False])
+def test_mg_blob_is_cut_down_to_the_scraped_states(tmp_path, monkeypatch, lazy):
+    payload = _mg_payload(tmp_path)
+    if not lazy:
+        monkeypatch.setattr(decoding, "msgspec", None)
+    models = decoding.decode_mg(payload, {"Delhi"})
+    full = json.loads(payload)
+    assert [m["modelLine"] for m in models] == [m["modelLine"] for m in full]
+    for model, raw in zip(models, full):
+        for variant, raw_variant in zip(model["variants"], raw["variants"]):
+            assert variant["model_text1"] == raw_variant["model_text1"]
+            assert [p["State"] for p in variant["pricing"]] == ["Delhi"]
+            delhi = next(p for p in raw_variant["pricing"] if p["State"] == "Delhi")
+            assert [(c["City"], c["price"]) for c in variant["pricing"][0]["cities"]] == [
+                (c["City"], c["price"]) for c in delhi["cities"]]
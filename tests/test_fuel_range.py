@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+import figures
+
+ORDER = ["Nexon", "Tiago", "Harrier"]
+
+
+def _rows():
+    rows = [
+        ("Nexon", "Petrol", 8.0), ("Nexon", "Petrol", 11.5), ("Nexon", "Diesel", 10.0), ("Nexon", "CNG", 9.0),
+        ("Tiago", "CNG", 6.1), ("Tiago", "Petrol", 5.0), ("Tiago", "EV", 7.9),
+        ("Harrier", "Diesel", 15.5), ("Harrier", "Diesel", 24.0),
+        ("Curvv", "Petrol", 10.0),  # not in the model order: placed after it
+    ]
+    df = pd.DataFrame(rows, columns=["model", "fuel", "price_lakhs"])
+    return df.assign(label=[f"{m} {f} ({p:.2f}L)" for m, f, p in rows])
+
+
+def _reference_x(models, fuels, model, fuel):
+    """The per-model, per-fuel position the chart's original loops computed."""
+    bar_width = 0.8 / len(fuels)
+    i = fuels.index(fuel)
+    return models.index(model) - 0.4 + (i + 0.5) * bar_width + i * figures.FUEL_GROUP_GAP
+
+
+@pytest.mark.parametrize("webgl", [False, True])
+def test_bars_and_points_sit_at_their_model_and_fuel_slot(webgl):
+    df = _rows()
+    df_range = df.groupby(["model", "fuel"])["price_lakhs"].agg(min_price="min", max_price="max").reset_index()
+    fig = figures._fuel_range_figure(df_range, df, ORDER, webgl=webgl, labels=True)
+
+    models = ORDER + ["Curvv"]
+    fuels = ["Petrol", "CNG", "Diesel", "EV"]  # FUEL_ORDER first, then the others sorted
+    assert len(fig.data) == 2
+    bars, points = fig.data
+    assert list(fig.layout.xaxis.ticktext) == models and list(fig.layout.xaxis.tickvals) == [0, 1, 2, 3]
+
+    for x, (model, fuel, low, high), base, height in zip(
+            bars.x, bars.customdata, bars.base, bars.y):
+        assert x == pytest.approx(_reference_x(models, fuels, model, fuel))
+        assert (base, base + height) == pytest.approx((low, high))
+    expected = [_reference_x(models, fuels, m, f) for m, f in zip(df["model"], df["fuel"])]
+    assert list(points.x) == pytest.approx(expected)
+    assert list(points.text) == list(df["label"])
+    assert points.type == ("scattergl" if webgl else "scatter")
+
+
+def test_points_without_a_bar_are_left_out():
+    df = _rows()
+    df_range = df[df["model"] != "Harrier"].groupby(["model", "fuel"])["price_lakhs"].agg(
+        min_price="min", max_price="max").reset_index()
+    fig = figures._fuel_range_figure(df_range, df.assign(fuel=df["fuel"].where(df["model"] != "Tiago")),
+                                     ORDER, webgl=False, labels=False)
+    points = fig.data[1]
+    assert set(points.text) == set(df.query("model in ['Nexon', 'Curvv']")["label"])
+    assert points.mode == "markers"
+    # one colour index per point, so all fuels fit in one trace
+    assert len(points.marker.color) == len(points.x)
@@ -0,0 +1,72 @@
+import io
+import zipfile
+
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import figures
+import image_export
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Stand-in renderer that records every figure it is asked to draw."""
+    calls = []
+
+    def render(fig, format, scale, width, height):
+        calls.append(fig.layout.title.text)
+        return f"{fig.layout.title.text}|{format}|{scale}".encode()
+
+    monkeypatch.setattr(image_export, "_render", render)
+    monkeypatch.setattr(image_export, "_image_cache", type(image_export._image_cache)())
+    return calls
+
+
+def _fig(title):
+    return go.Figure(go.Bar(x=[1, 2], y=[3, 4]), layout={"title": {"text": title}})
+
+
+def test_source_key_skips_serializing_the_figure(monkeypatch):
+    fig = _fig("a")
+    monkeypatch.setattr(type(fig), "to_json", lambda self: pytest.fail("figure was serialized"))
+    source = figures.figure_key("abc", ["Nexon"], "Price Range", False)
+    assert image_export.figure_key(fig, source=source) == image_export.figure_key(_fig("b"), source=source)
+    assert image_export.figure_key(fig, source=source) != image_export.figure_key(fig, scale=2, source=source)
+
+
+def test_figures_without_a_source_are_keyed_on_their_content():
+    assert image_export.figure_key(_fig("a")) == image_export.figure_key(_fig("a"))
+    assert image_export.figure_key(_fig("a")) != image_export.figure_key(_fig("b"))
+
+
+def test_repeat_exports_come_from_the_cache(renders):
+    assert image_export.export_image(_fig("a"), source="k1") == b"a|png|1"
+    assert image_export.export_image(_fig("a"), source="k1") == b"a|png|1"
+    image_export.export_image(_fig("a"), scale=2, source="k1")
+    assert renders == ["a", "a"]
+
+
+def test_cache_evicts_the_least_recently_used(renders, monkeypatch):
+    monkeypatch.setattr(image_export, "IMAGE_CACHE_SIZE", 2)
+    for key in ("k1", "k2", "k1", "k3"):  # k2 is the oldest when k3 arrives
+        image_export.export_image(_fig(key), source=key)
+    assert image_export.cached_image(image_export.figure_key(None, source="k1")) is not None
+    assert image_export.cached_image(image_export.figure_key(None, source="k2")) is None
+
+
+def test_zip_renders_only_the_missing_images(renders):
+    image_export.export_image(_fig("a"), source="k1")
+    data = image_export.export_zip([("first", _fig("a")), ("second", _fig("b"))], sources=["k1", "k2"])
+    assert renders == ["a", "b"]
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.read("first.png") == b"a|png|1" and zf.read("second.png") == b"b|png|1"
+
+
+def test_dashboard_figure_key_follows_the_data():
+    df = pd.DataFrame({"brand": ["Tata"], "model": ["Nexon"], "variant": ["Smart"], "price_lakhs": [8.0]})
+    changed = df.assign(price_lakhs=[8.2])
+    key = figures.figure_key(figures.data_fingerprint(df), ["Nexon"], "Price Range", False)
+    assert key == figures.figure_key(figures.data_fingerprint(df.copy()), ["Nexon"], "Price Range", False)
+    assert key != figures.figure_key(figures.data_fingerprint(changed), ["Nexon"], "Price Range", False)
+    assert key != figures.figure_key(figures.data_fingerprint(df), ["Nexon"], "Price Range", True)
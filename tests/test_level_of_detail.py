@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import figures
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 300), (301, 300), (10, 3)])
+def test_lttb_keeps_the_ends_and_hits_the_target_count(n, n_out):
+    x = np.arange(n, dtype=float)
+    y = np.sin(x / 7.0)
+    idx = figures.lttb_indices(x, y, n_out)
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_a_lone_spike():
+    y = np.zeros(1000)
+    y[437] = 50.0
+    idx = figures.lttb_indices(np.arange(1000), y, 50)
+    assert 437 in idx
+
+
+def test_lttb_leaves_short_series_alone():
+    assert list(figures.lttb_indices([0, 1, 2], [5, 6, 7], 10)) == [0, 1, 2]
+
+
+def _history(days, series, step_every=1):
+    dates = pd.date_range("2025-01-01", periods=days, freq="D")
+    return pd.concat([
+        pd.DataFrame({"label": name, "date": dates,
+                      "price_lakhs": 8.0 + (np.arange(days) // step_every) * 0.01 * (i + 1)})
+        for i, name in enumerate(series)
+    ], ignore_index=True)
+
+
+def test_step_series_drop_flat_days_without_losing_a_change():
+    df = _history(400, ["Nexon Smart"], step_every=50)  # eight price levels
+    out = figures.downsample_step_series(df, "label", "date", "price_lakhs")
+    assert set(out["price_lakhs"]) == set(df["price_lakhs"])
+    assert out["date"].iloc[0] == df["date"].iloc[0] and out["date"].iloc[-1] == df["date"].iloc[-1]
+    assert len(out) < 20
+
+
+def test_step_series_are_capped_per_series():
+    df = _history(1000, ["Nexon Smart", "Tiago XE"])  # a new price every day
+    out = figures.downsample_step_series(df, "label", "date", "price_lakhs", max_points=120)
+    assert out.groupby("label").size().to_dict() == {"Nexon Smart": 120, "Tiago XE": 120}
+
+
+def _rows(n):
+    return pd.DataFrame({
+        "brand": "Tata", "model": [f"M{i % 20}" for i in range(n)], "fuel": "Petrol", "transmission": "MT",
+        "variant": [f"V{i}" for i in range(n)], "price_lakhs": np.linspace(5, 25, n),
+        "label": [f"V{i}" for i in range(n)],
+    })
+
+
+@pytest.mark.parametrize("chart_type", ["Price Range", "Fuel-wise Range Bar", "Scatter Plot"])
+def test_large_charts_switch_to_webgl_without_labels(chart_type):
+    order = [f"M{i}" for i in range(20)]
+    small = figures.build_dashboard_figure(_rows(figures.LABEL_BUDGET), order, chart_type, False)
+    large = figures.build_dashboard_figure(_rows(figures.WEBGL_POINT_THRESHOLD + 1), order, chart_type, False)
+    assert {t.type for t in small.data} <= {"bar", "scatter"}
+    assert any("text" in (t.mode or "") for t in small.data if t.type == "scatter")
+    assert "scattergl" in {t.type for t in large.data}
+    assert not any("text" in (t.mode or "") for t in large.data if t.type == "scattergl")
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+import llm_client
+
+MESSAGES = [{"role": "user", "content": "cheapest Nexon?"}]
+MODEL = "mock-model"
+
+
+def _client(**kwargs):
+    kwargs.setdefault("timeout", 5)
+    return llm_client.LLMClient(**kwargs)
+
+
+def _wait_idle(client, deadline=5):
+    end = time.monotonic() + deadline
+    while client.stats()["pending"] and time.monotonic() < end:
+        time.sleep(0.01)
+    return client.stats()
+
+
+def test_tokens_stream_as_they_arrive(llm_server):
+    llm_server.chunk_delay = 0.1
+    client = _client()
+    start = time.monotonic()
+    arrivals, chunks = [], []
+    for chunk in client.stream(MESSAGES, MODEL):
+        arrivals.append(time.monotonic() - start)
+        chunks.append(chunk)
+    assert "".join(chunks) == llm_server.reply
+    assert len(chunks) > 1 and arrivals[0] < arrivals[-1] - 0.2  # not buffered until the end
+    assert llm_server.requests[0]["stream"] is True and llm_server.requests[0]["messages"] == MESSAGES
+    assert _wait_idle(client) == {"pending": 0, "inflight_prompts": 0}
+
+
+def test_identical_prompts_share_one_upstream_call(llm_server):
+    llm_server.delay = 0.3
+    client = _client()
+    answers = [None] * 3
+
+    def ask(i):
+        answers[i] = client.complete(MESSAGES, MODEL)
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert answers == [llm_server.reply] * 3
+    assert len(llm_server.requests) == 1
+
+    client.complete([{"role": "user", "content": "cheapest Tiago?"}], MODEL)
+    assert len(llm_server.requests) == 2
+
+
+def test_queue_limit_rejects_new_prompts_but_lets_identical_ones_join(llm_server):
+    llm_server.delay = 0.5
+    client = _client(max_concurrency=1, max_queue=2)
+    first = client.stream(MESSAGES, MODEL)
+    second = client.stream([{"role": "user", "content": "second"}], MODEL)
+    with pytest.raises(llm_client.LLMBusyError):
+        client.stream([{"role": "user", "content": "third"}], MODEL)
+    joined = client.stream(MESSAGES, MODEL)  # same prompt as `first`: no new slot needed
+
+    assert "".join(first) == "".join(second) == "".join(joined) == llm_server.reply
+    assert _wait_idle(client)["pending"] == 0
+    assert client.complete([{"role": "user", "content": "third"}], MODEL) == llm_server.reply
+
+
+def test_slow_upstream_times_out_and_frees_its_slot(llm_server):
+    llm_server.delay = 1.0
+    client = _client(timeout=0.3)
+    with pytest.raises(llm_client.LLMTimeoutError):
+        client.complete(MESSAGES, MODEL)
+    assert _wait_idle(client) == {"pending": 0, "inflight_prompts": 0}
+
+
+def test_upstream_errors_surface_as_client_errors(llm_server):
+    llm_server.status = 503
+    with pytest.raises(llm_client.LLMUpstreamError, match="503"):
+        _client().complete(MESSAGES, MODEL)
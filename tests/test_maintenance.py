@@ -0,0 +1,72 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+import maintenance
+
+
+def _at(days_ago, hour=12):
+    return (datetime.combine(date.today(), time(hour)) - timedelta(days=days_ago)).isoformat()
+
+
+@pytest.fixture
+def conn(db, monkeypatch):
+    monkeypatch.setattr(maintenance, "BATCH_PAUSE", 0)
+    conn = maintenance._connect(db)
+    yield conn
+    conn.close()
+
+
+def _insert(conn, timestamp, source, brand, model, variant, price=800000):
+    return conn.execute(
+        "INSERT INTO prices (timestamp, brand, model, fuel, transmission, variant, price, source, city) "
+        "VALUES (?, ?, ?, 'Petrol', 'MT', ?, ?, ?, 'Delhi')",
+        (timestamp, brand, model, variant, price, source),
+    ).lastrowid
+
+
+def _kept(conn, ids):
+    rows = conn.execute(f"SELECT id FROM prices WHERE id IN ({','.join('?' * len(ids))})", ids).fetchall()
+    return {r[0] for r in rows}
+
+
+def test_recent_rows_are_all_kept(conn):
+    ids = [_insert(conn, _at(d, h), "scraped", "Tata", "Nexon", "Smart") for d in range(1, 20) for h in (9, 18)]
+    assert maintenance.prune_history(conn) == 0
+    assert _kept(conn, ids) == set(ids)
+
+
+def test_older_rows_keep_the_last_of_each_day(conn):
+    days = {d: [_insert(conn, _at(d, h), "scraped", "Tata", "Nexon", "Smart") for h in (9, 13, 18)]
+            for d in range(40, 46)}
+    _insert(conn, _at(2), "scraped", "Tata", "Nexon", "Smart")  # today's snapshot
+    assert maintenance.prune_history(conn, batch=4) == 12
+    assert _kept(conn, [i for ids in days.values() for i in ids]) == {ids[-1] for ids in days.values()}
+
+
+def test_oldest_rows_keep_the_last_of_each_week(conn):
+    ids = {d: _insert(conn, _at(d), "scraped", "Tata", "Tiago", "XE") for d in range(420, 399, -1)}  # oldest first, as refreshes append
+    _insert(conn, _at(2), "scraped", "Tata", "Nexon", "Smart")
+    maintenance.prune_history(conn)
+    weeks = {}  # rows collapse onto the Sunday ending their week, as SQLite's date(ts, 'weekday 0')
+    for d, row_id in ids.items():
+        day = date.today() - timedelta(days=d)
+        weeks.setdefault(day + timedelta(days=(6 - day.weekday()) % 7), []).append((day, row_id))
+    assert _kept(conn, list(ids.values())) == {max(rows)[1] for rows in weeks.values()}
+
+
+def test_latest_snapshots_and_manual_rows_are_never_thinned(conn):
+    earlier_scrape = _insert(conn, _at(60, 9), "scraped", "Tata", "Nexon", "Smart")
+    # the latest snapshot lists Smart twice: only one would survive as the day's last row
+    scraped = [_insert(conn, _at(60, 18), "scraped", "Tata", "Nexon", "Smart", p) for p in (800000, 810000)]
+    earlier_kia_pdf = _insert(conn, _at(100, 9), "pdf", "Kia", "Sonet", "HTE")
+    kia_pdf = [_insert(conn, _at(100, 17), "pdf", "Kia", "Sonet", "HTE", p) for p in (790000, 799000)]
+    mg_pdf = [_insert(conn, _at(80, 17), "pdf", "MG", "Astor", "Sprint", p) for p in (999000, 1010000)]
+    manual = [_insert(conn, _at(500, h), "manual", "Tata", "Punch", "Pure") for h in (9, 18)]
+
+    assert maintenance.prune_history(conn, dry_run=True) == 2
+    assert conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0] == 10
+    assert maintenance.prune_history(conn) == 2
+    assert _kept(conn, [earlier_scrape, earlier_kia_pdf]) == set()
+    keep = scraped + kia_pdf + mg_pdf + manual
+    assert _kept(conn, keep) == set(keep)
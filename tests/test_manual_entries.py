@@ -0,0 +1,54 @@
+import initialization
+from records import PriceRecord
+
+STAMPS = ["2025-03-01T10:00:00", "2025-03-02T10:00:00", "2025-03-03T10:00:00"]
+MODELS = [("Nexon", "Smart"), ("Tiago", "XE"), ("Punch", "Pure")]
+
+
+def _add_manual(n=25):
+    for i in range(n):
+        model, variant = MODELS[i % 3]
+        city = "Mumbai" if i % 5 == 0 else "Delhi"
+        # only three timestamps: most rows tie with others on the sort key's first column
+        initialization.add_price("Tata", model, variant, 500000 + i * 1000, "Petrol", "MT", STAMPS[i % 3], city)
+
+
+def _all_pages(search="", limit=4):
+    ids, after, pages = [], None, 0
+    while True:
+        df, after = initialization.get_manual_entries(search, limit=limit, after=after)
+        ids += df["id"].tolist()
+        pages += 1
+        if after is None:
+            return ids, pages
+
+
+def test_pages_cover_every_manual_row_once_across_timestamp_ties(db):
+    initialization.store_prices([PriceRecord("Tata", "Nexon", "Petrol", "MT", "Smart", 800000, "Delhi")])
+    _add_manual()
+    ids, pages = _all_pages()
+    full, cursor = initialization.get_manual_entries(limit=100)
+    assert cursor is None and len(full) == 25
+    expected = full.sort_values(["timestamp", "id"], ascending=False)["id"].tolist()
+    assert ids == expected and pages == 7
+
+
+def test_cursor_is_the_last_row_of_the_page(db):
+    _add_manual()
+    page, cursor = initialization.get_manual_entries(limit=10)
+    assert cursor == (page["timestamp"].iloc[-1], int(page["id"].iloc[-1]))
+    # exactly `limit` rows left: the page that takes them is the last one
+    page, cursor = initialization.get_manual_entries(limit=15, after=cursor)
+    assert len(page) == 15 and cursor is None
+
+
+def test_search_narrows_the_pages(db):
+    _add_manual()
+    ids, _ = _all_pages("nexon")
+    assert len(ids) == 9
+    full, _ = initialization.get_manual_entries(limit=100)
+    by_id = full.set_index("id")
+    assert set(by_id.loc[ids, "model"]) == {"Nexon"}
+    assert set(by_id.loc[_all_pages("mumbai")[0], "city"]) == {"Mumbai"}
+    assert set(by_id.loc[_all_pages("XE")[0], "variant"]) == {"XE"}  # too short for the trigram index
+    assert set(_all_pages("tiago mumb")[0]) == set(full.query("model == 'Tiago' and city == 'Mumbai'")["id"])
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+import manual_import
+
+
+def _normalize(prices, price_column="price"):
+    return manual_import.normalize(pd.DataFrame({
+        "brand": "Tata", "model": "Nexon", "variant": [f"V{i}" for i in range(len(prices))],
+        price_column: prices,
+    }))
+
+
+@pytest.mark.parametrize("text, rupees", [
+    ("849000", 849000),
+    ("8,49,000", 849000),
+    ("Rs. 8,49,000", 849000),
+    ("Rs 8,49,000", 849000),
+    ("rs.849000", 849000),
+    ("INR 8,49,000", 849000),
+    ("₹ 8,49,000", 849000),
+    ("₹8,49,000/-", 849000),
+    ("849000.0", 849000),
+    ("8.49 lakh", 849000),
+    ("8.49 Lakhs", 849000),
+    ("8.49L", 849000),
+    ("₹ 8.49 lac", 849000),
+    ("1.2 Cr", 12000000),
+    ("1.25 crore", 12500000),
+])
+def test_price_formats(text, rupees):
+    df = _normalize([text])
+    assert df.loc[0, "error"] == ""
+    assert df.loc[0, "price"] == rupees
+
+
+def test_lakhs_column_takes_plain_numbers_as_lakhs():
+    df = _normalize(["8.49", "Rs. 12.5"], price_column="price (lakhs)")
+    assert list(df["price"]) == [849000, 1250000]
+    assert list(df["error"]) == ["", ""]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("8.49", "price ambiguous"),               # lakhs or rupees? the sheet must say
+    ("0.849 lakh", "price out of range"),      # ₹84,900
+    ("8490", "price out of range"),
+    ("8,49,000 - 9,10,000", "price unreadable"),
+    ("8.49.000", "price unreadable"),
+    ("on request", "price unreadable"),
+    ("", "price unreadable"),
+])
+def test_ambiguous_or_unreadable_prices_are_errors(text, message):
+    df = _normalize([text])
+    assert df.loc[0, "error"].startswith(message)
+
+
+def test_currency_dot_is_not_a_decimal_point():
+    # "Rs." used to leave ".849000" behind, read as 0.849 lakh
+    assert _normalize(["Rs. 8,49,000"]).loc[0, "price"] == 849000
+
+
+def test_unreadable_row_does_not_shadow_a_valid_duplicate(db):
+    raw = pd.DataFrame({"brand": "Tata", "model": "Nexon", "variant": ["Smart", "Smart", "Pure", "Pure"],
+                        "price": ["8,49,000", "on request", "9,00,000", "9,10,000"]})
+    df = manual_import.preview(raw)
+    assert list(df["status"]) == [manual_import.STATUS_NEW, manual_import.STATUS_INVALID,
+                                  manual_import.STATUS_DUPLICATE, manual_import.STATUS_NEW]
+    assert manual_import.import_rows(df) == 2
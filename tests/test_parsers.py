@@ -0,0 +1,32 @@
+import os
+
+import parser_bench
+import parsers
+import scraping
+
+
+def test_toyota_iterparse_matches_the_soup_parser(tmp_path):
+    parser_bench.generate_toyota(str(tmp_path), n_models=2, n_grades=24)
+    for name in sorted(os.listdir(tmp_path)):
+        with open(tmp_path / name, "rb") as f:
+            payload = f.read()
+        rows = parsers.parse_toyota_prices(payload, "Hyryder", scraping.DEFAULT_CITY)
+        assert len(rows) == 24
+        assert rows == parser_bench.soup_toyota_prices(payload, "Hyryder")
+
+
+def test_toyota_prices_without_grade_or_amount():
+    payload = (b"<ArrayOfPrice xmlns='urn:toyota'>"
+               b"<Price><PriceGrade><Colours><Colour><Name>White</Name></Colour></Colours>"
+               b"<Name>VX 2WD Hybrid [AT]</Name><FuelType>h</FuelType>"
+               b"<Details>AT</Details></PriceGrade><Amount>1990000</Amount></Price>"
+               b"<Price><Amount>on request</Amount></Price></ArrayOfPrice>")
+    rows = parsers.parse_toyota_prices(payload, "Hyryder", "Delhi")
+    assert rows == parser_bench.soup_toyota_prices(payload, "Hyryder")
+    assert [(r.variant, r.fuel, r.transmission, r.price) for r in rows] == [
+        ("VX Hybrid ", "Hybrid", "AT", 1990000), ("", "NA", "", None)]
+
+
+def test_toyota_empty_payload_has_no_rows():
+    assert parsers.parse_toyota_prices(b"", "Hyryder", "Delhi") == []
+    assert parsers.parse_toyota_prices(b"  \n", "Hyryder", "Delhi") == []
@@ -0,0 +1,24 @@
+import pytest
+
+import pdf_ingest
+import records
+import scraping
+
+
+@pytest.mark.parametrize("name, brand", [
+    ("tata_nexon_pricelist.pdf", "Tata"),
+    ("kia_sonet.pdf", "Kia"),
+    ("KIA-Seltos-2025.pdf", "Kia"),
+    ("mg_hector.pdf", "MG"),
+    ("Maruti Suzuki Arena.pdf", "Maruti"),
+    ("folder/toyota.pdf", "Toyota"),
+    ("bmw_x1.pdf", "BMW"),      # not scraped, but an acronym
+    ("skoda_kylaq.pdf", "Skoda"),
+    ("jeep_compass.pdf", "Jeep"),
+])
+def test_brand_from_filename_uses_the_scrapers_spelling(name, brand):
+    assert pdf_ingest.brand_from_filename(name) == brand
+
+
+def test_known_brands_are_the_scraped_ones():
+    assert set(records.BRAND_NAMES) == set(scraping.BRAND_PLANNERS)
@@ -0,0 +1,53 @@
+import json
+import threading
+
+import profiler
+
+
+def test_spans_are_offsets_from_the_rerun_start():
+    prof = profiler.RerunProfiler()
+    with prof.span("db_load"):
+        pass
+    with prof.span("filters"):
+        pass
+    record = prof.to_record()
+    assert [s["name"] for s in record["spans"]] == ["db_load", "filters"]
+    assert record["spans"][1]["start_ms"] >= record["spans"][0]["start_ms"]
+    assert record["total_ms"] == round(prof.total() * 1000, 2)
+
+
+def test_previous_rerun_is_flushed_once_when_the_next_starts(tmp_path):
+    path = str(tmp_path / "timings.jsonl")
+    state = {}
+    first = profiler.start_rerun(state, path)
+    with first.span("db_load"):
+        pass
+    second = profiler.start_rerun(state, path)  # the script may have ended with st.stop()
+    assert state["_last_rerun_profiler"] is first and state["_rerun_profiler"] is second
+    profiler.start_rerun(state, path)  # `second` has no spans: nothing to log
+    assert [r["spans"][0]["name"] for r in profiler.read_log(path)] == ["db_load"]
+    assert first.flushed
+
+
+def test_concurrent_appends_keep_every_record_and_trim_to_the_window(tmp_path):
+    path = str(tmp_path / "timings.jsonl")
+    record = {"timestamp": "t", "total_ms": 1.0, "spans": [{"name": "x" * 200, "start_ms": 0, "duration_ms": 1}]}
+
+    def session(n):
+        for i in range(50):
+            profiler.append_log(dict(record, total_ms=n * 1000 + i), path, max_lines=100)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]  # no torn or interleaved lines
+    # Trimmed back to the last 100 at some point, then appended to again until twice that size
+    assert 100 <= len(lines) < 200
+    per_session = {}
+    for r in lines:
+        per_session.setdefault(int(r["total_ms"]) // 1000, []).append(int(r["total_ms"]) % 1000)
+    assert all(seq == sorted(seq) for seq in per_session.values())
+    assert max(max(seq) for seq in per_session.values()) == 49
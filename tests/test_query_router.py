@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import query_router
+
+ROWS = [
+    # brand, model, fuel, transmission, variant, price_lakhs
+    ("Tata", "Nexon", "Petrol", "MT", "Smart", 8.0),
+    ("Tata", "Nexon", "Diesel", "AMT", "Creative", 12.5),
+    ("Tata", "Tiago", "Petrol", "MT", "XE", 5.0),
+    ("Kia", "Seltos", "Diesel", "6AT", "GTX", 19.0),
+    ("Kia", "Sonet", "Petrol", "MT", "HTE", 7.5),
+]
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(ROWS, columns=["brand", "model", "fuel", "transmission", "variant", "price_lakhs"]).assign(
+        city="Delhi")
+
+
+def _no_history(since, brands):
+    raise AssertionError("history should not be read")
+
+
+def _route(question, df, history_loader=_no_history):
+    return query_router.route(question, df, history_loader)
+
+
+@pytest.mark.parametrize("question, variants", [
+    ("Cheapest diesel automatic under 15 lakh?", ["Creative"]),
+    ("what are the top 2 most expensive cars", ["GTX", "Creative"]),
+    ("lowest priced Kia", ["HTE"]),
+])
+def test_extreme(df, question, variants):
+    result = _route(question, df)
+    assert result.intent == "extreme"
+    assert list(result.table["variant"]) == variants
+
+
+@pytest.mark.parametrize("question, first", [
+    ("Which brand has the highest average price?", ("brand", "Kia")),
+    ("which brand has the cheapest average price", ("brand", "Tata")),
+    ("average price of the most expensive models per brand", ("brand", "Kia")),
+    ("mean price of petrol cars by model", ("model", "Tiago")),
+])
+def test_average_wins_over_ranking_words(df, question, first):
+    result = _route(question, df)
+    assert result.intent == "average"
+    by, name = first
+    assert result.table.columns[0] == by and result.table.iloc[0][by] == name
+
+
+@pytest.mark.parametrize("question", [
+    "price difference between Nexon Smart and Seltos GTX",
+    "Nexon Smart vs Seltos GTX",
+])
+def test_gap(df, question):
+    result = _route(question, df)
+    assert result.intent == "gap"
+    assert list(result.table["variant"]) == ["Smart", "GTX"]
+    assert "₹11.00" in result.answer
+
+
+@pytest.mark.parametrize("question, answer", [
+    ("How many diesel variants are there?", "2 variant(s) across 2 model(s)"),
+    ("how many of the cheapest petrol cars are under 8 lakh", "3 variant(s) across 3 model(s)"),
+])
+def test_count_wins_over_ranking_words(df, question, answer):
+    result = _route(question, df)
+    assert result.intent == "count"
+    assert result.answer.startswith(answer)
+
+
+def test_changes_wins_over_ranking_words(df):
+    now = datetime.now()
+
+    def history(since, brands):
+        return pd.DataFrame({
+            "brand": ["Tata", "Tata"], "model": ["Nexon", "Nexon"], "fuel": ["Petrol", "Petrol"],
+            "transmission": ["MT", "MT"], "variant": ["Smart", "Smart"], "price": [800000, 820000],
+            "city": ["Delhi", "Delhi"], "timestamp": [now.replace(hour=0).isoformat(), now.isoformat()],
+        })
+
+    result = _route("which models had the highest price increase this week", df, history)
+    assert result.intent == "changes"
+    assert "Tata Nexon: 1 variant(s), avg +2.50%" in result.answer
+
+
+def test_open_questions_fall_back_to_the_llm(df):
+    assert _route("is the Nexon a good family car", df) is None
@@ -0,0 +1,54 @@
+import pickle
+
+import pytest
+
+import records
+from records import PriceRecord
+
+
+def _row(variant="Smart", price=800000, city="Delhi"):
+    # Built from fresh (non-literal) strings, the way parsed payload text arrives
+    return PriceRecord("".join(["Ta", "ta"]), "".join(["Nex", "on"]), "Petrol", "MT", variant, price,
+                       "".join(["Del", "hi"]) if city == "Delhi" else city)
+
+
+def test_records_have_no_instance_dict():
+    with pytest.raises(AttributeError):
+        _row().__dict__
+    with pytest.raises(AttributeError):
+        _row().colour = "Red"
+
+
+def test_repeated_fields_share_one_string():
+    a, b = _row("Smart"), _row("Pure")
+    assert a.brand is b.brand and a.model is b.model and a.city is b.city
+
+
+def test_dedupe_keeps_the_first_of_each_key_in_order():
+    rows = [_row("Smart"), _row("Pure"), _row("Smart"), _row("Smart", price=810000), _row("Smart", city="Mumbai")]
+    kept = list(records.dedupe(rows))
+    assert [(r.variant, r.price, r.city) for r in kept] == [
+        ("Smart", 800000, "Delhi"), ("Pure", 800000, "Delhi"), ("Smart", 810000, "Delhi"), ("Smart", 800000, "Mumbai")]
+    assert kept[0] is rows[0]
+
+
+def test_dedupe_across_batches_with_a_shared_seen_set():
+    seen = set()
+    assert len(list(records.dedupe([_row("Smart"), _row("Pure")], seen))) == 2
+    assert [r.variant for r in records.dedupe([_row("Pure"), _row("Creative")], seen)] == ["Creative"]
+
+
+def test_pickled_records_come_back_equal_and_interned():
+    row = _row()
+    copy = pickle.loads(pickle.dumps(row))
+    assert copy == row and hash(copy) == hash(row)
+    assert copy.brand is _row().brand
+
+
+def test_legacy_dicts_are_accepted():
+    legacy = {"Brand": "Tata", "Model": "Nexon", "Fuel": "Petrol", "Transmission": "MT",
+              "Variant": "Smart", "Price": 800000}
+    assert records.as_record(legacy, "Delhi") == _row()
+    assert records.as_record(dict(legacy, City="Mumbai"), "Delhi").city == "Mumbai"
+    row = _row()
+    assert records.as_record(row, "Mumbai") is row
@@ -0,0 +1,112 @@
+import json
+import threading
+
+import pytest
+
+import scraping
+from records import PriceRecord
+
+
+@pytest.fixture
+def city_codes(monkeypatch):
+    codes = {
+        "Delhi": {"Tata": "India-DL-DELHI", "MG": ("Delhi", "Delhi")},
+        "Mumbai": {"Tata": "India-MH-MUMBAI"},
+    }
+    monkeypatch.setattr(scraping, "CITY_CODES", codes)
+    return codes
+
+
+def test_brand_cities_skips_cities_without_a_code(city_codes):
+    assert scraping.brand_cities("Tata") == [("Delhi", "India-DL-DELHI"), ("Mumbai", "India-MH-MUMBAI")]
+    assert scraping.brand_cities("MG") == [("Delhi", ("Delhi", "Delhi"))]
+    assert scraping.brand_cities("Tata", ["Mumbai", "Pune"]) == [("Mumbai", "India-MH-MUMBAI")]
+    assert scraping.brand_cities("Kia") == []
+
+
+def test_city_codes_file_extends_and_overrides(city_codes, tmp_path):
+    path = tmp_path / "city_codes.json"
+    path.write_text(json.dumps({"Mumbai": {"MG": ["Maharashtra", "Mumbai"]}, "Pune": {"Tata": "India-MH-PUNE"}}))
+    scraping._load_city_codes(str(path))
+    assert city_codes["Mumbai"] == {"Tata": "India-MH-MUMBAI", "MG": ("Maharashtra", "Mumbai")}
+    assert scraping.brand_cities("Tata", ["Pune"]) == [("Pune", "India-MH-PUNE")]
+
+
+def test_missing_or_broken_city_codes_file_changes_nothing(city_codes, tmp_path, capsys):
+    before = json.dumps(city_codes)
+    scraping._load_city_codes(str(tmp_path / "missing.json"))
+    broken = tmp_path / "broken.json"
+    broken.write_text("{")
+    scraping._load_city_codes(str(broken))
+    assert json.dumps(city_codes) == before
+    assert "Could not read" in capsys.readouterr().out
+
+
+def test_metadata_is_loaded_once_per_run():
+    loads = []
+    gate = threading.Barrier(4)
+
+    def load():
+        loads.append(1)
+        return {"models": ["Nexon"]}
+
+    def job(city):
+        gate.wait(5)  # all four ask for the key at once
+        models = scraping.shared_metadata(("tata", "models"), load)["models"]
+        return [PriceRecord("Tata", m, "Petrol", "MT", "Smart", 800000, city) for m in models]
+
+    jobs = [(job, (city,)) for city in ("Delhi", "Mumbai", "Chennai", "Pune")]
+    assert len(scraping.run_jobs(jobs, max_workers=4, parse_workers=1)) == 4
+    assert len(loads) == 1
+    scraping.run_jobs(jobs, max_workers=4, parse_workers=1)  # a new run fetches fresh metadata
+    assert len(loads) == 2
+
+
+def test_metadata_outside_a_run_is_not_cached():
+    loads = []
+    for _ in range(2):
+        scraping.shared_metadata("key", lambda: loads.append(1))
+    assert len(loads) == 2
+
+
+def _parse(marker_dir, name, delay):
+    """Parse stand-in (runs in a worker process): a row per payload, and a marker file when done."""
+    import os
+    import time
+
+    time.sleep(delay)
+    open(os.path.join(marker_dir, name), "w").close()
+    return [PriceRecord("Toyota", "Hyryder", "Petrol", "MT", name, 1100000, "Delhi")]
+
+
+def test_parse_tasks_are_parsed_in_workers_and_hold_back_fetching(tmp_path):
+    started_after = []
+
+    def fetch(name):
+        started_after.append(len(list(tmp_path.iterdir())))  # payloads already parsed
+        return scraping.ParseTask("Toyota", "Hyryder", _parse, (str(tmp_path), name, 0.2))
+
+    rows = scraping.run_jobs([(fetch, (f"V{i}",)) for i in range(4)], max_workers=1, parse_workers=2, parse_backlog=1)
+    assert sorted(r.variant for r in rows) == ["V0", "V1", "V2", "V3"]
+    # With one payload allowed to wait for a parser, each fetch starts after the previous parse
+    assert started_after == [0, 1, 2, 3]
+
+
+def _rows_for(model):
+    return [PriceRecord("Tata", model, "Petrol", "MT", "XE", 500000, "Delhi")]
+
+
+def test_failed_jobs_and_parses_do_not_stop_the_run(tmp_path, capsys):
+    def broken():
+        raise RuntimeError("boom")
+
+    def fetch():
+        return scraping.ParseTask("Toyota", "Glanza", _parse, (str(tmp_path / "missing"), "G", 0))
+
+    def plan():
+        return scraping.FollowUp([(broken, ()), (fetch, ()), (lambda: _rows_for("Tiago"), ())])
+
+    rows = scraping.run_jobs([(plan, ())], max_workers=2, parse_workers=1)
+    assert [r.model for r in rows] == ["Tiago"]
+    out = capsys.readouterr().out
+    assert "Scrape job broken failed" in out and "Parse failed for Toyota Glanza" in out
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import initialization
+from records import PriceRecord
+
+ROWS = [
+    PriceRecord("Tata", "Nexon", "Petrol", "MT", "Smart Plus S", 900000, "Delhi"),
+    PriceRecord("Tata", "Nexon", "Diesel", "AMT", "Fearless Plus PS", 1500000, "Delhi"),
+    PriceRecord("Tata", "Harrier", "Diesel", "AT", "Fearless X Dark", 2400000, "Delhi"),
+    PriceRecord("Kia", "Seltos", "Petrol", "IVT", "HTX Plus", 1700000, "Delhi"),
+    PriceRecord("Tata", "Nexon", "Petrol", "MT", "Smart Plus S", 920000, "Mumbai"),
+]
+
+
+def _found(df):
+    return sorted(zip(df["model"], df["variant"], df["city"]))
+
+
+def test_partial_words_match_inside_names(db):
+    initialization.store_prices(ROWS)
+    assert _found(initialization.search_variants("arri")) == [("Harrier", "Fearless X Dark", "Delhi")]
+    assert _found(initialization.search_variants("ltos")) == [("Seltos", "HTX Plus", "Delhi")]
+
+
+def test_every_word_must_match_across_columns(db):
+    initialization.store_prices(ROWS)
+    assert _found(initialization.search_variants("nexon fearless")) == [("Nexon", "Fearless Plus PS", "Delhi")]
+    assert _found(initialization.search_variants("Tata plus", city="Delhi")) == [
+        ("Nexon", "Fearless Plus PS", "Delhi"), ("Nexon", "Smart Plus S", "Delhi")]
+    assert initialization.search_variants("nexon htx").empty
+
+
+def test_short_words_filter_the_trigram_matches(db):
+    initialization.store_prices(ROWS)
+    assert _found(initialization.search_variants("nexon PS")) == [("Nexon", "Fearless Plus PS", "Delhi")]
+    assert _found(initialization.search_variants("dark X")) == [("Harrier", "Fearless X Dark", "Delhi")]
+
+
+def test_quotes_and_operators_are_literal(db):
+    initialization.store_prices(ROWS)
+    for text in ['"nexon', "plus OR", "smart-plus", "NEAR(nexon"]:
+        initialization.search_variants(text)  # no FTS5 syntax error
+    assert initialization.search_variants("").empty
+
+
+def test_index_follows_new_prices_and_deletes(db):
+    initialization.store_prices(ROWS)
+    now = datetime.now().isoformat()
+    initialization.add_price("Kia", "Seltos", "HTX Plus", 1750000, "Petrol", "IVT", now, "Delhi")
+    found = initialization.search_variants("seltos")
+    assert list(found["price"]) == [1750000] and list(found["source"]) == ["manual"]
+
+    initialization.add_price("Maruti", "Brezza", "ZXi", 1100000, "Petrol", "MT", now, "Delhi")
+    assert _found(initialization.search_variants("brez")) == [("Brezza", "ZXi", "Delhi")]
+    manual, _ = initialization.get_manual_entries()
+    initialization.delete_prices(manual["id"])
+    assert initialization.search_variants("brez").empty
+    assert len(initialization.search_variants("seltos")) == 1  # the scraped price still names it
@@ -0,0 +1,129 @@
+import pytest
+
+import scraping
+
+DAY = 86400
+NEXON = scraping.TATA_MODEL_CONFIGS[0]
+CODE = "India-DL-DELHI"
+FILTERS = {"fuel_type": {"1-ID-267": "Petrol", "1-ID-1738": "Diesel"},
+           "transmission_type": {"5-251EY13B": "MT", "5-251EY13J": "AT"}, "edition": {}}
+
+
+@pytest.fixture
+def plan(tmp_path, monkeypatch):
+    plan = scraping.RequestPlan(str(tmp_path / "plan.json"), reprobe_days=7)
+    monkeypatch.setattr(scraping, "TATA_PLAN", plan)
+    monkeypatch.setattr(scraping, "TATA_BATCH_FILTERS", False)
+    monkeypatch.setitem(scraping.FILTER_CACHE, (CODE, NEXON["name"]), FILTERS)
+    return plan
+
+
+def _key(fuel, trans):
+    return scraping._tata_plan_key(NEXON, "standard", fuel, trans, CODE)
+
+
+def test_unknown_and_non_empty_keys_are_requested(plan):
+    plan.record("a", 3, now=0)
+    assert plan.should_request("a", now=100 * DAY) and plan.should_request("new", now=0)
+    assert plan.stats == {"requested": 2}
+
+
+def test_empty_keys_are_skipped_until_their_reprobe_is_due(plan):
+    plan.record("a", 0, now=0)
+    assert not plan.should_request("a", now=6 * DAY)
+    assert plan.should_request("a", now=7 * DAY * 1.51)  # past the longest stretch
+    assert plan.stats == {"skipped": 1, "reprobed": 1}
+
+
+def test_reprobes_are_spread_over_runs(plan):
+    keys = [_key(f"F{i}", "MT") for i in range(200)]
+    for k in keys:
+        plan.record(k, 0, now=0)
+    due = sum(plan.should_request(k, now=9 * DAY) for k in keys)  # between 7 and 7 × 1.5 days
+    assert 0 < due < len(keys)
+
+
+def test_plan_survives_a_restart(plan):
+    plan.record("a", 0, now=0)
+    plan.save()
+    reloaded = scraping.RequestPlan(plan.path, reprobe_days=7)
+    assert not reloaded.should_request("a", now=DAY)
+
+
+def test_model_jobs_skip_combos_known_to_be_empty(plan):
+    plan.record(_key("1-ID-1738", "5-251EY13B"), 0)
+    plan.record(_key("1-ID-1738", "5-251EY13J"), 0)
+    plan.record(_key("1-ID-267", "5-251EY13B"), 4)
+    jobs = scraping._tata_model_jobs(NEXON, "Delhi", CODE)
+    assert sorted(args[2:4] for _, args in jobs) == [("1-ID-267", "5-251EY13B"), ("1-ID-267", "5-251EY13J")]
+    assert plan.stats == {"requested": 2, "skipped": 2}
+
+
+def test_fetch_records_row_counts_but_not_failures(plan, monkeypatch):
+    variants = [{"variantLabel": "Nexon Smart Petrol 5MT", "priceDetails": {"originalPrice": "₹8,00,000"}}]
+    monkeypatch.setattr(scraping, "_tata_post_prices", lambda *a: variants)
+    rows = scraping._tata_fetch_one(NEXON, "standard", "1-ID-267", "5-251EY13B", "Delhi", CODE)
+    assert [(r.variant, r.fuel, r.transmission, r.price) for r in rows] == [("Smart", "Petrol", "MT", 800000)]
+    assert plan._entries[_key("1-ID-267", "5-251EY13B")]["rows"] == 1
+
+    def down(*a):
+        raise ConnectionError("timed out")
+
+    monkeypatch.setattr(scraping, "_tata_post_prices", down)
+    assert scraping._tata_fetch_one(NEXON, "standard", "1-ID-1738", "5-251EY13B", "Delhi", CODE) == []
+    assert _key("1-ID-1738", "5-251EY13B") not in plan._entries  # an outage does not mark it empty
+
+
+def _variant(label, price="₹8,00,000"):
+    return {"variantLabel": label, "priceDetails": {"originalPrice": price}}
+
+
+ALL_COMBOS = [(f, t) for f in FILTERS["fuel_type"] for t in FILTERS["transmission_type"]]
+
+
+def test_model_jobs_batch_an_edition_into_one_call(plan, monkeypatch):
+    monkeypatch.setattr(scraping, "TATA_BATCH_FILTERS", True)
+    plan.record(_key("1-ID-1738", "5-251EY13J"), 0)
+    jobs = scraping._tata_model_jobs(NEXON, "Delhi", CODE)
+    assert [fn for fn, _ in jobs] == [scraping._tata_fetch_batch]
+    assert sorted(jobs[0][1][2]) == sorted(c for c in ALL_COMBOS if c != ("1-ID-1738", "5-251EY13J"))
+
+
+def test_batch_results_are_split_by_label(plan, monkeypatch):
+    calls = []
+
+    def post(cfg, editions, fuels, trans, code):
+        calls.append((fuels, trans))
+        return [_variant("Nexon Smart Petrol 5MT"), _variant("Nexon Fearless Diesel DCA", "₹13,50,000")]
+
+    monkeypatch.setattr(scraping, "_tata_post_prices", post)
+    rows = scraping._tata_fetch_batch(NEXON, "standard", ALL_COMBOS, "Delhi", CODE)
+    assert len(calls) == 1
+    assert sorted((r.fuel, r.transmission, r.price) for r in rows) == [
+        ("Diesel", "AT", 1350000), ("Petrol", "MT", 800000)]
+    # every pair in the request was probed, including the two that came back empty
+    assert {k: e["rows"] for k, e in plan._entries.items()} == {
+        _key("1-ID-267", "5-251EY13B"): 1, _key("1-ID-267", "5-251EY13J"): 0,
+        _key("1-ID-1738", "5-251EY13B"): 0, _key("1-ID-1738", "5-251EY13J"): 1}
+    assert plan.stats["batched"] == 1
+
+
+def test_only_a_lone_candidate_is_attributed_without_a_label_hint():
+    groups = scraping._tata_attribute([_variant("Nexon Smart")], ["1-ID-267"], ["5-251EY13B", "5-251EY13J"])
+    assert groups is None  # one fuel needs no hint, but MT vs AT cannot be told
+    groups = scraping._tata_attribute([_variant("Nexon Smart AT")], ["1-ID-267"], ["5-251EY13B", "5-251EY13J"])
+    assert list(groups) == [("Petrol", "AT")]
+
+
+@pytest.mark.parametrize("outcome", ["ambiguous", "error"])
+def test_batch_falls_back_to_one_call_per_combo(plan, monkeypatch, outcome):
+    def post(*a):
+        if outcome == "error":
+            raise ConnectionError("reset")
+        return [_variant("Nexon Smart")]  # neither fuel nor transmission in the label
+
+    monkeypatch.setattr(scraping, "_tata_post_prices", post)
+    jobs = scraping._tata_fetch_batch(NEXON, "standard", ALL_COMBOS, "Delhi", CODE)
+    assert isinstance(jobs, scraping.FollowUp)
+    assert [(fn, args[2:4]) for fn, args in jobs] == [(scraping._tata_fetch_one, c) for c in ALL_COMBOS]
+    assert plan._entries == {} and plan.stats["batch_fallback"] == 1
@@ -0,0 +1,49 @@
+import contextvars
+import json
+
+import scraping
+import telemetry
+from records import PriceRecord
+
+
+def _rows(model, *variants):
+    return [PriceRecord("Tata", model, "Petrol", "MT", v, 800000, "Delhi") for v in variants]
+
+
+def test_requests_outside_a_run_are_not_kept():
+    metrics = telemetry.current()
+    for _ in range(1000):
+        metrics.record_request("Tata", "Nexon", "https://example.invalid", 0.1, 200, 10, 0)
+    assert not hasattr(metrics, "summary")  # nothing to export, nothing collected
+
+
+def test_run_metrics_count_rows_after_dedupe():
+    def fetch(model, variants):
+        return _rows(model, *variants)
+
+    def run():
+        metrics = telemetry.use(telemetry.ScrapeMetrics())
+        return metrics, scraping.run_jobs([
+            (fetch, ("Nexon", ["Smart", "Pure"])),
+            (fetch, ("Nexon", ["Smart", "Creative"])),  # Smart is a repeat
+            (fetch, ("Tiago", ["XE"])),
+        ], max_workers=2, parse_workers=1)
+
+    metrics, rows = contextvars.copy_context().run(run)  # the run's metrics stay in its own context
+    assert len(rows) == 4
+    summary = metrics.summary().set_index("model")["rows"].to_dict()
+    assert summary == {"Nexon": 3, "Tiago": 1}
+    assert 'scraper_rows_total{brand="Tata",model="Nexon"} 3' in metrics.to_prometheus()
+
+
+def test_jsonl_log_rotates_at_the_size_cap(tmp_path):
+    path = str(tmp_path / "metrics.jsonl")
+    metrics = telemetry.ScrapeMetrics()
+    metrics.record_request("Tata", "Nexon", "https://example.invalid", 0.1, 200, 10, 0)
+    line_bytes = len(json.dumps(metrics._events[0])) + 1
+    for _ in range(3):
+        metrics.write_jsonl(path, max_bytes=2 * line_bytes)
+    with open(path) as f:
+        assert len(f.readlines()) == 1
+    with open(path + ".1") as f:
+        assert len(f.readlines()) == 2